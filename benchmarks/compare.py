@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Sat Oct 17 22:07:48 2026
+
+@author: lillux
+
+Compare two benchmark result files, for example before and after an upgrade.
+
+    python benchmarks/compare.py baseline.json new.json --tolerance 0.1
+
+Exits with status 1 if a case common to both files got slower than the tolerance.
+"""
+import sys
+import json
+import argparse
+
+
+def load(path):
+    with open(path) as f:
+        data = json.load(f)
+    return {(result['engine'], result['model'], result['size']): result for result in data['results']}, data['metadata']
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Compare two gillespie benchmark result files.')
+    parser.add_argument('baseline')
+    parser.add_argument('new')
+    parser.add_argument('--tolerance', type=float, default=0.1,
+                        help='relative slowdown of the wall time reported as a regression')
+    args = parser.parse_args(argv)
+
+    baseline, baseline_metadata = load(args.baseline)
+    new, new_metadata = load(args.new)
+    print(f"baseline: {baseline_metadata.get('gillespie_version')} {baseline_metadata.get('git_commit', '')[:10]}")
+    print(f"new:      {new_metadata.get('gillespie_version')} {new_metadata.get('git_commit', '')[:10]}")
+
+    regressions = 0
+    for key in sorted(baseline.keys() & new.keys(), key=str):
+        before, after = baseline[key]['wall_time'], new[key]['wall_time']
+        ratio = after / before if before > 0 else float('inf')
+        memory_ratio = (new[key]['peak_memory_bytes'] / baseline[key]['peak_memory_bytes']
+                        if baseline[key]['peak_memory_bytes'] else float('inf'))
+        flag = ''
+        if ratio > 1 + args.tolerance:
+            flag = 'SLOWER'
+            regressions += 1
+        elif ratio < 1 - args.tolerance:
+            flag = 'faster'
+        engine, model, size = key
+        print(f'{engine:20s} {str(model):20s} {size:8s} time x{ratio:6.2f}  memory x{memory_ratio:6.2f}  {flag}')
+    for key in sorted(baseline.keys() ^ new.keys(), key=str):
+        print(f"{' '.join(map(str, key))}: only in {'baseline' if key in baseline else 'new'}")
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
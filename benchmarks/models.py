@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Sat Oct 17 22:03:36 2026
+
+@author: lillux
+"""
+import numpy as np
+from gillespie.network import ReactionNetwork
+
+
+def schlogl():
+    '''
+    Schlögl model: 2X + A -> 3X, 3X -> 2X + A, B -> X, X -> B, with A and B fixed (bistable).
+    '''
+    network = ReactionNetwork(reactants=[[1, 0, 2], [0, 0, 3], [0, 1, 0], [0, 0, 1]],
+                              products=[[0, 0, 3], [1, 0, 2], [0, 0, 1], [0, 1, 0]],
+                              rate_constants=[3e-7, 1e-4, 1e-3, 3.5],
+                              species=['A', 'B', 'X'])
+    return {'network': network, 'reagent_quantity': [100000, 200000, 250], 'set_fixed_reagents': [0, 1]}
+
+
+def lotka_volterra():
+    '''
+    Lotka-Volterra predator-prey model: X -> 2X, X + Y -> 2Y, Y -> 0.
+    '''
+    network = ReactionNetwork(reactants=[[1, 0], [1, 1], [0, 1]],
+                              products=[[2, 0], [0, 2], [0, 0]],
+                              rate_constants=[10.0, 0.01, 10.0],
+                              species=['prey', 'predator'])
+    return {'network': network, 'reagent_quantity': [1000, 1000], 'set_fixed_reagents': None}
+
+
+def dimerization_decay():
+    '''
+    Dimerization-decay model (Gillespie 2001): S1 -> 0, 2 S1 -> S2, S2 -> 2 S1, S2 -> S3.
+    '''
+    network = ReactionNetwork(reactants=[[1, 0, 0], [2, 0, 0], [0, 1, 0], [0, 1, 0]],
+                              products=[[0, 0, 0], [0, 1, 0], [2, 0, 0], [0, 0, 1]],
+                              rate_constants=[1.0, 0.002, 0.5, 0.04],
+                              species=['S1', 'S2', 'S3'])
+    # gillespie_ssa stops when a species reaches 0, so S2 and S3 do not start empty
+    return {'network': network, 'reagent_quantity': [100000, 100, 100], 'set_fixed_reagents': None}
+
+
+def birth_death():
+    '''
+    Birth-death process: 0 -> X, X -> 0, stationary mean 1000.
+    '''
+    network = ReactionNetwork(reactants=[[0], [1]],
+                              products=[[1], [0]],
+                              rate_constants=[1000.0, 1.0],
+                              species=['X'])
+    return {'network': network, 'reagent_quantity': [1000], 'set_fixed_reagents': None}
+
+
+def large_network(n_species: int = 200, n_reactions: int = 1000, seed: int = 0):
+    '''
+    Random network of unimolecular and bimolecular conversions, for the scaling with the number of reactions.
+    '''
+    rng = np.random.default_rng(seed)
+    reactants = np.zeros((n_reactions, n_species), dtype=np.int64)
+    products = np.zeros((n_reactions, n_species), dtype=np.int64)
+    for reaction in range(n_reactions):
+        n_reactants = rng.integers(1, 3)
+        for species in rng.choice(n_species, size=n_reactants, replace=False):
+            reactants[reaction, species] += 1
+        products[reaction, rng.integers(n_species)] += 1
+    rate_constants = np.where(reactants.sum(axis=1) == 1, 1.0, 1e-3)
+    network = ReactionNetwork(reactants, products, rate_constants)
+    return {'network': network, 'reagent_quantity': [100] * n_species, 'set_fixed_reagents': None}
+
+
+MODELS = {'schlogl': schlogl,
+          'lotka_volterra': lotka_volterra,
+          'dimerization_decay': dimerization_decay,
+          'birth_death': birth_death,
+          'large_network': large_network}
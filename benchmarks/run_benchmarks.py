@@ -0,0 +1,191 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Sat Oct 17 22:05:12 2026
+
+@author: lillux
+
+Run the benchmark suite and store the results as JSON.
+
+    python benchmarks/run_benchmarks.py --sizes small medium --output results.json
+
+Each (engine, model, size) case is timed on its best of --repeat runs,
+then run once more under tracemalloc to measure its peak memory.
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import platform
+import subprocess
+import tracemalloc
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import gillespie
+from gillespie.gillespie import gillespie_ssa
+from gillespie.gillespie_dynamic import gillespie_dynamic
+from gillespie.direct import gillespie_direct
+from gillespie.next_reaction import gillespie_nrm
+from gillespie.ensemble import gillespie_ensemble
+from gillespie.evolution import EvoSim, MultiSim, VectorSim
+from models import MODELS
+
+# iterations of the single trajectory engines
+SIZES = {'small': 10_000, 'medium': 100_000, 'large': 1_000_000}
+# replicates of the ensemble engines, and epochs of the evolutionary ones
+ENSEMBLE_SIZES = {'small': 100, 'medium': 1_000, 'large': 10_000}
+EVO_PARAMS = {'wt': 1000, 'sv': 10, 'r': 0.2, 's': 0.5, 'u': 1e-4, 'max_gen': 200}
+
+
+def run_ssa(model, size):
+    sim = gillespie_ssa(model['reagent_quantity'], model['network'].state_change_vectors, model['network'],
+                        iteration=SIZES[size], set_fixed_reagents=model['set_fixed_reagents'] or False, rng=0)
+    return sim.actual_iteration
+
+
+def run_ssa_numba(model, size):
+    # falls back to the Python loop, and times it, when numba is not installed
+    sim = gillespie_ssa(model['reagent_quantity'], None, model['network'],
+                        iteration=SIZES[size], set_fixed_reagents=model['set_fixed_reagents'] or False, rng=0,
+                        backend='numba')
+    return sim.actual_iteration
+
+
+def run_tau_leaping(model, size):
+    sim = gillespie_ssa(model['reagent_quantity'], model['network'].state_change_vectors, model['network'],
+                        iteration=SIZES[size], set_fixed_reagents=model['set_fixed_reagents'] or False,
+                        method='tau_leaping', rng=0)
+    return sim.actual_iteration
+
+
+def run_dynamic(model, size):
+    network = model['network']
+    sim = gillespie_dynamic(model['reagent_quantity'],
+                            {'a': network.state_change_vectors, 'b': network.state_change_vectors},
+                            {'a': network, 'b': network},
+                            max_iteration=SIZES[size], stop_condition='iterations',
+                            set_fixed_reagents=model['set_fixed_reagents'],
+                            oscillation_interval={'a': 0.1, 'b': 0.1}, start_with='a', rng=0)
+    return sim.actual_iteration
+
+
+def run_direct(model, size):
+    sim = gillespie_direct(model['reagent_quantity'], None, model['network'], max_iteration=SIZES[size],
+                           stop_condition='iterations', set_fixed_reagents=model['set_fixed_reagents'], rng=0)
+    return sim.actual_iteration
+
+
+def run_nrm(model, size):
+    sim = gillespie_nrm(model['reagent_quantity'], None, model['network'], max_iteration=SIZES[size],
+                        stop_condition='iterations', set_fixed_reagents=model['set_fixed_reagents'], rng=0)
+    return sim.actual_iteration
+
+
+def run_ensemble(model, size):
+    sim = gillespie_ensemble(model['reagent_quantity'], None, model['network'], n_replicates=ENSEMBLE_SIZES[size],
+                             max_iteration=1000, stop_condition='iterations',
+                             set_fixed_reagents=model['set_fixed_reagents'], rng=0)
+    return int(sim.actual_iteration.sum())
+
+
+def run_evosim(model, size):
+    generations = 0
+    for epoch in range(ENSEMBLE_SIZES[size]):
+        generations += EvoSim(**EVO_PARAMS, rng=epoch).generations
+    return generations
+
+
+def run_multisim(model, size):
+    sim = MultiSim(ENSEMBLE_SIZES[size], EVO_PARAMS, ncore=-1, seed=0, summary_only=True)
+    return int(sim.generations.sum())
+
+
+def run_vectorsim(model, size):
+    sim = VectorSim(100 * ENSEMBLE_SIZES[size], EVO_PARAMS, seed=0)
+    return int(sim.generations.sum())
+
+
+# engine: (function, models it runs on); None means it ignores the model
+ENGINES = {'gillespie_ssa': (run_ssa, list(MODELS)),
+           'gillespie_ssa_numba': (run_ssa_numba, list(MODELS)),
+           'tau_leaping': (run_tau_leaping, ['schlogl', 'dimerization_decay', 'birth_death']),
+           'gillespie_dynamic': (run_dynamic, list(MODELS)),
+           'gillespie_direct': (run_direct, list(MODELS)),
+           'gillespie_nrm': (run_nrm, list(MODELS)),
+           'gillespie_ensemble': (run_ensemble, ['schlogl', 'lotka_volterra', 'birth_death']),
+           'EvoSim': (run_evosim, None),
+           'MultiSim': (run_multisim, None),
+           'VectorSim': (run_vectorsim, None)}
+
+
+def measure(function, model, size, repeat):
+    '''
+    Return the iterations, the best wall time of repeat runs and the peak traced memory.
+    '''
+    wall_times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        iterations = function(model, size)
+        wall_times.append(time.perf_counter() - start)
+    tracemalloc.start()
+    function(model, size)
+    peak_memory = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return iterations, min(wall_times), peak_memory
+
+
+def metadata():
+    try:
+        commit = subprocess.run(['git', 'rev-parse', 'HEAD'], capture_output=True, text=True,
+                                cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+    except OSError:
+        commit = ''
+    return {'gillespie_version': gillespie.__version__,
+            'git_commit': commit,
+            'numpy_version': np.__version__,
+            'python_version': platform.python_version(),
+            'platform': platform.platform(),
+            'processor': platform.processor(),
+            'cpu_count': os.cpu_count(),
+            'date': time.strftime('%Y-%m-%dT%H:%M:%S')}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Run the gillespie benchmark suite.')
+    parser.add_argument('--engines', nargs='+', default=list(ENGINES), choices=list(ENGINES))
+    parser.add_argument('--models', nargs='+', default=list(MODELS), choices=list(MODELS))
+    parser.add_argument('--sizes', nargs='+', default=['small', 'medium'], choices=list(SIZES))
+    parser.add_argument('--repeat', type=int, default=3, help='timed runs of each case, the best is kept')
+    parser.add_argument('--output', default='benchmark_results.json')
+    args = parser.parse_args(argv)
+
+    models = {name: MODELS[name]() for name in args.models}
+    results = []
+    for engine in args.engines:
+        function, engine_models = ENGINES[engine]
+        cases = [(name, models[name]) for name in engine_models if name in models] if engine_models else [(None, None)]
+        for model_name, model in cases:
+            for size in args.sizes:
+                iterations, wall_time, peak_memory = measure(function, model, size, args.repeat)
+                result = {'engine': engine,
+                          'model': model_name,
+                          'size': size,
+                          'iterations': iterations,
+                          'wall_time': wall_time,
+                          'iterations_per_second': iterations / wall_time if wall_time > 0 else None,
+                          'peak_memory_bytes': peak_memory}
+                results.append(result)
+                print(f"{engine:20s} {str(model_name):20s} {size:8s} {wall_time:10.4f} s "
+                      f"{result['iterations_per_second'] or 0:14.0f} it/s {peak_memory / 2**20:10.2f} MiB")
+
+    with open(args.output, 'w') as f:
+        json.dump({'metadata': metadata(), 'results': results}, f, indent=2)
+    print(f'Results written to {args.output}')
+
+
+if __name__ == '__main__':
+    main()
@@ -1,6 +1,37 @@
-from . import gillespie
-from . import stochastic_backend
-from . import evolution
-from . import gillespie_dynamic
+import importlib
 
-__version__ = '0.1'
\ No newline at end of file
+__version__ = '0.1'
+
+# the submodules are imported at their first use, so that importing gillespie
+# does not load joblib and every engine for a single run
+_SUBMODULES = ('gillespie',
+               'stochastic_backend',
+               'evolution',
+               'gillespie_dynamic',
+               'ensemble',
+               'network',
+               'next_reaction',
+               'sampling',
+               'direct',
+               'tau_leaping',
+               'rng',
+               'sweep',
+               'schedule',
+               'hybrid',
+               'instrumentation',
+               'statistics',
+               'events',
+               'aggregate',
+               'kernels',
+               'checkpoint',
+               'cli')
+
+
+def __getattr__(name):
+    if name in _SUBMODULES:
+        return importlib.import_module(f'.{name}', __name__)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def __dir__():
+    return sorted(list(globals()) + list(_SUBMODULES))
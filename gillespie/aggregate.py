@@ -0,0 +1,231 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 10:02:35 2026
+
+@author: lillux
+"""
+import numpy as np
+from gillespie.streaming import load_trajectory
+from typing import List
+
+
+def resample(times: np.ndarray, states: np.ndarray, grid: np.ndarray) -> np.ndarray:
+    '''
+    Sample a piecewise constant trajectory on a time grid.
+
+    Each grid point takes the last state recorded at or before it, found with
+    one searchsorted call. Grid points before the first recorded time take the
+    first state. Works on memory mapped arrays too, reading only the rows used.
+
+    Parameters
+    ----------
+    times : np.ndarray
+        Sorted event times, shape (n,).
+    states : np.ndarray
+        The state reached at each time, shape (n, n_species).
+    grid : np.ndarray
+        The time points, shape (n_points,).
+
+    Returns
+    -------
+    np.ndarray
+        The states on the grid, shape (n_points, n_species).
+
+    '''
+    index = np.searchsorted(times, grid, side='right') - 1
+    np.maximum(index, 0, out=index)
+    return np.asarray(states[index])
+
+
+class EnsembleAggregator:
+
+    def __init__(self, grid: List[float], quantiles: List[float] = None, n_replicates: int = None,
+                 bins: List[float] = None):
+        '''
+        Aggregate the trajectories of many replicates on a common time grid.
+
+        The replicates are added one at a time, or in batches already sampled
+        on the grid (as gillespie_ensemble.sampled_history). Mean and variance
+        are updated in place (Welford), so they need no per replicate storage.
+        Exact quantiles need the values of every replicate, kept in a single
+        (n_replicates, n_points, n_species) array when quantiles are requested:
+        memory grows linearly with the number of replicates. With bins, each
+        grid point and species keeps a histogram instead, of fixed size
+        (n_points, n_species, len(bins) - 1), and the quantiles are interpolated
+        inside the bins, so they are exact up to one bin width.
+
+        Parameters
+        ----------
+        grid : List[float]
+            The common time points.
+        quantiles : List[float], optional
+            Quantiles to compute, e.g. (0.05, 0.5, 0.95). The default is None.
+        n_replicates : int, optional
+            Expected number of replicates, to allocate the quantile buffer once.
+            The default is None, grow as needed.
+        bins : List[float], optional
+            Sorted bin edges of the quantile histograms, the same for every species.
+            Values outside the edges are counted in the first or the last bin.
+            For molecule counts, edges at the half integers (np.arange(-0.5, n_max + 1))
+            give one bin per count. The default is None, exact quantiles.
+
+        Returns
+        -------
+        None.
+
+        '''
+        self.grid = np.asarray(grid, dtype=float)
+        self.quantiles = None if quantiles is None else list(quantiles)
+        self.n_replicates = 0
+        self._mean = None
+        self._m2 = None
+        self._values = None
+        self._capacity = n_replicates or 64
+        self.bins = None if bins is None else np.asarray(bins, dtype=float)
+        self._counts = None
+
+    def add(self, times: np.ndarray, states: np.ndarray):
+        '''
+        Add one replicate, given its event times and states (see resample).
+        '''
+        self.add_resampled(resample(times, states, self.grid)[None])
+
+    def add_resampled(self, values: np.ndarray):
+        '''
+        Add a batch of replicates already on the grid, shape (n_replicates, n_points, n_species).
+        '''
+        values = np.asarray(values)
+        n_new = values.shape[0]
+        if n_new == 0:
+            return
+        if self._mean is None:
+            self._mean = np.zeros(values.shape[1:])
+            self._m2 = np.zeros(values.shape[1:])
+        # pairwise update of the batch moments into the running ones
+        batch_mean = values.mean(axis=0)
+        batch_m2 = ((values - batch_mean) ** 2).sum(axis=0)
+        total = self.n_replicates + n_new
+        delta = batch_mean - self._mean
+        self._mean += delta * (n_new / total)
+        self._m2 += batch_m2 + delta ** 2 * (self.n_replicates * n_new / total)
+
+        if self.quantiles is not None and self.bins is not None:
+            n_bins = len(self.bins) - 1
+            if self._counts is None:
+                self._counts = np.zeros(values.shape[1:] + (n_bins,), dtype=np.int64)
+            bin_index = np.searchsorted(self.bins, values, side='right') - 1
+            np.clip(bin_index, 0, n_bins - 1, out=bin_index)
+            # one bincount over the (grid point, species, bin) cells of the whole batch
+            cell = np.arange(self._counts[..., 0].size).reshape(values.shape[1:]) * n_bins
+            self._counts += np.bincount((cell + bin_index).ravel(),
+                                        minlength=self._counts.size).reshape(self._counts.shape)
+        elif self.quantiles is not None:
+            if self._values is None:
+                self._values = np.empty((max(self._capacity, n_new),) + values.shape[1:], dtype=values.dtype)
+            elif total > len(self._values):
+                grown = np.empty((max(total, 2 * len(self._values)),) + values.shape[1:], dtype=self._values.dtype)
+                grown[:self.n_replicates] = self._values[:self.n_replicates]
+                self._values = grown
+            self._values[self.n_replicates:total] = values
+        self.n_replicates = total
+
+    @property
+    def mean(self) -> np.ndarray:
+        '''
+        The mean over the replicates, shape (n_points, n_species).
+        '''
+        return self._mean.copy()
+
+    @property
+    def variance(self) -> np.ndarray:
+        '''
+        The sample variance over the replicates (ddof=1), shape (n_points, n_species).
+        '''
+        if self.n_replicates < 2:
+            return np.full_like(self._mean, np.nan)
+        return self._m2 / (self.n_replicates - 1)
+
+    @property
+    def std(self) -> np.ndarray:
+        '''
+        The sample standard deviation over the replicates, shape (n_points, n_species).
+        '''
+        return np.sqrt(self.variance)
+
+    def quantile_bands(self) -> dict:
+        '''
+        Return {quantile: array of shape (n_points, n_species)} for the requested quantiles.
+        '''
+        if self.quantiles is None:
+            raise ValueError("quantiles were not requested")
+        if self.bins is not None:
+            return {quantile: self._binned_quantile(quantile) for quantile in self.quantiles}
+        bands = np.quantile(self._values[:self.n_replicates], self.quantiles, axis=0)
+        return dict(zip(self.quantiles, bands))
+
+    def _binned_quantile(self, quantile: float) -> np.ndarray:
+        '''
+        Interpolate a quantile in the histograms, assuming the values spread evenly inside each bin.
+        '''
+        cumulative = self._counts.cumsum(axis=-1)
+        # the empty bins below the first value are skipped also for the quantile 0
+        target = max(quantile * self.n_replicates, 1e-9)
+        chosen = np.minimum((cumulative < target).sum(axis=-1), self._counts.shape[-1] - 1)[..., None]
+        count = np.take_along_axis(self._counts, chosen, axis=-1)[..., 0]
+        below = np.take_along_axis(cumulative, chosen, axis=-1)[..., 0] - count
+        fraction = np.clip((target - below) / np.maximum(count, 1), 0, 1)
+        low = self.bins[chosen[..., 0]]
+        return low + fraction * (self.bins[chosen[..., 0] + 1] - low)
+
+    def summary(self) -> dict:
+        '''
+        Return the grid, the number of replicates, mean, variance, std and the quantile bands if requested.
+        '''
+        summary = {'time': self.grid,
+                   'n_replicates': self.n_replicates,
+                   'mean': self.mean,
+                   'variance': self.variance,
+                   'std': self.std}
+        if self.quantiles is not None:
+            summary['quantiles'] = self.quantile_bands()
+        return summary
+
+
+def aggregate(trajectories, grid: List[float], quantiles: List[float] = (0.05, 0.5, 0.95),
+              bins: List[float] = None) -> dict:
+    '''
+    Resample many trajectories on a common grid and compute their mean, variance and quantile bands.
+
+    Parameters
+    ----------
+    trajectories : iterable
+        (times, states) pairs, for example
+        ((sim.timestep_list, sim.molecular_species_history) for sim in simulations),
+        or load_ensemble(directories) for trajectories written to disk.
+    grid : List[float]
+        The common time points.
+    quantiles : List[float], optional
+        Quantiles to compute. The default is (0.05, 0.5, 0.95), None for none.
+    bins : List[float], optional
+        Bin edges for quantiles in bounded memory, see EnsembleAggregator. The default is None.
+
+    Returns
+    -------
+    dict
+        See EnsembleAggregator.summary.
+
+    '''
+    n_replicates = len(trajectories) if hasattr(trajectories, '__len__') else None
+    aggregator = EnsembleAggregator(grid, quantiles=quantiles, n_replicates=n_replicates, bins=bins)
+    for times, states in trajectories:
+        aggregator.add(times, states)
+    return aggregator.summary()
+
+
+def load_ensemble(directories: List[str]):
+    '''
+    Yield the (times, states) memory mapped arrays of trajectories written by streaming.TrajectoryWriter.
+    '''
+    for directory in directories:
+        yield load_trajectory(directory, mmap_mode='r')
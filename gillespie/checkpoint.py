@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 14:05:37 2026
+
+@author: lillux
+"""
+import os
+import pickle
+import logging
+from time import perf_counter
+
+logger = logging.getLogger(__name__)
+
+# format of the checkpoint files, checked when loading
+CHECKPOINT_VERSION = 1
+
+
+class Checkpointer:
+
+    def __init__(self, path: str, every_events: int = None, every_seconds: float = None):
+        '''
+        Periodic snapshots of a simulation, to resume it after a crash.
+
+        Pass an instance to the checkpoint argument of gillespie_dynamic, and
+        continue a killed run with gillespie_dynamic.resume(path). The snapshot
+        is written to a temporary file and renamed over path, so path always
+        holds a complete checkpoint.
+
+        The snapshot holds the recorder. With write_chunks the rows are written
+        before each snapshot, so only the state and a few pending rows are
+        saved. A run kept in memory (run=True) saves its whole trajectory
+        every time, so its checkpoints grow with the run: stream long runs,
+        or record them with record_every=0 or record_times.
+
+        Parameters
+        ----------
+        path : str
+            The checkpoint file.
+        every_events : int, optional
+            Iterations between two snapshots. The default is None.
+        every_seconds : float, optional
+            Wall time between two snapshots. The default is None.
+
+        Returns
+        -------
+        None.
+
+        '''
+        if every_events is None and every_seconds is None:
+            raise ValueError("every_events or every_seconds must be given")
+        self.path = path
+        self.every_events = every_events
+        self.every_seconds = every_seconds
+        self.n_saved = 0
+        self._last_iteration = 0
+        self._last_wall = perf_counter()
+
+    def start(self, iteration: int):
+        '''
+        Called by the simulator before its first iteration.
+        '''
+        self._last_iteration = iteration
+        self._last_wall = perf_counter()
+
+    def due(self, iteration: int) -> bool:
+        '''
+        Tell whether a snapshot is due after the given iteration.
+        '''
+        if self.every_events and iteration - self._last_iteration >= self.every_events:
+            return True
+        return bool(self.every_seconds) and perf_counter() - self._last_wall >= self.every_seconds
+
+    def save(self, snapshot: dict, iteration: int):
+        '''
+        Write snapshot to path, atomically.
+        '''
+        temporary = f'{self.path}.tmp'
+        with open(temporary, 'wb') as file:
+            pickle.dump({'version': CHECKPOINT_VERSION, **snapshot}, file, protocol=pickle.HIGHEST_PROTOCOL)
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(temporary, self.path)
+        self.n_saved += 1
+        self._last_iteration = iteration
+        self._last_wall = perf_counter()
+        logger.debug('Checkpoint %d written to %s at iteration %d.', self.n_saved, self.path, iteration)
+
+
+def load_checkpoint(path: str) -> dict:
+    '''
+    Read a checkpoint written by Checkpointer.
+    '''
+    with open(path, 'rb') as file:
+        snapshot = pickle.load(file)
+    if snapshot.get('version') != CHECKPOINT_VERSION:
+        raise ValueError(f"{path} is not a checkpoint of version {CHECKPOINT_VERSION}")
+    return snapshot
@@ -0,0 +1,277 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 16:21:50 2026
+
+@author: lillux
+"""
+import os
+import json
+import logging
+import argparse
+import numpy as np
+from itertools import repeat
+
+logger = logging.getLogger(__name__)
+
+ENGINES = ('ssa', 'direct', 'nrm')
+
+
+def load_model(path: str) -> dict:
+    '''
+    Read a model file, JSON (.json) or TOML (.toml).
+
+    The model holds:
+        species     the names of the species,
+        initial     the initial quantities, as a list or as {species: quantity}
+                    (missing species start at 0),
+        fixed       optional, the species kept at their initial quantity,
+        reactions   a list of {reactants: {species: n}, products: {species: n}, rate: c},
+                    or the matrices reactants and products (n_reactions x n_species)
+                    with the list rates,
+        stop        {time: max_time} or {iterations: max_iteration},
+        record      optional, {every: k} (0 for the first and last state only),
+                    or {times: [...]}, or {times: {start, stop, num}} for a linear grid,
+        run         optional, engine ('ssa', 'direct' or 'nrm'), method ('ssa' or
+                    'tau_leaping', engine 'ssa' only), backend ('python' or 'numba',
+                    engine 'ssa' only), sampler (engines 'ssa' and 'direct'), seed,
+                    replicates and workers.
+
+    Parameters
+    ----------
+    path : str
+        The model file.
+
+    Returns
+    -------
+    dict
+        The model, checked and normalized by parse_model.
+
+    '''
+    if path.endswith('.toml'):
+        try:
+            import tomllib
+        except ModuleNotFoundError:
+            # Python < 3.11
+            import tomli as tomllib
+        with open(path, 'rb') as file:
+            model = tomllib.load(file)
+    else:
+        with open(path) as file:
+            model = json.load(file)
+    return parse_model(model)
+
+
+def parse_model(model: dict) -> dict:
+    '''
+    Check a model (see load_model) and return it with index based stoichiometry.
+
+    The result holds species, initial (list), fixed (list of indices),
+    reactants, products, rates, stop_condition, max_time, max_iteration,
+    record_every, record_times and the run options with their defaults.
+    '''
+    species = list(model['species'])
+    index = {name: position for position, name in enumerate(species)}
+    if len(index) != len(species):
+        raise ValueError("species names must be unique")
+
+    def position(name):
+        if name not in index:
+            raise ValueError(f"unknown species {name!r}")
+        return index[name]
+
+    initial = model['initial']
+    if isinstance(initial, dict):
+        quantities = [0] * len(species)
+        for name, quantity in initial.items():
+            quantities[position(name)] = int(quantity)
+        initial = quantities
+    elif len(initial) != len(species):
+        raise ValueError("initial must have one quantity for each species")
+    fixed = [position(name) for name in model.get('fixed', [])]
+
+    if 'reactions' in model:
+        reactants = np.zeros((len(model['reactions']), len(species)), dtype=np.int64)
+        products = np.zeros_like(reactants)
+        rates = []
+        for reaction, description in enumerate(model['reactions']):
+            for name, n in description.get('reactants', {}).items():
+                reactants[reaction, position(name)] = n
+            for name, n in description.get('products', {}).items():
+                products[reaction, position(name)] = n
+            rates.append(float(description['rate']))
+        reactants, products = reactants.tolist(), products.tolist()
+    else:
+        reactants, products, rates = model['reactants'], model['products'], model['rates']
+
+    stop = model['stop']
+    if 'time' in stop:
+        stop_condition, max_time, max_iteration = 'time', float(stop['time']), None
+    elif 'iterations' in stop:
+        stop_condition, max_time, max_iteration = 'iterations', None, int(stop['iterations'])
+    else:
+        raise ValueError("stop must give time or iterations")
+
+    record = model.get('record', {})
+    record_times = record.get('times')
+    if isinstance(record_times, dict):
+        record_times = np.linspace(record_times['start'], record_times['stop'], int(record_times['num'])).tolist()
+
+    run = model.get('run', {})
+    engine = run.get('engine', 'ssa')
+    if engine not in ENGINES:
+        raise ValueError(f"Invalid engine. Choose one of {', '.join(ENGINES)}.")
+    return {'species': species,
+            'initial': initial,
+            'fixed': fixed,
+            'reactants': reactants,
+            'products': products,
+            'rates': rates,
+            'stop_condition': stop_condition,
+            'max_time': max_time,
+            'max_iteration': max_iteration,
+            'record_every': int(record.get('every', 1)),
+            'record_times': record_times,
+            'engine': engine,
+            'method': run.get('method', 'ssa'),
+            'backend': run.get('backend', 'python'),
+            'sampler': run.get('sampler', 'tree'),
+            'seed': run.get('seed'),
+            'replicates': int(run.get('replicates', 1)),
+            'workers': run.get('workers')}
+
+
+def run_replicate(model: dict, seed) -> dict:
+    '''
+    Simulate one trajectory of a parsed model, with the generator seeded by seed.
+
+    Returns
+    -------
+    dict
+        time and states (the recorded trajectory), final_time, final_state and iterations.
+
+    '''
+    from gillespie.network import ReactionNetwork
+    network = ReactionNetwork(model['reactants'], model['products'], model['rates'], species=model['species'])
+    options = dict(max_time=model['max_time'],
+                   max_iteration=model['max_iteration'],
+                   stop_condition=model['stop_condition'],
+                   set_fixed_reagents=model['fixed'] or None,
+                   record_every=model['record_every'],
+                   record_times=model['record_times'],
+                   rng=seed)
+    if model['engine'] == 'ssa':
+        from gillespie.gillespie_dynamic import gillespie_dynamic
+        sim = gillespie_dynamic(list(model['initial']), None, {'model': network},
+                                method=model['method'], backend=model['backend'],
+                                sampler=model['sampler'], **options)
+    elif model['engine'] == 'direct':
+        from gillespie.direct import gillespie_direct
+        sim = gillespie_direct(list(model['initial']), None, network, sampler=model['sampler'], **options)
+    else:
+        from gillespie.next_reaction import gillespie_nrm
+        sim = gillespie_nrm(list(model['initial']), None, network, **options)
+    return {'time': np.asarray(sim.timestep_list),
+            'states': np.asarray(sim.molecular_species_history),
+            'final_time': sim.actual_time,
+            'final_state': np.asarray(sim.actual_reagent_quantity),
+            'iterations': sim.actual_iteration}
+
+
+def run_model(model: dict, replicates: int = None, workers: int = None, seed=None) -> dict:
+    '''
+    Simulate the replicates of a parsed model, in a process pool when there are many.
+
+    Replicate i uses the i-th child of SeedSequence(seed), so the results only
+    depend on the seed, whatever the number of workers.
+
+    Parameters
+    ----------
+    model : dict
+        A model returned by load_model or parse_model.
+    replicates : int, optional
+        Number of trajectories. The default is None, the value of the model.
+    workers : int, optional
+        Number of processes. The default is None, the value of the model or os.cpu_count().
+    seed : int, optional
+        The seed. The default is None, the value of the model, or fresh entropy.
+
+    Returns
+    -------
+    dict
+        The arrays written by save_results:
+        species, seed_entropy, final_time (n_replicates,), final_state (n_replicates, n_species)
+        and iterations (n_replicates,). With one replicate, or when every replicate
+        was recorded on the same times, time and states, the latter with shape
+        (n_replicates, n_records, n_species); otherwise time_i and states_i for each replicate i.
+
+    '''
+    replicates = replicates or model['replicates']
+    workers = workers or model['workers'] or os.cpu_count()
+    seed = seed if seed is not None else model['seed']
+    seed_sequence = np.random.SeedSequence(seed)
+    seeds = seed_sequence.spawn(replicates)
+
+    if replicates == 1 or workers == 1:
+        trajectories = [run_replicate(model, child) for child in seeds]
+    else:
+        from concurrent.futures import ProcessPoolExecutor
+        with ProcessPoolExecutor(max_workers=min(workers, replicates)) as executor:
+            trajectories = list(executor.map(run_replicate, repeat(model), seeds,
+                                             chunksize=max(1, replicates // (4 * workers))))
+
+    results = {'species': np.array(model['species']),
+               'seed_entropy': np.array(str(seed_sequence.entropy)),
+               'final_time': np.array([trajectory['final_time'] for trajectory in trajectories], dtype=float),
+               'final_state': np.array([trajectory['final_state'] for trajectory in trajectories]),
+               'iterations': np.array([trajectory['iterations'] for trajectory in trajectories], dtype=np.int64)}
+    first = trajectories[0]['time']
+    if all(np.array_equal(trajectory['time'], first) for trajectory in trajectories):
+        results['time'] = first
+        results['states'] = np.stack([trajectory['states'] for trajectory in trajectories])
+    else:
+        for replicate, trajectory in enumerate(trajectories):
+            results[f'time_{replicate}'] = trajectory['time']
+            results[f'states_{replicate}'] = trajectory['states']
+    return results
+
+
+def save_results(path: str, results: dict, compress: bool = False):
+    '''
+    Write the results of run_model to a .npz file, read back with np.load(path).
+    '''
+    if compress:
+        np.savez_compressed(path, **results)
+    else:
+        np.savez(path, **results)
+
+
+def main(argv=None):
+    '''
+    Entry point of the gillespie-run command.
+    '''
+    parser = argparse.ArgumentParser(prog='gillespie-run',
+                                     description='Simulate a reaction network model file (JSON or TOML) and write the trajectories to a .npz file.')
+    parser.add_argument('model', help='the model file, see gillespie.cli.load_model')
+    parser.add_argument('-o', '--output', help='the .npz output file (default: the model file name with .npz)')
+    parser.add_argument('-n', '--replicates', type=int, help='number of trajectories, overrides the model')
+    parser.add_argument('-j', '--workers', type=int, help='number of processes, overrides the model')
+    parser.add_argument('-s', '--seed', type=int, help='seed, overrides the model')
+    parser.add_argument('--compress', action='store_true', help='write a compressed .npz')
+    parser.add_argument('-v', '--verbose', action='store_true', help='log progress messages')
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO if args.verbose else logging.WARNING,
+                        format='%(asctime)s %(name)s %(levelname)s: %(message)s')
+
+    try:
+        model = load_model(args.model)
+    except (OSError, KeyError, ValueError) as error:
+        parser.error(f'cannot load {args.model}: {error!r}')
+    output = args.output or os.path.splitext(args.model)[0] + '.npz'
+    results = run_model(model, replicates=args.replicates, workers=args.workers, seed=args.seed)
+    save_results(output, results, compress=args.compress)
+    logger.info('%d trajectories written to %s.', len(results['final_time']), output)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Sat Oct 17 14:25:33 2026
+
+@author: lillux
+"""
+import numpy as np
+from gillespie.network import ReactionNetwork
+from gillespie.stochastic_backend import calculate_propensity_subset
+from gillespie.recording import TrajectoryRecorder, recorder_capacity
+from gillespie.rng import BufferedRandom
+from gillespie.sampling import make_sampler
+from typing import List
+
+
+class gillespie_direct():
+
+    def __init__(self,
+                 reagent_quantity: List[int],
+                 state_change_vectors: List[List[int]],
+                 combinatorics,
+                 max_time: float = None,
+                 max_iteration: int = None,
+                 stop_condition: str = 'time',
+                 set_fixed_reagents: List = None,
+                 record_every: int = 1,
+                 record_times: List[float] = None,
+                 rng=None,
+                 sampler: str = 'tree'):
+        '''
+        Direct method simulation class with incremental propensity updates.
+
+        After each event only the propensities of the reactions that depend on
+        the fired one (see ReactionNetwork.dependency_graph) are recomputed,
+        and they are pushed into a sampling structure that keeps the cumulative
+        propensity and selects the next reaction without scanning the whole list.
+
+        Parameters
+        ----------
+        reagent_quantity : List[int]
+            The list of number (int) of molecule for each molecular species involved in the reaction
+        state_change_vectors : List[List[int]]
+            The list of list containing the variation of reagent quantity for each chemical reaction.
+            Can be None when combinatorics is a ReactionNetwork.
+        combinatorics : ReactionNetwork or List[Callable[[List[int]], float]]
+            The ReactionNetwork to simulate.
+            A list of lambda functions is accepted too, but since the species
+            read by a lambda are unknown every propensity is recomputed at each step.
+        max_time : float, optional
+            Maximum simulation time. Required if stop_condition='time'.
+        max_iteration : int, optional
+            Maximum number of iterations. Required if stop_condition='iterations'.
+        stop_condition : str, optional
+            Specify 'time' or 'iterations' as the stopping condition. Default is 'time'.
+        set_fixed_reagents : List, optional
+            List of indices of reagents to keep fixed throughout the simulation.
+        record_every : int, optional
+            Record one iteration every record_every, plus the last one. Default is 1.
+        record_times : List[float], optional
+            Sorted time points where the state is recorded instead,
+            carrying forward the last value before each point.
+        rng : optional
+            Seed, np.random.Generator or rng.BufferedRandom used for every random draw.
+            The default is None, the legacy global generator.
+        sampler : str, optional
+            The reaction selection structure, see sampling.make_sampler:
+            'linear' scans the propensities as calculate_mu does,
+            'tree' uses a sum tree with O(log M) selection,
+            'composition_rejection' groups the reactions by magnitude for
+            O(1) expected selection on very large networks.
+            The default is 'tree'.
+
+        Returns
+        -------
+        None.
+
+        '''
+        if state_change_vectors is None and isinstance(combinatorics, ReactionNetwork):
+            state_change_vectors = combinatorics.state_change_vectors
+        self.initial_reagent_quantity = list(reagent_quantity)
+        self.state_change_vector = np.asarray(state_change_vectors, dtype=np.int64)
+        self.reactions_combinatorics = combinatorics
+        self.set_fixed_reagents = set_fixed_reagents
+        self.stop_condition = stop_condition
+        self.max_time = max_time
+        self.max_iteration = max_iteration
+        self.actual_time = 0
+        self.actual_iteration = 0
+        self.rng = rng if isinstance(rng, BufferedRandom) else BufferedRandom(rng)
+        capacity = recorder_capacity(max_iteration, record_every)
+        recorder = TrajectoryRecorder(reagent_quantity, self.actual_time, every=record_every,
+                                      time_grid=record_times, capacity=capacity)
+
+        # Validate stop_condition and required parameters
+        if self.stop_condition == 'time':
+            if self.max_time is None:
+                raise ValueError("max_time must be specified when stop_condition is 'time'")
+        elif self.stop_condition == 'iterations':
+            if self.max_iteration is None:
+                raise ValueError("max_iteration must be specified when stop_condition is 'iterations'")
+        else:
+            raise ValueError("Invalid stop_condition. Choose 'time' or 'iterations'.")
+
+        n_reactions = len(self.state_change_vector)
+        if isinstance(combinatorics, ReactionNetwork):
+            self.dependency_graph = combinatorics.dependency_graph(fixed_species=set_fixed_reagents)
+        else:
+            everyone = np.arange(n_reactions)
+            self.dependency_graph = [everyone] * n_reactions
+        state_change = self.state_change_vector.copy()
+        if set_fixed_reagents:
+            state_change[:, set_fixed_reagents] = 0
+
+        state = np.asarray(reagent_quantity, dtype=np.int64)
+        self.sampler = make_sampler(sampler, calculate_propensity_subset(state, combinatorics, np.arange(n_reactions)),
+                                    rng=self.rng)
+
+        if self.stop_condition == 'time':
+            loop_condition = lambda: self.actual_time < self.max_time
+        elif self.stop_condition == 'iterations':
+            loop_condition = lambda: self.actual_iteration < self.max_iteration
+
+        while loop_condition():
+            cumulative_propensity = self.sampler.total
+            # check if there are reaction that can happen
+            if cumulative_propensity <= 0:
+                break
+            # calculate next timestep
+            self.actual_time += self.rng.exponential() / cumulative_propensity
+            # calculate next reaction
+            mu = self.sampler.sample()
+            state += state_change[mu]
+            recorder.record(self.actual_time, state)
+
+            # update only the reactions that depend on mu
+            dependents = self.dependency_graph[mu]
+            new_propensity = calculate_propensity_subset(state, combinatorics, dependents)
+            for alpha, a_new in zip(dependents.tolist(), new_propensity.tolist()):
+                self.sampler.update(alpha, a_new)
+
+            self.actual_iteration += 1
+
+        self.actual_reagent_quantity = state.tolist()
+        recorder.finalize(self.max_time if self.stop_condition == 'time' else self.actual_time)
+        self.timestep_list = recorder.times
+        self.molecular_species_history = recorder.states
+        return
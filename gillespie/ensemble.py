@@ -0,0 +1,267 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Sat Oct 17 10:12:41 2026
+
+@author: lillux
+"""
+import numpy as np
+from gillespie.stochastic_backend import calculate_propensity_array
+from gillespie.network import ReactionNetwork
+from gillespie.rng import make_rng
+from gillespie.events import EventSet
+from typing import List
+from collections.abc import Callable
+
+
+def _select_reactions(propensity_array: np.ndarray, threshold: np.ndarray) -> np.ndarray:
+    '''
+    Return, for each row, the first reaction whose cumulative propensity exceeds threshold.
+
+    When rounding leaves every cumulative sum of a row at or below its threshold,
+    the last reaction with a positive propensity is chosen, as in sampling.LinearSampler.
+    '''
+    cumulative = np.cumsum(propensity_array, axis=1)
+    mu = (cumulative > threshold[:, None]).argmax(axis=1)
+    missed = cumulative[np.arange(len(mu)), mu] <= threshold
+    if missed.any():
+        positive = propensity_array[missed] > 0
+        mu[missed] = positive.shape[1] - 1 - positive[:, ::-1].argmax(axis=1)
+    return mu
+
+
+class gillespie_ensemble():
+
+    def __init__(self,
+                 reagent_quantity: List[int],
+                 state_change_vectors: List[List[int]],
+                 combinatorics: List[Callable[[List[int]], float]],
+                 n_replicates: int = 1000,
+                 max_time: float = None,
+                 max_iteration: int = None,
+                 stop_condition: str = 'time',
+                 set_fixed_reagents: List = None,
+                 time_points: List[float] = None,
+                 rng=None,
+                 events=None):
+        '''
+        Run many independent replicates of the gillespie SSA in lockstep.
+
+        All the live replicates are advanced together at each step:
+        the propensities are evaluated on the whole (n_replicates x n_species)
+        state array, the timesteps are drawn in one batch of exponentials and
+        the next reaction of each replicate is selected with a vectorized
+        search on the cumulative propensities.
+        A replicate stops when it reaches its stop condition or when
+        no reaction can happen anymore, while the others keep going.
+
+        Parameters
+        ----------
+        reagent_quantity : List[int]
+            The list of number (int) of molecule for each molecular species involved in the reaction.
+            Every replicate starts from this state.
+        state_change_vectors : List[List[int]]
+            The list of list containing the variation of reagent quantity for each chemical reaction.
+            Can be None when combinatorics is a ReactionNetwork.
+        combinatorics : List[Callable[[List[int]], float]] or ReactionNetwork
+            The list of lambda function, each of which describe the combinatorics for the reagent of a reaction.
+            The functions are called with one array for each species, so
+            they must broadcast over NumPy arrays.
+            A ReactionNetwork is evaluated with its compiled mass-action rules.
+        n_replicates : int, optional
+            Number of independent replicates to simulate. The default is 1000.
+        max_time : float, optional
+            Maximum simulation time. Required if stop_condition='time'.
+        max_iteration : int, optional
+            Maximum number of iterations of each replicate. Required if stop_condition='iterations'.
+        stop_condition : str, optional
+            Specify 'time' or 'iterations' as the stopping condition. Default is 'time'.
+        set_fixed_reagents : List, optional
+            List of indices of reagents to keep fixed throughout the simulation.
+        time_points : List[float], optional
+            Sorted time points where the state of each replicate is sampled,
+            carrying forward the last value before each point.
+            Points after the end of a replicate hold its final state.
+            If None, only the final states are kept.
+        rng : optional
+            Seed or np.random.Generator used for every random draw.
+            The default is None, the legacy global generator.
+        events : list or events.EventSet, optional
+            Threshold, LinearCombination and ZeroPropensity events, checked on
+            all the replicates at once. The first passage of each event in each
+            replicate is stored in first_passage_time, shape (n_replicates, n_events),
+            NaN when it did not happen, and first_passage_state,
+            shape (n_replicates, n_events, n_species). A stop event ends its replicate.
+            The default is None.
+
+        Returns
+        -------
+        None.
+
+        '''
+        if state_change_vectors is None and isinstance(combinatorics, ReactionNetwork):
+            state_change_vectors = combinatorics.state_change_vectors
+        self.initial_reagent_quantity = np.asarray(reagent_quantity, dtype=np.int64)
+        self.state_change_vector = np.asarray(state_change_vectors, dtype=np.int64)
+        self.reactions_combinatorics = combinatorics
+        self.n_replicates = n_replicates
+        self.rng = make_rng(rng)
+        self.set_fixed_reagents = set_fixed_reagents
+        self.stop_condition = stop_condition
+        self.max_time = max_time
+        self.max_iteration = max_iteration
+
+        # Validate stop_condition and required parameters
+        if self.stop_condition == 'time':
+            if self.max_time is None:
+                raise ValueError("max_time must be specified when stop_condition is 'time'")
+        elif self.stop_condition == 'iterations':
+            if self.max_iteration is None:
+                raise ValueError("max_iteration must be specified when stop_condition is 'iterations'")
+        else:
+            raise ValueError("Invalid stop_condition. Choose 'time' or 'iterations'.")
+
+        # per-replicate state, time and iteration counter
+        self.actual_reagent_quantity = np.tile(self.initial_reagent_quantity, (n_replicates, 1))
+        self.actual_time = np.zeros(n_replicates)
+        self.actual_iteration = np.zeros(n_replicates, dtype=np.int64)
+        # per-replicate termination masks
+        self.running = np.ones(n_replicates, dtype=bool)
+        self.exhausted = np.zeros(n_replicates, dtype=bool)
+
+        if events is not None and not isinstance(events, EventSet):
+            events = EventSet(events)
+        self.events = events
+        if events is not None:
+            n_species = len(self.initial_reagent_quantity)
+            linear_index, linear_matrix, linear_value, linear_sign = events.linear_arrays(n_species)
+            stop_event = np.array(events.stop, dtype=bool)
+            zero_events = events.zero_events()
+            self.first_passage_time = np.full((n_replicates, len(events.events)), np.nan)
+            self.first_passage_state = np.zeros((n_replicates, len(events.events), n_species), dtype=np.int64)
+            self.stopped_by_event = np.zeros(n_replicates, dtype=bool)
+            everyone = np.arange(n_replicates)
+            self._check_linear_events(everyone, self.actual_reagent_quantity, self.actual_time,
+                                      linear_index, linear_matrix, linear_value, linear_sign, stop_event)
+
+        if time_points is not None:
+            self.time_points = np.asarray(time_points, dtype=float)
+            self.sampled_history = np.empty((len(self.time_points), n_replicates, len(self.initial_reagent_quantity)),
+                                            dtype=np.int64)
+            # number of time points already filled for each replicate
+            sample_cursor = np.zeros(n_replicates, dtype=np.int64)
+        else:
+            self.time_points = None
+            self.sampled_history = None
+
+        while self.running.any():
+            live = np.flatnonzero(self.running)
+            state = self.actual_reagent_quantity[live]
+
+            # calculate propensity function for each reaction of each replicate
+            propensity_array = calculate_propensity_array(state, self.reactions_combinatorics)
+            cumulative_propensity = propensity_array.sum(axis=1)
+
+            if events is not None and zero_events:
+                stopped = np.zeros(len(live), dtype=bool)
+                for index, reactions in zero_events:
+                    total = cumulative_propensity if reactions is None else propensity_array[:, reactions].sum(axis=1)
+                    hit = (total <= 0) & np.isnan(self.first_passage_time[live, index])
+                    self.first_passage_time[live[hit], index] = self.actual_time[live[hit]]
+                    self.first_passage_state[live[hit], index] = state[hit]
+                    if stop_event[index]:
+                        stopped |= hit
+                if stopped.any():
+                    self.stopped_by_event[live[stopped]] = True
+                    self.running[live[stopped]] = False
+                    keep = ~stopped
+                    live = live[keep]
+                    state = state[keep]
+                    propensity_array = propensity_array[keep]
+                    cumulative_propensity = cumulative_propensity[keep]
+                    if len(live) == 0:
+                        break
+
+            # stop the replicates where no reaction can happen
+            dead = cumulative_propensity <= 0
+            if dead.any():
+                self.exhausted[live[dead]] = True
+                self.running[live[dead]] = False
+                keep = ~dead
+                live = live[keep]
+                state = state[keep]
+                propensity_array = propensity_array[keep]
+                cumulative_propensity = cumulative_propensity[keep]
+                if len(live) == 0:
+                    break
+
+            # calculate next timestep of every live replicate
+            tau = self.rng.standard_exponential(len(live)) / cumulative_propensity
+            old_time = self.actual_time[live]
+            new_time = old_time + tau
+
+            if self.sampled_history is not None:
+                # the time points crossed by this step hold the state before the reaction
+                sample_end = np.searchsorted(self.time_points, new_time, side='left')
+                self._fill_samples(live, state, sample_cursor[live], sample_end)
+                sample_cursor[live] = np.maximum(sample_cursor[live], sample_end)
+
+            # calculate next reaction of every live replicate
+            threshold = self.rng.random(len(live)) * cumulative_propensity
+            mu = _select_reactions(propensity_array, threshold)
+            state = state + self.state_change_vector[mu]
+
+            # check if some reagents have to be fixed
+            if self.set_fixed_reagents:
+                state[:, self.set_fixed_reagents] = self.initial_reagent_quantity[self.set_fixed_reagents]
+
+            self.actual_reagent_quantity[live] = state
+            self.actual_time[live] = new_time
+            self.actual_iteration[live] += 1
+
+            if events is not None and len(linear_index):
+                self._check_linear_events(live, state, new_time,
+                                          linear_index, linear_matrix, linear_value, linear_sign, stop_event)
+
+            # stop the replicates that reached their stop condition
+            if self.stop_condition == 'time':
+                self.running[live[new_time >= self.max_time]] = False
+            else:
+                self.running[live[self.actual_iteration[live] >= self.max_iteration]] = False
+
+        if self.sampled_history is not None:
+            # carry the final state forward over the remaining time points
+            everyone = np.arange(n_replicates)
+            self._fill_samples(everyone, self.actual_reagent_quantity, sample_cursor,
+                               np.full(n_replicates, len(self.time_points)))
+        return
+
+    def _check_linear_events(self, replicates, state, time, indices, matrix, values, signs, stop_event):
+        '''
+        Record the species events that happen in the given replicates, and stop them on stop events.
+        '''
+        if len(indices) == 0:
+            return
+        crossed = signs * (state @ matrix.T - values) >= 0
+        crossed &= np.isnan(self.first_passage_time[replicates[:, None], indices])
+        rows, columns = np.nonzero(crossed)
+        if len(rows) == 0:
+            return
+        self.first_passage_time[replicates[rows], indices[columns]] = time[rows]
+        self.first_passage_state[replicates[rows], indices[columns]] = state[rows]
+        stopped = np.unique(rows[stop_event[indices[columns]]])
+        self.stopped_by_event[replicates[stopped]] = True
+        self.running[replicates[stopped]] = False
+
+    def _fill_samples(self, replicates, state, start, end):
+        '''
+        Write state[i] in the time points start[i]:end[i] of replicates[i].
+        '''
+        counts = np.maximum(end - start, 0)
+        total = counts.sum()
+        if total == 0:
+            return
+        row = np.repeat(np.arange(len(replicates)), counts)
+        # position of each filled point inside its own range
+        offset = np.arange(total) - np.repeat(np.cumsum(counts) - counts, counts)
+        self.sampled_history[start[row] + offset, replicates[row]] = state[row]
@@ -0,0 +1,227 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 09:14:52 2026
+
+@author: lillux
+"""
+import numpy as np
+from typing import Dict, List, Union
+
+
+class LinearCombination:
+
+    def __init__(self,
+                 coefficients: Union[Dict[int, float], List[float]],
+                 value: float,
+                 direction: str = 'up',
+                 stop: bool = False,
+                 name: str = None):
+        '''
+        Event triggered when a linear combination of species crosses a value.
+
+        Parameters
+        ----------
+        coefficients : Dict[int, float] or List[float]
+            The coefficient of each species, as {species index: coefficient},
+            or as a list with one coefficient for each species.
+        value : float
+            The threshold.
+        direction : str, optional
+            'up' triggers when sum(coefficient * quantity) >= value,
+            'down' when it is <= value. The default is 'up'.
+        stop : bool, optional
+            Stop the simulation (or the replicate) when the event happens. The default is False.
+        name : str, optional
+            Name of the event in the results. The default is None, an automatic name.
+
+        Returns
+        -------
+        None.
+
+        '''
+        if not isinstance(coefficients, dict):
+            coefficients = {species: coefficient for species, coefficient in enumerate(coefficients) if coefficient != 0}
+        if direction not in ('up', 'down'):
+            raise ValueError("Invalid direction. Choose 'up' or 'down'.")
+        self.coefficients = {int(species): float(coefficient) for species, coefficient in coefficients.items()}
+        self.value = value
+        self.direction = direction
+        self.stop = stop
+        self.name = name
+
+
+class Threshold(LinearCombination):
+
+    def __init__(self, species: int, value: float, direction: str = 'up', stop: bool = False, name: str = None):
+        '''
+        Event triggered when the quantity of species reaches value, from below
+        (direction='up') or from above (direction='down').
+        See LinearCombination for the parameters.
+        '''
+        super().__init__({species: 1.0}, value, direction=direction, stop=stop, name=name)
+
+
+class ZeroPropensity:
+
+    def __init__(self, reactions: List[int] = None, stop: bool = True, name: str = None):
+        '''
+        Event triggered when the propensity of the given reactions is zero.
+
+        Parameters
+        ----------
+        reactions : List[int], optional
+            The reactions whose propensities must all be zero. The default is None, all of them.
+        stop : bool, optional
+            Stop the simulation (or the replicate) when the event happens. The default is True.
+        name : str, optional
+            Name of the event in the results. The default is None, an automatic name.
+
+        Returns
+        -------
+        None.
+
+        '''
+        self.reactions = None if reactions is None else [int(reaction) for reaction in reactions]
+        self.stop = stop
+        self.name = name
+
+
+class EventSet:
+
+    def __init__(self, events: list):
+        '''
+        Compiled set of events, with the first passage time and state of each.
+
+        Each event happens at most once: its first passage is recorded and it
+        is no longer evaluated. The species events are only evaluated when
+        one of their species changes, using the lists built by affected_by.
+
+        Parameters
+        ----------
+        events : list
+            LinearCombination, Threshold and ZeroPropensity events.
+
+        Returns
+        -------
+        None.
+
+        '''
+        self.events = list(events)
+        self.names = [event.name if event.name is not None else f'{type(event).__name__}_{index}'
+                      for index, event in enumerate(self.events)]
+        if len(set(self.names)) != len(self.names):
+            raise ValueError("event names must be unique")
+        self.stop = [event.stop for event in self.events]
+        # species events as (event index, species, coefficients, value, sign)
+        self._linear = []
+        self._zero = []
+        for index, event in enumerate(self.events):
+            if isinstance(event, LinearCombination):
+                sign = 1.0 if event.direction == 'up' else -1.0
+                self._linear.append((index, list(event.coefficients), list(event.coefficients.values()), event.value, sign))
+            elif isinstance(event, ZeroPropensity):
+                self._zero.append((index, event.reactions))
+            else:
+                raise TypeError(f"Unknown event type {type(event).__name__}")
+        self._all_linear = list(range(len(self._linear)))
+        self.reset()
+
+    def reset(self):
+        '''
+        Forget the recorded passages, to reuse the set in another simulation.
+        '''
+        self.fired = [False] * len(self.events)
+        self.first_passage_time = [None] * len(self.events)
+        self.first_passage_state = [None] * len(self.events)
+        self.stopped = False
+
+    @property
+    def first_passage(self) -> dict:
+        '''
+        The events that happened, as {name: {'time': time, 'state': state}}.
+        '''
+        return {self.names[index]: {'time': self.first_passage_time[index], 'state': self.first_passage_state[index]}
+                for index in range(len(self.events)) if self.fired[index]}
+
+    def affected_by(self, state_change_vectors) -> List[List[int]]:
+        '''
+        For each reaction, the species events that depend on a species it changes.
+        '''
+        affected = []
+        for change in state_change_vectors:
+            changed = {species for species, delta in enumerate(change) if delta != 0}
+            affected.append([position for position, (_, species, _, _, _) in enumerate(self._linear)
+                             if changed.intersection(species)])
+        return affected
+
+    def start(self, time: float, reagent_quantity) -> bool:
+        '''
+        Evaluate all the species events on the initial state. Returns True if the simulation has to stop.
+        '''
+        self.reset()
+        return self.check(time, reagent_quantity)
+
+    def check(self, time: float, reagent_quantity, affected: List[int] = None) -> bool:
+        '''
+        Evaluate the species events, only the affected ones if given (see affected_by).
+
+        Returns True if a stop event happened.
+        '''
+        fired = self.fired
+        for position in (self._all_linear if affected is None else affected):
+            index, species, coefficients, value, sign = self._linear[position]
+            if fired[index]:
+                continue
+            combination = 0.0
+            for j, coefficient in zip(species, coefficients):
+                combination += coefficient * reagent_quantity[j]
+            if sign * (combination - value) >= 0:
+                self._record(index, time, reagent_quantity)
+        return self.stopped
+
+    def check_propensity(self, time: float, reagent_quantity, propensity_list, cumulative_propensity: float) -> bool:
+        '''
+        Evaluate the zero propensity events. Returns True if a stop event happened.
+        '''
+        for index, reactions in self._zero:
+            if self.fired[index]:
+                continue
+            if reactions is None:
+                zero = cumulative_propensity <= 0
+            else:
+                zero = all(propensity_list[reaction] <= 0 for reaction in reactions)
+            if zero:
+                self._record(index, time, reagent_quantity)
+        return self.stopped
+
+    def _record(self, index: int, time: float, reagent_quantity):
+        self.fired[index] = True
+        self.first_passage_time[index] = time
+        self.first_passage_state[index] = list(reagent_quantity)
+        if self.stop[index]:
+            self.stopped = True
+
+    def linear_arrays(self, n_species: int):
+        '''
+        Return the species events as arrays, for the vectorized check of many replicates.
+
+        Returns
+        -------
+        tuple
+            The event indices, the coefficient matrix (n_linear, n_species),
+            the values and the signs.
+        '''
+        indices = np.array([index for index, *_ in self._linear], dtype=np.int64)
+        matrix = np.zeros((len(self._linear), n_species))
+        for row, (_, species, coefficients, _, _) in enumerate(self._linear):
+            matrix[row, species] = coefficients
+        values = np.array([value for *_, value, _ in self._linear], dtype=float)
+        signs = np.array([sign for *_, sign in self._linear], dtype=float)
+        return indices, matrix, values, signs
+
+    def zero_events(self) -> list:
+        '''
+        Return the zero propensity events as (event index, reactions or None).
+        '''
+        return list(self._zero)
@@ -7,9 +7,10 @@ Created on Wed Oct 30 15:40:13 2024
 """
 
 import numpy as np
-from joblib import Parallel, delayed
+from joblib import Parallel, delayed, effective_n_jobs
+from gillespie.rng import make_rng
 
-def update_gen(wt: int, sv: int, r: float, s: float, u: float) -> tuple[int, int]:
+def update_gen(wt: int, sv: int, r: float, s: float, u: float, rng=None) -> tuple[int, int]:
     '''
     Perform one step of the evolutionary simulation.
 
@@ -25,6 +26,9 @@ def update_gen(wt: int, sv: int, r: float, s: float, u: float) -> tuple[int, int
         The impact of the mutation, that improve the fitness. Must be s > r
     u : float
         Probability tha a mutation appear in the next generation.
+    rng : np.random.Generator, optional
+        The generator used for the Poisson and binomial draws.
+        If None, the legacy global generator is used.
 
     Returns
     -------
@@ -32,6 +36,8 @@ def update_gen(wt: int, sv: int, r: float, s: float, u: float) -> tuple[int, int
         Return the updated values respectively for the WT and the SV populations.
 
     '''
+    if rng is None:
+        rng = np.random
     # Update fitness values
     fit_wt = 1 - r
     fit_sv = fit_wt * (1 + s)
@@ -42,34 +48,127 @@ def update_gen(wt: int, sv: int, r: float, s: float, u: float) -> tuple[int, int
     else:
         # Total mean for Poisson distribution
         sv_mean = sv * fit_sv
-        sv_new = np.random.poisson(lam=sv_mean)
+        sv_new = rng.poisson(lam=sv_mean)
 
     # Calculate new Wild Type population
     if wt == 0:
         wt_new = 0
     else:
         wt_mean = wt * fit_wt
-        wt_new = np.random.poisson(lam=wt_mean)
+        wt_new = rng.poisson(lam=wt_mean)
 
         if wt_new > 0:
             # Mutations in Wild Type population
-            mut_new = np.random.binomial(n=wt_new, p=u)
+            mut_new = rng.binomial(n=wt_new, p=u)
             wt_new -= mut_new
             sv_new += mut_new
 
     return wt_new, sv_new
-    
+
+
+def update_gen_array(wt: np.ndarray, sv: np.ndarray, r: float, s: float, u: float, rng=None) -> tuple[np.ndarray, np.ndarray]:
+    '''
+    Perform one step of the evolutionary simulation for many populations at once.
+
+    Same model as update_gen, with array valued Poisson and binomial draws.
+    Empty populations need no special case, since Poisson(0) and Binomial(0, u) are 0.
+
+    Parameters
+    ----------
+    wt : np.ndarray
+        The number of Wild Type individuals of each population.
+    sv : np.ndarray
+        The number of standing variation individuals (mutants) of each population.
+    r : float
+        The impact of an environmental stressor that reduce the fitness. Must be 0 < r < 1.
+    s : float
+        The impact of the mutation, that improve the fitness. Must be s > r
+    u : float
+        Probability tha a mutation appear in the next generation.
+    rng : np.random.Generator, optional
+        The generator used for the Poisson and binomial draws.
+        If None, the legacy global generator is used.
+
+    Returns
+    -------
+    tuple[np.ndarray, np.ndarray]
+        Return the updated values respectively for the WT and the SV populations.
+
+    '''
+    if rng is None:
+        rng = np.random
+    fit_wt = 1 - r
+    fit_sv = fit_wt * (1 + s)
+
+    sv_new = rng.poisson(lam=sv * fit_sv)
+    wt_new = rng.poisson(lam=wt * fit_wt)
+    # Mutations in Wild Type population
+    mut_new = rng.binomial(n=wt_new, p=u)
+    return wt_new - mut_new, sv_new + mut_new
+
+
+def _evolve_shard(n: int, params: dict, seed, keep_history: bool = False) -> dict:
+    '''
+    Evolve n populations with the EvoSim model, advancing all of them at each generation.
+
+    Only the populations without an outcome are drawn, so the cost of a
+    generation shrinks as the populations go extinct or are rescued.
+    '''
+    rng = make_rng(seed)
+    max_gen = params['max_gen']
+    wt_start, sv_start = params['wt'], params['sv']
+    wt = np.full(n, wt_start, dtype=np.int64)
+    sv = np.full(n, sv_start, dtype=np.int64)
+    saved = np.zeros(n, dtype=bool)
+    extinct = np.zeros(n, dtype=bool)
+    # populations without an outcome run for all the generations
+    generations = np.full(n, max_gen, dtype=np.int64)
+    if keep_history:
+        wt_history = np.zeros((n, max_gen), dtype=np.int64)
+        sv_history = np.zeros((n, max_gen), dtype=np.int64)
+        wt_history[:, 0] = wt_start
+        sv_history[:, 0] = sv_start
+
+    live = np.arange(n)
+    for gen in range(1, max_gen):
+        if len(live) == 0:
+            break
+        wt_live, sv_live = update_gen_array(wt[live], sv[live], params['r'], params['s'], params['u'], rng=rng)
+        wt[live] = wt_live
+        sv[live] = sv_live
+        if keep_history:
+            wt_history[live, gen] = wt_live
+            sv_history[live, gen] = sv_live
+
+        # same checks, in the same order, as EvoSim
+        now_extinct = (wt_live + sv_live) == 0
+        now_saved = ~now_extinct & (sv_live > wt_start)
+        done = now_extinct | now_saved
+        if done.any():
+            extinct[live[now_extinct]] = True
+            saved[live[now_saved]] = True
+            generations[live[done]] = gen + 1
+            live = live[~done]
+
+    results = {'saved': saved, 'extinct': extinct, 'generations': generations, 'wt': wt, 'sv': sv}
+    if keep_history:
+        results['wt_history'] = wt_history
+        results['sv_history'] = sv_history
+    return results
+
 
 class EvoSim:
     
 
-    def __init__(self, wt: int, sv: int, r: float, s: float, u: float, max_gen: int):
+    def __init__(self, wt: int, sv: int, r: float, s: float, u: float, max_gen: int, rng=None):
         self.wt_start = wt
         self.sv_start = sv
         self.r = r
         self.s = s
         self.u = u
         self.max_gen = max_gen
+        # seed or generator, see rng.make_rng
+        self.rng = make_rng(rng)
 
         # instantiate array to hold generations data
         self.tot_array = np.zeros(max_gen, dtype=int)
@@ -88,7 +187,7 @@ class EvoSim:
         # run population evolution
         for gen in range(1, self.max_gen):
 
-            self.wt, self.sv = update_gen(self.wt, self.sv, self.r, self.s, self.u)
+            self.wt, self.sv = update_gen(self.wt, self.sv, self.r, self.s, self.u, rng=self.rng)
             tot = self.wt + self.sv
             self.tot_array[gen] = tot
             self.wt_array[gen] = self.wt
@@ -109,37 +208,238 @@ class EvoSim:
         return
     
     
-class MultiSim:
+def _evolve_epoch(params: dict, rng, history=None) -> tuple:
+    '''
+    Evolve one epoch like EvoSim, with the same draws, without keeping its generations.
 
-    def __init__(self, epochs:int, params:dict[str:float], ncore=-1, replicable=False):
+    With history, an array of shape (2, max_gen), the wt and sv counts of
+    each generation are written into it.
+    Returns saved, extinct, generations and the final wt and sv.
+    '''
+    rng = make_rng(rng)
+    wt_start = params['wt']
+    wt, sv = wt_start, params['sv']
+    if history is not None:
+        history[:, 0] = wt, sv
+    saved = extinct = False
+    gen = 0
+    for gen in range(1, params['max_gen']):
+        wt, sv = update_gen(wt, sv, params['r'], params['s'], params['u'], rng=rng)
+        if history is not None:
+            history[:, gen] = wt, sv
+        if wt + sv == 0:
+            extinct = True
+            break
+        if sv > wt_start:
+            saved = True
+            break
+    return saved, extinct, gen + 1, wt, sv
 
-        # Prepare the list of arguments
-        self.epochs = epochs
-        self.params = params
-        simulation_args = [(epoch, self.params, replicable) for epoch in range(self.epochs)]
 
-        
-        def run_simulation(epoch, params, replicable=False):
-            
-            if replicable:
-                np.random.seed(epoch)  # Optional: Set seed for reproducibility
-            
+def _run_epochs(epochs: list, params: dict, epoch_seeds: list, summary_only: bool = False, history_path: str = None):
+    '''
+    Run a chunk of EvoSim epochs in a worker.
+
+    Returns the EvoSim objects, or only the summary arrays when summary_only,
+    in which case no EvoSim (and no per generation array) is built.
+    With history_path, the trajectories are written into the memory mapped
+    history array instead of being sent back to the parent.
+    '''
+    history = np.load(history_path, mmap_mode='r+') if history_path is not None else None
+    if summary_only:
+        outcomes = [_evolve_epoch(params, epoch_seed, history[epoch] if history is not None else None)
+                    for epoch, epoch_seed in zip(epochs, epoch_seeds)]
+        evos = None
+    else:
+        evos = []
+        for epoch, epoch_seed in zip(epochs, epoch_seeds):
             evo = EvoSim(
                 wt=params['wt'],
                 sv=params['sv'],
                 r=params['r'],
                 s=params['s'],
                 u=params['u'],
-                max_gen=params['max_gen']
+                max_gen=params['max_gen'],
+                rng=epoch_seed
             )
-            return (epoch, evo)
+            if history is not None:
+                history[epoch, 0, :evo.generations] = evo.wt_array
+                history[epoch, 1, :evo.generations] = evo.sv_array
+            evos.append(evo)
+        outcomes = [(evo.saved, evo.exinct, evo.generations, evo.wt, evo.sv) for evo in evos]
+    if history is not None:
+        history.flush()
+        del history
+
+    saved, extinct, generations, wt, sv = zip(*outcomes) if outcomes else ([],) * 5
+    summary = (np.array(saved, dtype=bool),
+               np.array(extinct, dtype=bool),
+               np.array(generations, dtype=np.int64),
+               np.array(wt, dtype=np.int64),
+               np.array(sv, dtype=np.int64))
+    return epochs, summary, evos
+
+
+class MultiSim:
+
+    def __init__(self, epochs:int, params:dict[str:float], ncore=-1, replicable=False, seed=None,
+                 chunk_size: int = None, summary_only: bool = False, history_path: str = None):
+        '''
+        Run many EvoSim epochs in parallel with joblib.
+
+        Parameters
+        ----------
+        epochs : int
+            Number of independent simulations.
+        params : dict[str:float]
+            The EvoSim parameters: wt, sv, r, s, u, max_gen.
+        ncore : int, optional
+            Number of joblib workers. The default is -1, all the cores.
+        replicable : bool, optional
+            Use the seed 0 when seed is None. This replaced np.random.seed(epoch)
+            in each epoch, so the results differ from the older versions. The default is False.
+        seed : optional
+            Seed of the simulations, one stream per epoch is spawned from it. The default is None.
+        chunk_size : int, optional
+            Number of epochs run by each joblib task. The default is None,
+            about four tasks per worker.
+        summary_only : bool, optional
+            Only compute and send back the summary arrays: the epochs are run
+            without EvoSim objects nor per generation arrays (except in
+            history_path). results and rescued are then None. The default is False.
+        history_path : str, optional
+            Path of a .npy file where the workers write the trajectories,
+            as an array of shape (epochs, 2, max_gen) holding wt and sv.
+            It is opened memory mapped as self.history. The default is None.
+
+        Returns
+        -------
+        None.
+
+        Attributes
+        ----------
+        saved, extinct, generations, wt, sv : np.ndarray
+            Outcome, number of generations and final counts of each epoch.
+
+        '''
+        # Prepare the list of arguments
+        self.epochs = epochs
+        self.params = params
+        # one independent stream for each epoch, spawned from the seed, so the
+        # results do not depend on the number of workers
+        if seed is None and replicable:
+            seed = 0
+        self.seed = seed
+        if seed is not None:
+            epoch_seeds = np.random.SeedSequence(seed).spawn(self.epochs)
+        else:
+            epoch_seeds = [None] * self.epochs
+        if chunk_size is None:
+            chunk_size = max(1, -(-self.epochs // (4 * effective_n_jobs(ncore))))
+        self.chunk_size = chunk_size
+        chunks = [list(range(start, min(start + chunk_size, self.epochs))) for start in range(0, self.epochs, chunk_size)]
+
+        # preallocate the trajectories, filled in place by the workers
+        if history_path is not None:
+            np.lib.format.open_memmap(history_path, mode='w+', dtype=np.int64,
+                                      shape=(self.epochs, 2, params['max_gen']))
 
-                # Run simulations
-        self.results = Parallel(n_jobs=ncore)(
-            delayed(run_simulation)(epoch, params, replicable) for epoch, params, replicable in simulation_args
+        # Run simulations
+        chunk_results = Parallel(n_jobs=ncore)(
+            delayed(_run_epochs)(chunk, params, [epoch_seeds[epoch] for epoch in chunk], summary_only, history_path)
+            for chunk in chunks
         )
 
-        # self.rescued = sum([i[1].saved for i in self.results])
-        self.rescued = {i[0]:i[1] for i in self.results if i[1].saved}
-        self.rescued_n = len(self.rescued)
-        return
\ No newline at end of file
+        self.saved, self.extinct, self.generations, self.wt, self.sv = (
+            np.concatenate([summary[field] for _, summary, _ in chunk_results]) if chunk_results else np.array([])
+            for field in range(5)
+        )
+        self.history = np.load(history_path, mmap_mode='r') if history_path is not None else None
+
+        if summary_only:
+            self.results = None
+            self.rescued = None
+        else:
+            self.results = [(epoch, evo) for chunk, _, evos in chunk_results for epoch, evo in zip(chunk, evos)]
+            # self.rescued = sum([i[1].saved for i in self.results])
+            self.rescued = {i[0]:i[1] for i in self.results if i[1].saved}
+        self.rescued_n = int(self.saved.sum())
+        return
+
+
+class VectorSim:
+
+    def __init__(self,
+                 epochs: int,
+                 params: dict[str:float],
+                 seed=None,
+                 keep_history: bool = False,
+                 ncore: int = 1,
+                 shard_size: int = 1_000_000):
+        '''
+        Run many epochs of the EvoSim model as arrays.
+
+        Instead of one EvoSim object per epoch, the wt and sv counts of all the
+        epochs are advanced together, one generation at a time, with array valued
+        Poisson and binomial draws. Epochs leave the computation as soon as they
+        go extinct or are rescued. Only summary arrays are returned, plus the
+        full histories on request.
+
+        Parameters
+        ----------
+        epochs : int
+            Number of independent simulations.
+        params : dict[str:float]
+            The EvoSim parameters: wt, sv, r, s, u, max_gen.
+        seed : optional
+            Seed of the simulations. Each shard gets its own stream from
+            SeedSequence(seed).spawn, so the results do not depend on ncore.
+            The default is None, a seed drawn from the legacy global generator.
+        keep_history : bool, optional
+            Store the wt and sv count of every epoch at every generation. The default is False.
+        ncore : int, optional
+            Number of joblib workers used when there is more than one shard. The default is 1.
+        shard_size : int, optional
+            Maximum number of epochs evolved together. The default is 1_000_000.
+
+        Returns
+        -------
+        None.
+
+        Attributes
+        ----------
+        saved, extinct : np.ndarray of bool
+            The outcome of each epoch.
+        generations : np.ndarray of int
+            Number of generations of each epoch, like EvoSim.generations.
+        wt, sv : np.ndarray of int
+            Final counts of each epoch.
+        wt_history, sv_history : np.ndarray of int, shape (epochs, max_gen)
+            Only with keep_history. The columns after generations[i] are 0.
+
+        '''
+        self.epochs = epochs
+        self.params = params
+        if seed is None:
+            seed = np.random.randint(2**31)
+        self.seed = seed
+        self.keep_history = keep_history
+
+        sizes = [min(shard_size, epochs - start) for start in range(0, epochs, shard_size)]
+        shard_seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+        if len(sizes) > 1 and ncore != 1:
+            shards = Parallel(n_jobs=ncore)(
+                delayed(_evolve_shard)(size, params, shard_seed, keep_history) for size, shard_seed in zip(sizes, shard_seeds)
+            )
+        else:
+            shards = [_evolve_shard(size, params, shard_seed, keep_history) for size, shard_seed in zip(sizes, shard_seeds)]
+
+        if not shards:
+            # no epoch, empty arrays of the right types
+            shards = [_evolve_shard(0, params, seed, keep_history)]
+        for key in shards[0]:
+            setattr(self, key, np.concatenate([shard[key] for shard in shards]))
+
+        self.rescued_n = int(self.saved.sum())
+        self.rescue_probability = self.rescued_n / epochs if epochs else np.nan
+        return
@@ -4,7 +4,19 @@ Created on Wed Dec 28 19:15:38 2022
 @author: lillo
 """
 
+import logging
+import numpy as np
+from time import perf_counter
 from gillespie import stochastic_backend
+from gillespie.network import ReactionNetwork
+from gillespie.tau_leaping import TauLeaper
+from gillespie.recording import TrajectoryRecorder, recorder_capacity
+from gillespie.rng import BufferedRandom
+from gillespie.events import EventSet
+from gillespie.sampling import PropensityTracker, make_sampler
+from gillespie import kernels
+
+logger = logging.getLogger(__name__)
 
 class gillespie_ssa():
     
@@ -14,7 +26,18 @@ class gillespie_ssa():
                  combinatorics,
                  time=False,
                  iteration:int = 100,
-                 set_fixed_reagents=False):
+                 set_fixed_reagents=False,
+                 method:str = 'ssa',
+                 epsilon:float = 0.03,
+                 record_every:int = 1,
+                 record_times=None,
+                 run:bool = True,
+                 rng=None,
+                 instrumentation=None,
+                 statistics=None,
+                 events=None,
+                 backend:str = 'python',
+                 sampler:str = 'tree'):
         '''
         Initialize gillespie simulation class
         
@@ -24,8 +47,11 @@ class gillespie_ssa():
             The list of number (int) of molecule for each molecular species involved in the reaction
         state_change_vectors : list
             The list of list, list(list(int)), containing the variation of reagent quantity for a certain chemical reaction.
-        combinatorics : list(function)
-            The list of lambda function, each of which describe the combinatorics for the reagent of a reaction
+            Can be None when combinatorics is a ReactionNetwork, in which case
+            the state change vectors are taken from the network.
+        combinatorics : list(function) or ReactionNetwork
+            The list of lambda function, each of which describe the combinatorics for the reagent of a reaction,
+            or a ReactionNetwork with the compiled mass-action propensities.
         iteration : int, optional
             The number of iteration of the algorithm to perform.
             The default is 100.
@@ -34,6 +60,56 @@ class gillespie_ssa():
             of a corresponding reagent (in reagent_quantity argument),
             that we want to mantain fixed at the initial value through the simulation.
             The default is False.
+        method : str, optional
+            'ssa' simulates every single event.
+            'tau_leaping' uses the approximate adaptive tau-leaping of
+            Cao, Gillespie and Petzold (2006), see tau_leaping.TauLeaper,
+            falling back to exact steps when a reactant is low.
+            In this mode an iteration is a leap, that can contain many events.
+            The default is 'ssa'.
+        epsilon : float, optional
+            The error control parameter of tau-leaping. The default is 0.03.
+        record_every : int, optional
+            Record one iteration every record_every, plus the last one.
+            Use 0 to only keep the first and the last state, for example with statistics.
+            The default is 1.
+        record_times : list(float), optional
+            Sorted time points where the state is recorded instead,
+            carrying forward the last value before each point.
+            The default is None.
+        run : bool, optional
+            Run the whole simulation now, keeping the trajectory in memory.
+            Use run=False to drive it later with iter_chunks or write_chunks.
+            The default is True.
+        rng : optional
+            Seed, np.random.Generator or rng.BufferedRandom used for every random draw.
+            The numbers are drawn in blocks, see rng.BufferedRandom.
+            The default is None, the legacy global generator.
+        instrumentation : instrumentation.Instrumentation, optional
+            Phase timers, reaction counters and progress callback.
+            The default is None, no instrumentation.
+        statistics : statistics.TimeWeightedStats, optional
+            Streaming time-weighted statistics updated at each iteration.
+            The default is None.
+        events : list or events.EventSet, optional
+            Threshold, LinearCombination and ZeroPropensity events. The first
+            passage time and state of each one is recorded in self.events,
+            and the events created with stop=True end the simulation.
+            The default is None.
+        backend : str, optional
+            'python' runs the loop below. 'numba' runs kernels.direct_kernel,
+            compiled once per process (and cached on disk), when numba is installed,
+            combinatorics is a ReactionNetwork and method is 'ssa' without
+            instrumentation, statistics or events; otherwise the Python loop is used.
+            Both give the same output arrays with statistically equivalent trajectories,
+            but not the same random stream.
+            The default is 'python'.
+        sampler : str, optional
+            The reaction selection structure of the Python loop, see sampling.make_sampler:
+            'linear', 'tree' (O(log M)) or 'composition_rejection' (O(1) expected).
+            Only the propensities of the reactions that depend on the fired one
+            are recomputed when combinatorics is a ReactionNetwork.
+            The default is 'tree'.
 
         Returns
         -------
@@ -41,46 +117,226 @@ class gillespie_ssa():
 
         '''
         
-        self.actual_reagent_quantity = reagent_quantity
-        molecular_species_history = []
-        molecular_species_history.append(reagent_quantity)
-        self.molecular_species_history = molecular_species_history
+        if state_change_vectors is None and isinstance(combinatorics, ReactionNetwork):
+            state_change_vectors = combinatorics.state_change_vectors
+        self.initial_reagent_quantity = list(reagent_quantity)
+        self.actual_reagent_quantity = list(reagent_quantity)
         self.state_change_vector = state_change_vectors
         self.reactions_combinatorics = combinatorics
         self.actual_time = 0
-        self.timestep_list = []
-        self.timestep_list.append(self.actual_time)
+        self.rng = rng if isinstance(rng, BufferedRandom) else BufferedRandom(rng)
+        # trajectory buffers, exposed as timestep_list and molecular_species_history
+        self.recorder = TrajectoryRecorder(reagent_quantity, self.actual_time, every=record_every, time_grid=record_times,
+                                           capacity=recorder_capacity(iteration, record_every))
         self.max_iteration = iteration
         self.actual_iteration = 0
+        self.set_fixed_reagents = set_fixed_reagents
+        self.method = method
+        self.instrumentation = instrumentation
+        self.statistics = statistics
+        if events is not None and not isinstance(events, EventSet):
+            events = EventSet(events)
+        self.events = events
+        if events is not None:
+            # species events to check after each reaction
+            self.event_table = events.affected_by(self.state_change_vector)
+            events.start(self.actual_time, self.actual_reagent_quantity)
+        if statistics is not None:
+            statistics.start(self.actual_time, reagent_quantity)
+        if method == 'tau_leaping':
+            self.tau_leaper = TauLeaper(self.state_change_vector, combinatorics,
+                                        epsilon=epsilon, set_fixed_reagents=set_fixed_reagents, rng=self.rng)
+        elif method == 'ssa':
+            self.tau_leaper = None
+        else:
+            raise ValueError("Invalid method. Choose 'ssa' or 'tau_leaping'.")
+        self.backend = backend
+        # checked here, the sampler is built when the simulation starts
+        make_sampler(sampler, [])
+        self.sampler = sampler
+        self.use_kernel = kernels.use_kernel(backend, combinatorics, method=method,
+                                             options={'instrumentation': instrumentation,
+                                                      'statistics': statistics,
+                                                      'events': events})
+        if run:
+            self.run()
+        return
+
+    def run(self):
+        '''
+        Run the simulation until the end, keeping the trajectory in memory.
+        '''
+        for _ in self._simulate(chunk_size=None):
+            pass
+        self.timestep_list = self.recorder.times
+        self.molecular_species_history = self.recorder.states
+
+    def iter_chunks(self, chunk_size:int = 100_000):
+        '''
+        Run the simulation, yielding the trajectory in chunks as it advances.
+
+        The recorded rows are handed over and dropped from memory each time
+        chunk_size of them are ready, so memory stays bounded for any run length.
+
+        Parameters
+        ----------
+        chunk_size : int, optional
+            Number of recorded rows in each chunk (the last one can be shorter).
+            The default is 100_000.
+
+        Yields
+        ------
+        tuple(np.ndarray, np.ndarray)
+            The times, shape (n,), and the states, shape (n, n_species), of the chunk.
+
+        '''
+        self.timestep_list = None
+        self.molecular_species_history = None
+        yield from self._simulate(chunk_size=chunk_size)
+
+    def write_chunks(self, writer, chunk_size:int = 100_000):
+        '''
+        Run the simulation, appending the trajectory to writer (a streaming.TrajectoryWriter) chunk by chunk.
+        '''
+        for times, states in self.iter_chunks(chunk_size=chunk_size):
+            writer.write(times, states)
+
+    def _simulate(self, chunk_size):
+        if self.use_kernel:
+            yield from self._simulate_kernel(chunk_size)
+            return
+        recorder = self.recorder
+        set_fixed_reagents = self.set_fixed_reagents
+        tau_leaper = self.tau_leaper
+        instrument = self.instrumentation
+        timing = instrument is not None and instrument.timing
+        if instrument is not None:
+            instrument.start(self, len(self.state_change_vector))
+        statistics = self.statistics
+        events = self.events
+        # propensities kept up to date incrementally, with the sampler of the next reaction
+        propensities = PropensityTracker(self.reactions_combinatorics, self.actual_reagent_quantity,
+                                         sampler=self.sampler, rng=self.rng, fixed_species=set_fixed_reagents)
+        propensity_function_list = propensities.values
         
         while self.actual_iteration < self.max_iteration:
-            # calculate propensity function for each reaction
-            propensity_function_list = stochastic_backend.calculate_propensity_funct(
-                reag_quant=self.actual_reagent_quantity, 
-                combinatorics=self.reactions_combinatorics)
+            if events is not None and events.stopped:
+                break
+            cumulative_propensity = propensities.total
+            if events is not None and events.check_propensity(self.actual_time, self.actual_reagent_quantity,
+                                                              propensity_function_list, cumulative_propensity):
+                break
             # check break points, break if a reagent goes to 0
-            if 0 in set(propensity_function_list):
-                print('A reagent reached 0')
+            if propensities.n_zero:
+                logger.info('A reagent reached 0')
                 break                
-            # calculate cumulative propensity
-            cumulative_propensity = sum(propensity_function_list)
             # check if there are reaction that can happen
             # this break point almost never comes in, because the one above comes first
             if cumulative_propensity == 0:
                 break
-            # calculate next timestep
-            tau = stochastic_backend.calculate_tau(cumulative_propensity)
+            if timing:
+                clock = perf_counter()
+            # try a leap, unless exact steps are due
+            leap = None
+            if tau_leaper is not None:
+                if tau_leaper.exact_steps > 0:
+                    tau_leaper.exact_steps -= 1
+                else:
+                    leap = tau_leaper.leap(self.actual_reagent_quantity, propensity_function_list, cumulative_propensity)
+                    if timing:
+                        clock = instrument.lap('leap', clock)
+            if leap is not None:
+                tau, state_change = leap
+                # the leap can change any species
+                affected = None
+                mu = None
+                if instrument is not None:
+                    instrument.fired_many(tau_leaper.last_firings)
+                if statistics is not None:
+                    statistics.fired_many(tau_leaper.last_firings, self.actual_time)
+            else:
+                # calculate next timestep
+                tau = stochastic_backend.calculate_tau(cumulative_propensity, rng=self.rng)
+                if timing:
+                    clock = instrument.lap('tau', clock)
+                # calculate next reaction
+                mu = propensities.sample()
+                state_change = self.state_change_vector[mu]
+                if events is not None:
+                    affected = self.event_table[mu]
+                if statistics is not None:
+                    statistics.fired(mu, self.actual_time + tau)
+                if instrument is not None:
+                    instrument.fired(mu)
+                    if timing:
+                        clock = instrument.lap('mu', clock)
             self.actual_time += tau
-            self.timestep_list.append(self.actual_time)
-            # calculate next reaction
-            mu = stochastic_backend.calculate_mu(propensity_list=propensity_function_list, cumulative_propensity=cumulative_propensity)
-            self.actual_reagent_quantity = [i+e for i,e in zip(self.actual_reagent_quantity,self.state_change_vector[mu])]
+            self.actual_reagent_quantity = [i+e for i,e in zip(self.actual_reagent_quantity,state_change)]
             # check if some reagents have to be fixed
             if set_fixed_reagents:
                 for index in set_fixed_reagents:
-                    self.actual_reagent_quantity[index] = self.molecular_species_history[0][index]
+                    self.actual_reagent_quantity[index] = self.initial_reagent_quantity[index]
+            if timing:
+                clock = instrument.lap('update', clock)
+            # recalculate the propensities changed by the event, all of them after a leap
+            propensities.refresh(self.actual_reagent_quantity, mu)
+            if timing:
+                clock = instrument.lap('propensity', clock)
             # update reagent quantities
-            self.molecular_species_history.append(self.actual_reagent_quantity)
+            recorder.record(self.actual_time, self.actual_reagent_quantity)
+            if statistics is not None:
+                statistics.record(self.actual_time, self.actual_reagent_quantity)
+            if events is not None:
+                events.check(self.actual_time, self.actual_reagent_quantity, affected)
             # update iteration counter
             self.actual_iteration += 1
-        return
\ No newline at end of file
+            if instrument is not None:
+                if timing:
+                    instrument.lap('record', clock)
+                instrument.tick()
+            if chunk_size and len(recorder) >= chunk_size:
+                yield recorder.pop_chunk()
+        if instrument is not None:
+            instrument.stop()
+        recorder.finalize(self.actual_time)
+        if statistics is not None:
+            statistics.finalize(self.actual_time)
+        if chunk_size and len(recorder):
+            yield recorder.pop_chunk()
+
+    def _simulate_kernel(self, chunk_size):
+        '''
+        The simulation loop run by kernels.direct_kernel, a block of events per call.
+        '''
+        recorder = self.recorder
+        draws = kernels.KernelDraws(self.rng.rng)
+        tables = kernels.kernel_tables(self.reactions_combinatorics, self.set_fixed_reagents)
+        state = np.array(self.actual_reagent_quantity, dtype=np.int64)
+        times_out = np.empty(kernels.BLOCK_SIZE)
+        states_out = np.empty((kernels.BLOCK_SIZE, len(state)), dtype=np.int64)
+        kernel = kernels.compiled_kernel()
+        every = max(recorder.every, 1)
+
+        while self.actual_iteration < self.max_iteration:
+            n = min(kernels.BLOCK_SIZE, self.max_iteration - self.actual_iteration)
+            if chunk_size:
+                # stop the block when a chunk can be full
+                n = min(n, max(chunk_size - len(recorder), 1) * every)
+            exponentials, uniforms = draws.take(n)
+            count, self.actual_time, status = kernel(
+                state, float(self.actual_time), np.inf, np.inf, True, False, *tables,
+                exponentials, uniforms, times_out, states_out)
+            draws.consume(count, status)
+            recorder.record_block(times_out[:count], states_out[:count])
+            self.actual_iteration += count
+            if chunk_size and len(recorder) >= chunk_size:
+                yield recorder.pop_chunk()
+            if status == kernels.ZERO_PROPENSITY:
+                logger.info('A reagent reached 0')
+                break
+            if status == kernels.NO_PROPENSITY:
+                break
+        self.actual_reagent_quantity = state.tolist()
+        recorder.finalize(self.actual_time)
+        if chunk_size and len(recorder):
+            yield recorder.pop_chunk()
@@ -6,12 +6,25 @@ Created on Sun Nov  3 12:09:21 2024
 @author: lillux
 """
 import numpy as np
-import time
-from gillespie.stochastic_backend import calculate_propensity_funct, calculate_mu, calculate_tau
+import logging
+import pickle
+from time import perf_counter
+from gillespie.stochastic_backend import calculate_tau
+from gillespie.network import ReactionNetwork
+from gillespie.tau_leaping import TauLeaper
+from gillespie.recording import TrajectoryRecorder, recorder_capacity
+from gillespie.rng import BufferedRandom
+from gillespie.schedule import RegimeSchedule
+from gillespie.events import EventSet
+from gillespie.sampling import PropensityTracker, make_sampler
+from gillespie import kernels
+from gillespie.checkpoint import load_checkpoint
 from typing import Dict, List
 from collections.abc import Callable
 # import warnings
 
+logger = logging.getLogger(__name__)
+
 class gillespie_dynamic():
     
     def __init__(self,
@@ -26,7 +39,20 @@ class gillespie_dynamic():
                  Ni: int = None,
                  oscillate: bool = False,
                  oscillation_interval: Dict[str,float] = None,
-                 start_with: str = None):
+                 start_with: str = None,
+                 method: str = 'ssa',
+                 epsilon: float = 0.03,
+                 record_every: int = 1,
+                 record_times: List[float] = None,
+                 run: bool = True,
+                 rng=None,
+                 schedule: RegimeSchedule = None,
+                 instrumentation=None,
+                 statistics=None,
+                 events=None,
+                 backend: str = 'python',
+                 checkpoint=None,
+                 sampler: str = 'tree'):
         '''
         Initialize gillespie stochastic simulation algorithm class
 
@@ -36,8 +62,11 @@ class gillespie_dynamic():
             The list of number (int) of molecule for each molecular species involved in the reaction
         state_change_vectors : Dict[str:List[List[int]]]
             Dict containing the state change vectors for each reaction.
+            Can be None when every value of combinatorics is a ReactionNetwork,
+            in which case the state change vectors are taken from the networks.
         combinatorics : Dict[str:List[List[Callable[[List[int]], int]]]]
             Dict containing combinatorial functions for each reaction.
+            Each value can also be a ReactionNetwork.
         max_time : float, optional
             Maximum simulation time. Required if stop_condition='time'.
         max_iteration : int, optional
@@ -49,22 +78,97 @@ class gillespie_dynamic():
             The default is False.
         rescale : int, optional
             Threshold for population rescaling.ù
+            For models with high copy number species, hybrid.gillespie_hybrid
+            avoids this approximation.
         Ni : int, optional
             Population size after rescaling.
         oscillate : bool, optional
             Whether to oscillate between states.
         oscillation_interval : Dict[str:float], optional
             Time intervals for state oscillations.
+            The states are cycled starting from start_with, in the order of the dict,
+            see schedule.RegimeSchedule.from_intervals.
         start_with : str, optional
             Initial state to start the simulation with.
+            Defaults to the first state of the schedule.
+        method : str, optional
+            'ssa' simulates every single event.
+            'tau_leaping' uses the approximate adaptive tau-leaping of
+            Cao, Gillespie and Petzold (2006), see tau_leaping.TauLeaper,
+            falling back to exact steps when a reactant is low.
+            In this mode an iteration is a leap, that can contain many events,
+            and with stop_condition='time' the last leap ends exactly at max_time.
+            Default is 'ssa'.
+        epsilon : float, optional
+            The error control parameter of tau-leaping. Default is 0.03.
+        record_every : int, optional
+            Record one iteration every record_every, plus the last one.
+            Use 0 to only keep the first and the last state, for example with statistics.
+            Default is 1.
+        record_times : List[float], optional
+            Sorted time points where the state is recorded instead,
+            carrying forward the last value before each point.
+        run : bool, optional
+            Run the whole simulation now, keeping the trajectory in memory.
+            Use run=False to drive it later with iter_chunks or write_chunks.
+            Default is True.
+        rng : optional
+            Seed, np.random.Generator or rng.BufferedRandom used for every random draw.
+            The numbers are drawn in blocks, see rng.BufferedRandom.
+            Default is None, the legacy global generator.
+        schedule : schedule.RegimeSchedule, optional
+            Sequence of states over time, cyclic or piecewise, with any number of states.
+            Overrides oscillation_interval and start_with.
+            The switches happen exactly at the end of each interval: when the next
+            event would fall after it, the clock is moved to the switch time and
+            the pending waiting time is dropped, which is exact because the waiting
+            times are memoryless. Default is None.
+        instrumentation : instrumentation.Instrumentation, optional
+            Phase timers, reaction counters and progress callback.
+            The progress messages are logged at INFO level by the
+            gillespie.gillespie_dynamic logger. Default is None.
+        statistics : statistics.TimeWeightedStats, optional
+            Streaming time-weighted statistics updated at each iteration.
+            Default is None.
+        events : list or events.EventSet, optional
+            Threshold, LinearCombination and ZeroPropensity events. The first
+            passage time and state of each one is recorded in self.events,
+            and the events created with stop=True end the simulation.
+            Default is None.
+        backend : str, optional
+            'python' runs the loop below. 'numba' runs kernels.direct_kernel,
+            compiled once per process (and cached on disk), when numba is installed,
+            every value of combinatorics is a ReactionNetwork and method is 'ssa'
+            without rescale, instrumentation, statistics or events; otherwise the
+            Python loop is used. The state switches are exact in both, and the
+            trajectories are statistically equivalent but not the same random stream.
+            Default is 'python'.
+        checkpoint : checkpoint.Checkpointer, optional
+            Save a snapshot of the simulation every given number of iterations
+            or seconds, to continue it with gillespie_dynamic.resume.
+            With iter_chunks or write_chunks the pending rows are handed over
+            before each snapshot, and rows_streamed counts the rows handed over.
+            A run kept in memory saves its whole trajectory in each snapshot.
+            Runs the Python loop. Default is None.
+        sampler : str, optional
+            The reaction selection structure of the Python loop, see sampling.make_sampler:
+            'linear', 'tree' (O(log M)) or 'composition_rejection' (O(1) expected).
+            Only the propensities of the reactions that depend on the fired one
+            are recomputed when the reactions are ReactionNetwork instances.
+            A run resumed from a checkpoint continues bit for bit with 'tree'.
+            Default is 'tree'.
         Returns
         -------
         None.
 
         '''
         
+        if state_change_vectors is None:
+            state_change_vectors = {state: network.state_change_vectors
+                                    for state, network in combinatorics.items()
+                                    if isinstance(network, ReactionNetwork)}
+        self.initial_reagent_quantity = reagent_quantity.copy()
         self.actual_reagent_quantity = reagent_quantity.copy()
-        self.molecular_species_history = [reagent_quantity.copy()]
         self.state_change_vector = state_change_vectors
         self.reactions_combinatorics = combinatorics
         self.set_fixed_reagents = set_fixed_reagents
@@ -76,9 +180,13 @@ class gillespie_dynamic():
         self.stop_condition = stop_condition
         self.max_time = max_time
         self.actual_time = 0
-        self.timestep_list = [self.actual_time]
+        self.rng = rng if isinstance(rng, BufferedRandom) else BufferedRandom(rng)
         self.max_iteration = max_iteration
         self.actual_iteration = 0
+        # trajectory buffers, exposed as timestep_list and molecular_species_history
+        capacity = recorder_capacity(max_iteration, record_every)
+        self.recorder = TrajectoryRecorder(reagent_quantity, self.actual_time, every=record_every,
+                                           time_grid=record_times, capacity=capacity)
 
         # Validate stop_condition and required parameters
         if self.stop_condition == 'time':
@@ -90,14 +198,278 @@ class gillespie_dynamic():
         else:
             raise ValueError("Invalid stop_condition. Choose 'time' or 'iterations'.")
 
-        # Initialize state tracking
-        state_time = 0
-        running_state = self.start_with
-        self.time_tracker = {i:{'start':[], 'end':[]} for i in self.reactions_combinatorics.keys()}
-        self.time_tracker[running_state]['start'].append(self.actual_time)
+        # one tau-leaper for each state, built once
+        self.method = method
+        self.epsilon = epsilon
+        self.instrumentation = instrumentation
+        self.statistics = statistics
+        if statistics is not None:
+            statistics.start(self.actual_time, reagent_quantity)
+        if self.method == 'tau_leaping':
+            self.tau_leapers = {state: TauLeaper(self.state_change_vector[state], combinatorics[state],
+                                            epsilon=epsilon, set_fixed_reagents=self.set_fixed_reagents,
+                                            rng=self.rng)
+                                for state in combinatorics}
+        elif self.method != 'ssa':
+            raise ValueError("Invalid method. Choose 'ssa' or 'tau_leaping'.")
+
+        # Build the schedule of the states
         if self.oscillation_interval is None:
             self.oscillation_interval = {}
-        
+        if schedule is None:
+            if self.start_with is None:
+                self.start_with = next(iter(self.reactions_combinatorics))
+            if self.oscillation_interval:
+                schedule = RegimeSchedule.from_intervals(self.oscillation_interval, self.start_with)
+            else:
+                schedule = RegimeSchedule.constant(self.start_with)
+        self.schedule = schedule
+        # position in the schedule and end time of the running state
+        self.schedule_index, self.next_switch = self.schedule.locate(self.actual_time)
+        self.start_with = self.schedule.state(self.schedule_index)
+
+        # the reaction table of each state, looked up once per switch
+        self.regimes = {state: (self.reactions_combinatorics[state],
+                                self.state_change_vector[state],
+                                self.tau_leapers[state] if self.method == 'tau_leaping' else None)
+                        for state in set(self.schedule.states)}
+
+        # Initialize state tracking
+        self.state_time = 0
+        self.running_state = self.start_with
+        self.time_tracker = {i:{'start':[], 'end':[]} for i in self.reactions_combinatorics.keys()}
+        self.time_tracker[self.running_state]['start'].append(self.actual_time)
+        if events is not None and not isinstance(events, EventSet):
+            events = EventSet(events)
+        self.events = events
+        if events is not None:
+            # species events to check after each reaction of each state
+            self.event_tables = {state: events.affected_by(self.state_change_vector[state]) for state in self.regimes}
+            events.start(self.actual_time, self.actual_reagent_quantity)
+        self.backend = backend
+        make_sampler(sampler, [])
+        self.sampler = sampler
+        # the propensities of each state, see _propensities
+        self._trackers = {}
+        self.checkpoint = checkpoint
+        # rows handed over by iter_chunks
+        self.rows_streamed = 0
+        self.use_kernel = kernels.use_kernel(backend, combinatorics, method=method,
+                                             options={'rescale': rescale,
+                                                      'instrumentation': instrumentation,
+                                                      'statistics': statistics,
+                                                      'events': events,
+                                                      'checkpoint': checkpoint})
+        if run:
+            self.run()
+        return
+
+    def run(self):
+        '''
+        Run the simulation until the end, keeping the trajectory in memory.
+        '''
+        for _ in self._simulate(chunk_size=None):
+            pass
+        self.timestep_list = self.recorder.times
+        self.molecular_species_history = self.recorder.states
+
+    def iter_chunks(self, chunk_size: int = 100_000):
+        '''
+        Run the simulation, yielding the trajectory in chunks as it advances.
+
+        The recorded rows are handed over and dropped from memory each time
+        chunk_size of them are ready, so memory stays bounded for any run length.
+
+        Parameters
+        ----------
+        chunk_size : int, optional
+            Number of recorded rows in each chunk (the last one can be shorter).
+            Default is 100_000.
+
+        Yields
+        ------
+        tuple(np.ndarray, np.ndarray)
+            The times, shape (n,), and the states, shape (n, n_species), of the chunk.
+
+        '''
+        self.timestep_list = None
+        self.molecular_species_history = None
+        for chunk in self._simulate(chunk_size=chunk_size):
+            self.rows_streamed += len(chunk[0])
+            yield chunk
+
+    def write_chunks(self, writer, chunk_size: int = 100_000):
+        '''
+        Run the simulation, appending the trajectory to writer (a streaming.TrajectoryWriter) chunk by chunk.
+        '''
+        for times, states in self.iter_chunks(chunk_size=chunk_size):
+            writer.write(times, states)
+
+    def _switch_state(self) -> str:
+        '''
+        Move to the next state of the schedule, at the end of the running one, and return it.
+        '''
+        self.time_tracker[self.running_state]['end'].append(self.actual_time)
+        self.schedule_index, self.next_switch = self.schedule.next(self.schedule_index, self.next_switch)
+        self.state_time = 0
+        self.running_state = self.schedule.state(self.schedule_index)
+        self.time_tracker[self.running_state]['start'].append(self.actual_time)
+        return self.running_state
+
+    def _wait_for_switch(self, idle_switches: int) -> bool:
+        '''
+        With no reaction possible, move the clock to the next switch if a later state can react.
+
+        Returns False when the simulation has to stop.
+        '''
+        if (idle_switches <= len(self.schedule.states) and self.next_switch < np.inf
+                and (self.stop_condition != 'time' or self.next_switch < self.max_time)):
+            # nothing happens until the next state
+            self.state_time += self.next_switch - self.actual_time
+            self.actual_time = self.next_switch
+            return True
+        logger.info('Cumulative propensity is zero, stopping simulation.')
+        return False
+
+    def _propensities(self, state: str) -> PropensityTracker:
+        '''
+        The propensities of the reactions of state, up to date with the current quantities.
+        '''
+        tracker = self._trackers.get(state)
+        if tracker is None:
+            tracker = self._trackers[state] = PropensityTracker(self.regimes[state][0], self.actual_reagent_quantity,
+                                                                sampler=self.sampler, rng=self.rng,
+                                                                fixed_species=self.set_fixed_reagents)
+        else:
+            tracker.refresh(self.actual_reagent_quantity)
+        return tracker
+
+    @classmethod
+    def resume(cls, path: str, combinatorics=None, checkpoint=None, instrumentation=None, run: bool = True):
+        '''
+        Continue a simulation from a checkpoint written by checkpoint.Checkpointer.
+
+        The simulation goes on exactly as the checkpointed run would have,
+        random stream included. To append to a trajectory written with
+        write_chunks, open it again keeping the rows of the checkpoint:
+
+            sim = gillespie_dynamic.resume(path, checkpoint=Checkpointer(path, every_seconds=600), run=False)
+            with TrajectoryWriter(directory, n_species, n_rows=sim.rows_streamed) as writer:
+                sim.write_chunks(writer)
+
+        Parameters
+        ----------
+        path : str
+            The checkpoint file.
+        combinatorics : optional
+            The combinatorics of the simulation, required when they could not
+            be saved in the checkpoint (lambda functions). Default is None.
+        checkpoint : checkpoint.Checkpointer, optional
+            Keep saving snapshots while resuming. Default is None.
+        instrumentation : instrumentation.Instrumentation, optional
+            New instrumentation for the resumed run. Default is None.
+        run : bool, optional
+            Run the rest of the simulation now, see __init__. Default is True.
+
+        Returns
+        -------
+        gillespie_dynamic
+            The resumed simulation.
+
+        '''
+        snapshot = load_checkpoint(path)
+        model = dict(snapshot['model'])
+        if combinatorics is not None:
+            model['combinatorics'] = combinatorics
+        if model['combinatorics'] is None:
+            raise ValueError("the checkpoint has no combinatorics, pass them to resume")
+        events = snapshot['events']
+        sim = cls(**model, rng=snapshot['rng'], run=False, instrumentation=instrumentation,
+                  events=None if events is None else events.events, checkpoint=checkpoint)
+        # statistics and events are restored after __init__, which would reset them
+        sim.statistics = snapshot['statistics']
+        sim.events = events
+        for name in ('actual_reagent_quantity', 'actual_time', 'actual_iteration', 'state_time',
+                     'running_state', 'schedule_index', 'next_switch', 'time_tracker',
+                     'recorder', 'rows_streamed'):
+            setattr(sim, name, snapshot[name])
+        for state, exact_steps in snapshot['exact_steps'].items():
+            sim.tau_leapers[state].exact_steps = exact_steps
+        # the checkpointed run used the Python loop, and so does its continuation
+        sim.use_kernel = False
+        if run:
+            sim.run()
+        return sim
+
+    def _checkpoint_model(self) -> dict:
+        '''
+        The arguments of __init__ saved in the checkpoints, to rebuild the simulation.
+        '''
+        model = {'reagent_quantity': self.initial_reagent_quantity,
+                 'state_change_vectors': self.state_change_vector,
+                 'combinatorics': self.reactions_combinatorics,
+                 'max_time': self.max_time,
+                 'max_iteration': self.max_iteration,
+                 'stop_condition': self.stop_condition,
+                 'set_fixed_reagents': self.set_fixed_reagents,
+                 'rescale': self.rescale,
+                 'Ni': self.Ni,
+                 'method': self.method,
+                 'epsilon': self.epsilon,
+                 'schedule': self.schedule,
+                 'backend': self.backend,
+                 'sampler': self.sampler}
+        try:
+            pickle.dumps(self.reactions_combinatorics)
+        except (pickle.PicklingError, AttributeError, TypeError):
+            logger.warning('The combinatorics cannot be saved in the checkpoint, pass them to resume.')
+            model['combinatorics'] = None
+        return model
+
+    def _snapshot(self, model: dict) -> dict:
+        '''
+        The state of the simulation saved by the checkpoints.
+        '''
+        return {'model': model,
+                'actual_reagent_quantity': list(self.actual_reagent_quantity),
+                'actual_time': self.actual_time,
+                'actual_iteration': self.actual_iteration,
+                'state_time': self.state_time,
+                'running_state': self.running_state,
+                'schedule_index': self.schedule_index,
+                'next_switch': self.next_switch,
+                'time_tracker': self.time_tracker,
+                'exact_steps': ({state: leaper.exact_steps for state, leaper in self.tau_leapers.items()}
+                                if self.method == 'tau_leaping' else {}),
+                'rng': self.rng,
+                'recorder': self.recorder,
+                'statistics': self.statistics,
+                'events': self.events,
+                'rows_streamed': self.rows_streamed}
+
+    def _simulate(self, chunk_size):
+        if self.use_kernel:
+            yield from self._simulate_kernel(chunk_size)
+            return
+        recorder = self.recorder
+        running_state = self.running_state
+        combinatorics, state_change_vector, tau_leaper = self.regimes[running_state]
+        propensities = self._propensities(running_state)
+        # consecutive switches without events, to stop when no state can react
+        idle_switches = 0
+        instrument = self.instrumentation
+        timing = instrument is not None and instrument.timing
+        if instrument is not None:
+            instrument.start(self, max(len(vectors) for vectors in self.state_change_vector.values()))
+        statistics = self.statistics
+        events = self.events
+        if events is not None:
+            event_table = self.event_tables[running_state]
+        checkpoint = self.checkpoint
+        if checkpoint is not None:
+            checkpoint.start(self.actual_iteration)
+            model = self._checkpoint_model()
+
         # Set loop condition based on stopping criterion
         if self.stop_condition == 'time':
             loop_condition = lambda: self.actual_time < self.max_time
@@ -107,50 +479,91 @@ class gillespie_dynamic():
         # while self.actual_iteration < self.max_iteration:
         while loop_condition():
             
-            # check if there are still reagents
-            if np.sum(self.actual_reagent_quantity) <= 0:
-                self.time_tracker[running_state]['end'].append(self.actual_time)
-                print('No reagent left, stopping simulation.')
+            if events is not None and events.stopped:
                 break
-            
-            # switch state if time interval has passed
-            if self.oscillation_interval and state_time > self.oscillation_interval[running_state]:
-                self.time_tracker[running_state]['end'].append(self.actual_time)
-                print(state_time)
-                state_time = 0
-                # code below works only if you have 2 states
-                running_state = list(set(self.reactions_combinatorics.keys()) - set([running_state]))[0]
-                self.time_tracker[running_state]['start'].append(self.actual_time)
+
+            # switch state at the end of its time interval
+            if self.actual_time >= self.next_switch:
+                running_state = self._switch_state()
+                combinatorics, state_change_vector, tau_leaper = self.regimes[running_state]
+                propensities = self._propensities(running_state)
+                if events is not None:
+                    event_table = self.event_tables[running_state]
                 
-            # Print progress each million of iteration
+            # Log progress each million of iteration
             if (self.actual_iteration % 1000000) == 0:
-                print(f'Actual state is: {running_state}, actual iteration is: {self.actual_iteration}, simulation time is {self.actual_time}, real time is: {time.ctime()}.')
-
-                        
-            # calculate propensity function for each reaction
-            propensity_function_list = calculate_propensity_funct(
-                reag_quant=self.actual_reagent_quantity, 
-                combinatorics=self.reactions_combinatorics[running_state])
-              
-            # calculate cumulative propensity
-            cumulative_propensity = sum(propensity_function_list)
+                logger.info('Actual state is: %s, actual iteration is: %d, simulation time is %s.',
+                            running_state, self.actual_iteration, self.actual_time)
+
+            if timing:
+                clock = perf_counter()
+            propensity_function_list = propensities.values
+            cumulative_propensity = propensities.total
+            if events is not None and events.check_propensity(self.actual_time, self.actual_reagent_quantity,
+                                                              propensity_function_list, cumulative_propensity):
+                break
+            # check if there are still reagents
+            if sum(self.actual_reagent_quantity) <= 0:
+                logger.info('No reagent left, stopping simulation.')
+                break
             # check if there are reaction that can happen
-            # this break point almost never comes in, because the one above comes first
             if cumulative_propensity <= 0:
-                self.time_tracker[running_state]['end'].append(self.actual_time)
-                print('Cumulative propensity is zero, stopping simulation.')
+                idle_switches += 1
+                if self._wait_for_switch(idle_switches):
+                    continue
                 break
+            time_to_switch = self.next_switch - self.actual_time
             
-            # calculate next timestep
-            tau = calculate_tau(cumulative_propensity)
-            state_time += tau
-            self.actual_time += tau
-            self.timestep_list.append(self.actual_time)
-            
-            # calculate next reaction
-            mu = calculate_mu(propensity_list=propensity_function_list, cumulative_propensity=cumulative_propensity)
-            # print(f'Combinatoric is {running_state}, mu is {mu}, cumcumulative_propensity is {cumulative_propensity}')
-            self.actual_reagent_quantity = [i+e for i,e in zip(self.actual_reagent_quantity,self.state_change_vector[running_state][mu])]
+            # try a leap, unless exact steps are due
+            leap = None
+            if tau_leaper is not None:
+                if tau_leaper.exact_steps > 0:
+                    tau_leaper.exact_steps -= 1
+                else:
+                    max_tau = self.max_time - self.actual_time if self.stop_condition == 'time' else np.inf
+                    leap = tau_leaper.leap(self.actual_reagent_quantity, propensity_function_list,
+                                           cumulative_propensity, max_tau=min(max_tau, time_to_switch))
+                    if timing:
+                        clock = instrument.lap('leap', clock)
+            if leap is not None:
+                tau, state_change = leap
+                # the leap can change any species
+                affected = None
+                mu = None
+                if instrument is not None:
+                    instrument.fired_many(tau_leaper.last_firings)
+                if statistics is not None:
+                    statistics.fired_many(tau_leaper.last_firings, self.actual_time)
+            else:
+                # calculate next timestep
+                tau = calculate_tau(cumulative_propensity, rng=self.rng)
+                if timing:
+                    clock = instrument.lap('tau', clock)
+                if tau >= time_to_switch:
+                    # the state switches before the next event
+                    self.state_time += time_to_switch
+                    self.actual_time = self.next_switch
+                    continue
+                # calculate next reaction
+                mu = propensities.sample()
+                # print(f'Combinatoric is {running_state}, mu is {mu}, cumcumulative_propensity is {cumulative_propensity}')
+                state_change = state_change_vector[mu]
+                if events is not None:
+                    affected = event_table[mu]
+                if statistics is not None:
+                    statistics.fired(mu, self.actual_time + tau)
+                if instrument is not None:
+                    instrument.fired(mu)
+                    if timing:
+                        clock = instrument.lap('mu', clock)
+            idle_switches = 0
+            self.state_time += tau
+            if tau >= time_to_switch:
+                # a leap truncated at the switch, avoid rounding
+                self.actual_time = self.next_switch
+            else:
+                self.actual_time += tau
+            self.actual_reagent_quantity = [i+e for i,e in zip(self.actual_reagent_quantity,state_change)]
             
             # Ensure reagent quantities are non-negative
             # assert np.all(np.array(self.actual_reagent_quantity) > 0), f'Reagent with index {np.where(np.array(self.actual_reagent_quantity) <= 0)} are zero or negative.'
@@ -159,15 +572,107 @@ class gillespie_dynamic():
             # check if some reagents have to be fixed
             if self.set_fixed_reagents:
                 for index in self.set_fixed_reagents:
-                    self.actual_reagent_quantity[index] = self.molecular_species_history[0][index]
-            if self.rescale and np.sum(self.actual_reagent_quantity) > self.rescale:
+                    self.actual_reagent_quantity[index] = self.initial_reagent_quantity[index]
+            if self.rescale and sum(self.actual_reagent_quantity) > self.rescale:
                 scale_factor = self.Ni / self.rescale
-                self.actual_reagent_quantity = [np.random.poisson(reag * scale_factor) for reag in self.actual_reagent_quantity]
+                self.actual_reagent_quantity = [self.rng.poisson(reag * scale_factor) for reag in self.actual_reagent_quantity]
+                # every species can change
+                affected = None
+                mu = None
+            if timing:
+                clock = instrument.lap('update', clock)
+            # recalculate the propensities changed by the event, all of them after a leap or a rescaling
+            propensities.refresh(self.actual_reagent_quantity, mu)
+            if timing:
+                clock = instrument.lap('propensity', clock)
         
             # update reagent quantities
-            self.molecular_species_history.append(self.actual_reagent_quantity)
+            recorder.record(self.actual_time, self.actual_reagent_quantity)
+            if statistics is not None:
+                statistics.record(self.actual_time, self.actual_reagent_quantity)
+            if events is not None:
+                events.check(self.actual_time, self.actual_reagent_quantity, affected)
             
             # update iteration counter
             self.actual_iteration += 1
+            if instrument is not None:
+                if timing:
+                    instrument.lap('record', clock)
+                instrument.tick()
+            if chunk_size and len(recorder) >= chunk_size:
+                yield recorder.pop_chunk()
+            if checkpoint is not None and checkpoint.due(self.actual_iteration):
+                if chunk_size and len(recorder):
+                    # the snapshot only refers to rows already handed over
+                    yield recorder.pop_chunk()
+                checkpoint.save(self._snapshot(model), self.actual_iteration)
+        if instrument is not None:
+            instrument.stop()
+        self.time_tracker[running_state]['end'].append(self.actual_time)
+        recorder.finalize(self.max_time if self.stop_condition == 'time' else self.actual_time)
+        if statistics is not None:
+            statistics.finalize(self.max_time if self.stop_condition == 'time' else self.actual_time)
+        if chunk_size and len(recorder):
+            yield recorder.pop_chunk()
+
+    def _simulate_kernel(self, chunk_size):
+        '''
+        The simulation loop run by kernels.direct_kernel, a block of events per call,
+        each block ending at the latest at the next switch.
+        '''
+        recorder = self.recorder
+        draws = kernels.KernelDraws(self.rng.rng)
+        tables = {state: kernels.kernel_tables(self.reactions_combinatorics[state], self.set_fixed_reagents)
+                  for state in self.regimes}
+        state = np.array(self.actual_reagent_quantity, dtype=np.int64)
+        times_out = np.empty(kernels.BLOCK_SIZE)
+        states_out = np.empty((kernels.BLOCK_SIZE, len(state)), dtype=np.int64)
+        kernel = kernels.compiled_kernel()
+        every = max(recorder.every, 1)
+        max_time = self.max_time if self.stop_condition == 'time' else np.inf
+        running_state = self.running_state
+        idle_switches = 0
+
+        if self.stop_condition == 'time':
+            loop_condition = lambda: self.actual_time < self.max_time
+        elif self.stop_condition == 'iterations':
+            loop_condition = lambda: self.actual_iteration < self.max_iteration
+
+        while loop_condition():
+            if self.actual_time >= self.next_switch:
+                running_state = self._switch_state()
+            n = kernels.BLOCK_SIZE
+            if self.stop_condition == 'iterations':
+                n = min(n, self.max_iteration - self.actual_iteration)
+            if chunk_size:
+                # stop the block when a chunk can be full
+                n = min(n, max(chunk_size - len(recorder), 1) * every)
+            exponentials, uniforms = draws.take(n)
+            start_time = self.actual_time
+            count, self.actual_time, status = kernel(
+                state, float(start_time), self.next_switch, max_time, False, True, *tables[running_state],
+                exponentials, uniforms, times_out, states_out)
+            draws.consume(count, status)
+            self.state_time += self.actual_time - start_time
+            recorder.record_block(times_out[:count], states_out[:count])
+            if count:
+                idle_switches = 0
+                # Log progress each million of iteration
+                if (self.actual_iteration + count) // 1000000 > self.actual_iteration // 1000000:
+                    logger.info('Actual state is: %s, actual iteration is: %d, simulation time is %s.',
+                                running_state, self.actual_iteration + count, self.actual_time)
+            self.actual_iteration += count
+            if chunk_size and len(recorder) >= chunk_size:
+                yield recorder.pop_chunk()
+            if status == kernels.NO_REAGENT:
+                logger.info('No reagent left, stopping simulation.')
+                break
+            if status == kernels.NO_PROPENSITY:
+                idle_switches += 1
+                if not self._wait_for_switch(idle_switches):
+                    break
+        self.actual_reagent_quantity = state.tolist()
         self.time_tracker[running_state]['end'].append(self.actual_time)
-        return
\ No newline at end of file
+        recorder.finalize(self.max_time if self.stop_condition == 'time' else self.actual_time)
+        if chunk_size and len(recorder):
+            yield recorder.pop_chunk()
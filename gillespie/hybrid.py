@@ -0,0 +1,199 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Sat Oct 17 21:14:50 2026
+
+@author: lillux
+"""
+import numpy as np
+from gillespie.network import ReactionNetwork
+from gillespie.stochastic_backend import calculate_propensity_subset
+from gillespie.recording import TrajectoryRecorder
+from gillespie.rng import BufferedRandom
+from typing import List
+
+
+class gillespie_hybrid():
+
+    def __init__(self,
+                 reagent_quantity: List[int],
+                 state_change_vectors: List[List[int]],
+                 combinatorics,
+                 max_time: float,
+                 set_fixed_reagents: List = None,
+                 propensity_threshold: float = 100.0,
+                 population_threshold: float = 100.0,
+                 method: str = 'langevin',
+                 epsilon: float = 0.01,
+                 max_step: float = np.inf,
+                 min_step: float = 1e-9,
+                 record_every: int = 1,
+                 record_times: List[float] = None,
+                 rng=None):
+        '''
+        Hybrid simulation class, partitioning the reactions into fast and slow.
+
+        A reaction is fast when its propensity is at least propensity_threshold
+        and every species it changes has at least population_threshold molecules.
+        The partition is updated at every step, so reactions move between
+        the two sets as the populations change.
+        Fast reactions are integrated as a continuous process, with the
+        chemical Langevin equation or with its deterministic (ODE) part,
+        by explicit Euler steps. Slow reactions are simulated exactly: their
+        total propensity is integrated along the steps, and one of them fires
+        when the integral reaches an exponential random target
+        (the step is shortened to land on it).
+        The quantities are clamped at zero after each step, since neither
+        the continuous change nor a slow firing on a continuous species
+        is bounded by the number of molecules.
+        Without fast reactions the method reduces to the direct SSA.
+
+        Parameters
+        ----------
+        reagent_quantity : List[int]
+            The list of number (int) of molecule for each molecular species involved in the reaction
+        state_change_vectors : List[List[int]]
+            The list of list containing the variation of reagent quantity for each chemical reaction.
+            Can be None when combinatorics is a ReactionNetwork.
+        combinatorics : ReactionNetwork or List[Callable[[List[int]], float]]
+            The reactions to simulate. Lambda functions receive non integer
+            quantities for the species changed by fast reactions.
+        max_time : float
+            Maximum simulation time.
+        set_fixed_reagents : List, optional
+            List of indices of reagents to keep fixed throughout the simulation.
+        propensity_threshold : float, optional
+            Minimum propensity of a fast reaction. The default is 100.0.
+        population_threshold : float, optional
+            Minimum number of molecules of the species changed by a fast reaction. The default is 100.0.
+        method : str, optional
+            'langevin' integrates the fast reactions with the chemical Langevin equation,
+            'ode' with the deterministic reaction rate equation. The default is 'langevin'.
+        epsilon : float, optional
+            Maximum relative change, in mean and standard deviation, of a species
+            changed by fast reactions in one step, that sets the step size. The default is 0.01.
+        max_step : float, optional
+            Maximum step size. The default is np.inf.
+        min_step : float, optional
+            Minimum step size, so that the clock always moves forward, also when
+            the step computed from a huge propensity rounds to zero. Slow events
+            closer than min_step are delayed to it. The default is 1e-9.
+        record_every : int, optional
+            Record one step every record_every, plus the last one. Default is 1.
+        record_times : List[float], optional
+            Sorted time points where the state is recorded instead,
+            carrying forward the last value before each point.
+        rng : optional
+            Seed, np.random.Generator or rng.BufferedRandom used for every random draw.
+            The default is None, the legacy global generator.
+
+        Returns
+        -------
+        None.
+
+        '''
+        if state_change_vectors is None and isinstance(combinatorics, ReactionNetwork):
+            state_change_vectors = combinatorics.state_change_vectors
+        if method not in ('langevin', 'ode'):
+            raise ValueError("Invalid method. Choose 'langevin' or 'ode'.")
+        self.initial_reagent_quantity = list(reagent_quantity)
+        self.state_change_vector = np.asarray(state_change_vectors, dtype=np.int64)
+        self.reactions_combinatorics = combinatorics
+        self.set_fixed_reagents = set_fixed_reagents
+        self.propensity_threshold = propensity_threshold
+        self.population_threshold = population_threshold
+        self.method = method
+        self.epsilon = epsilon
+        self.max_time = max_time
+        self.actual_time = 0
+        self.actual_iteration = 0
+        self.n_slow_events = 0
+        self.rng = rng if isinstance(rng, BufferedRandom) else BufferedRandom(rng)
+        recorder = TrajectoryRecorder(reagent_quantity, self.actual_time, every=record_every,
+                                      time_grid=record_times, dtype=float)
+
+        n_reactions, n_species = self.state_change_vector.shape
+        state_change = self.state_change_vector.astype(float)
+        if set_fixed_reagents:
+            state_change[:, set_fixed_reagents] = 0
+        # species changed by each reaction, padded with an extra column
+        # holding np.inf, so that the padding never limits the minimum
+        changed = state_change != 0
+        width = max(1, int(changed.sum(axis=1).max(initial=0)))
+        changed_species = np.full((n_reactions, width), n_species, dtype=np.int64)
+        for reaction, row in enumerate(changed):
+            species = np.flatnonzero(row)
+            changed_species[reaction, :len(species)] = species
+        squared_change = state_change ** 2
+        changes_something = changed.any(axis=1)
+
+        state = np.asarray(reagent_quantity, dtype=float)
+        padded = np.empty(n_species + 1)
+        padded[-1] = np.inf
+        all_reactions = np.arange(n_reactions)
+        # integrated slow propensity still needed before the next slow event
+        target = self.rng.exponential()
+        fast = np.zeros(n_reactions, dtype=bool)
+
+        while self.actual_time < self.max_time:
+            propensity = calculate_propensity_subset(state, combinatorics, all_reactions)
+            padded[:-1] = state
+            fast = ((propensity >= self.propensity_threshold)
+                    & (padded[changed_species].min(axis=1) >= self.population_threshold)
+                    & changes_something)
+            slow_propensity = np.where(fast, 0.0, propensity)
+            slow_total = slow_propensity.sum()
+
+            # step size from the fast reactions, as in tau-leaping
+            step = min(max_step, self.max_time - self.actual_time)
+            if fast.any():
+                fast_propensity = np.where(fast, propensity, 0.0)
+                drift = fast_propensity @ state_change
+                diffusion = fast_propensity @ squared_change
+                # species changed by the fast reactions
+                moved = diffusion > 0
+                bound = self.epsilon * state[moved]
+                with np.errstate(divide='ignore'):
+                    step = min(step,
+                               np.min(bound / np.abs(drift[moved]), initial=np.inf),
+                               np.min(bound ** 2 / diffusion[moved], initial=np.inf))
+            slow_event = False
+            if slow_total > 0 and target / slow_total <= step:
+                step = target / slow_total
+                slow_event = True
+            if not np.isfinite(step):
+                # no reaction can happen anymore
+                break
+            # a zero or subnormal step would stall the clock
+            step = max(step, min(min_step, self.max_time - self.actual_time), 4 * np.spacing(self.actual_time))
+
+            if fast.any():
+                change = drift * step
+                if self.method == 'langevin':
+                    noise = np.sqrt(fast_propensity * step) * self.rng.standard_normal(n_reactions)
+                    change += noise @ state_change
+                state += change
+            self.actual_time += step
+            if slow_event:
+                # choose the slow reaction with the propensities of the step
+                threshold = self.rng.random() * slow_total
+                mu = int(np.searchsorted(np.cumsum(slow_propensity), threshold, side='right'))
+                if mu == n_reactions:
+                    # rounding left the threshold above the sum
+                    mu = int(np.flatnonzero(slow_propensity > 0)[-1])
+                state += state_change[mu]
+                target = self.rng.exponential()
+                self.n_slow_events += 1
+            else:
+                target -= slow_total * step
+            # a continuous species can be below the molecules consumed by a slow firing
+            np.maximum(state, 0.0, out=state)
+            recorder.record(self.actual_time, state)
+            self.actual_iteration += 1
+
+        self.partition = fast
+        self.actual_reagent_quantity = state.tolist()
+        recorder.finalize(self.max_time)
+        self.timestep_list = recorder.times
+        self.molecular_species_history = recorder.states
+        return
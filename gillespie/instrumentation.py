@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Sat Oct 17 22:41:09 2026
+
+@author: lillux
+"""
+import numpy as np
+from time import perf_counter
+from collections.abc import Callable
+
+# phases of an iteration timed by the simulators
+PHASES = ('propensity', 'tau', 'mu', 'leap', 'update', 'record')
+
+
+class Instrumentation:
+
+    def __init__(self,
+                 timing: bool = True,
+                 count_reactions: bool = True,
+                 callback: Callable[[dict], None] = None,
+                 every_events: int = None,
+                 every_seconds: float = None):
+        '''
+        Counters and progress reports of a simulation.
+
+        Pass an instance to the instrumentation argument of gillespie_ssa or
+        gillespie_dynamic. Without it the simulators only pay a None check
+        per phase.
+
+        Parameters
+        ----------
+        timing : bool, optional
+            Accumulate the wall time spent in each phase of the iterations
+            (see PHASES) in phase_time. The default is True.
+        count_reactions : bool, optional
+            Count the firings of each reaction in reaction_counts. The default is True.
+        callback : Callable[[dict], None], optional
+            Called with a progress dict (see progress) every every_events
+            iterations and/or every every_seconds of wall time, and once at the end.
+            The default is None.
+        every_events : int, optional
+            Iterations between two calls of callback. The default is None.
+        every_seconds : float, optional
+            Wall time between two calls of callback. The default is None.
+
+        Returns
+        -------
+        None.
+
+        '''
+        self.timing = timing
+        self.count_reactions = count_reactions
+        self.callback = callback
+        self.every_events = every_events
+        self.every_seconds = every_seconds
+        self.phase_time = dict.fromkeys(PHASES, 0.0)
+        self.reaction_counts = None
+        self.iterations = 0
+        self.wall_time = 0.0
+        self._simulator = None
+
+    def start(self, simulator, n_reactions: int):
+        '''
+        Called by the simulator before its first iteration.
+        '''
+        self._simulator = simulator
+        if self.reaction_counts is None or len(self.reaction_counts) != n_reactions:
+            self.reaction_counts = np.zeros(n_reactions, dtype=np.int64)
+        self._start_wall = perf_counter() - self.wall_time
+        self._last_call_wall = perf_counter()
+        self._last_call_iteration = self.iterations
+
+    def lap(self, phase: str, start: float) -> float:
+        '''
+        Add the time elapsed since start to phase, and return the current time.
+        '''
+        now = perf_counter()
+        self.phase_time[phase] += now - start
+        return now
+
+    def fired(self, mu: int):
+        '''
+        Count one firing of reaction mu.
+        '''
+        if self.count_reactions:
+            self.reaction_counts[mu] += 1
+
+    def fired_many(self, firings):
+        '''
+        Count the firings of a leap, one number for each reaction.
+        '''
+        if self.count_reactions:
+            self.reaction_counts += firings
+
+    def tick(self):
+        '''
+        Called by the simulator at the end of each iteration, calls callback when due.
+        '''
+        self.iterations += 1
+        if self.callback is None:
+            return
+        if self.every_events and self.iterations - self._last_call_iteration >= self.every_events:
+            self._report()
+        elif self.every_seconds and perf_counter() - self._last_call_wall >= self.every_seconds:
+            self._report()
+
+    def stop(self):
+        '''
+        Called by the simulator after its last iteration.
+        '''
+        self.wall_time = perf_counter() - self._start_wall
+        if self.callback is not None:
+            self._report()
+
+    def progress(self) -> dict:
+        '''
+        Return the progress of the simulation.
+
+        The dict holds iteration, time (simulated), wall_time, iterations_per_second,
+        state (the running state of gillespie_dynamic, else None) and, for the
+        simulators with a time limit, fraction_done.
+        '''
+        simulator = self._simulator
+        wall_time = perf_counter() - self._start_wall
+        progress = {'iteration': simulator.actual_iteration,
+                    'time': simulator.actual_time,
+                    'wall_time': wall_time,
+                    'iterations_per_second': self.iterations / wall_time if wall_time > 0 else 0.0,
+                    'state': getattr(simulator, 'running_state', None)}
+        if getattr(simulator, 'stop_condition', None) == 'time':
+            progress['fraction_done'] = min(simulator.actual_time / simulator.max_time, 1.0)
+        elif getattr(simulator, 'max_iteration', None):
+            progress['fraction_done'] = min(simulator.actual_iteration / simulator.max_iteration, 1.0)
+        return progress
+
+    def summary(self) -> dict:
+        '''
+        Return the counters: iterations, wall_time, phase_time, phase_fraction and reaction_counts.
+        '''
+        timed = sum(self.phase_time.values())
+        return {'iterations': self.iterations,
+                'wall_time': self.wall_time,
+                'phase_time': dict(self.phase_time),
+                'phase_fraction': {phase: (spent / timed if timed > 0 else 0.0) for phase, spent in self.phase_time.items()},
+                'reaction_counts': None if self.reaction_counts is None else self.reaction_counts.tolist()}
+
+    def _report(self):
+        self._last_call_wall = perf_counter()
+        self._last_call_iteration = self.iterations
+        self.callback(self.progress())
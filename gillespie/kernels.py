@@ -0,0 +1,238 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 11:20:44 2026
+
+@author: lillux
+"""
+import logging
+import numpy as np
+from importlib.util import find_spec
+
+logger = logging.getLogger(__name__)
+
+# numba itself is only imported when the kernel is compiled, it is slow to import
+NUMBA_AVAILABLE = find_spec('numba') is not None
+_compiled_kernel = None
+
+# status returned by direct_kernel
+BLOCK_DONE = 0
+MAX_TIME = 1
+END_OF_INTERVAL = 2
+NO_PROPENSITY = 3
+ZERO_PROPENSITY = 4
+NO_REAGENT = 5
+
+# largest block of random numbers drawn at once for the kernel
+BLOCK_SIZE = 65536
+
+
+def use_kernel(backend: str, combinatorics, method: str = 'ssa', options: dict = None) -> bool:
+    '''
+    Tell whether a simulator should run the compiled direct_kernel.
+
+    backend='numba' asks for it: it is used when numba is installed, the
+    reactions are ReactionNetwork instances, the method is 'ssa' and none of
+    the per event hooks in options (instrumentation, statistics, events, ...)
+    is set. Otherwise the simulator falls back to its Python implementation.
+    '''
+    from gillespie.network import ReactionNetwork
+    if backend == 'python':
+        return False
+    if backend != 'numba':
+        raise ValueError("Invalid backend. Choose 'python' or 'numba'.")
+    networks = combinatorics.values() if isinstance(combinatorics, dict) else [combinatorics]
+    if not all(isinstance(network, ReactionNetwork) for network in networks):
+        logger.info('The numba backend needs ReactionNetwork reactions, using the Python backend.')
+        return False
+    if method != 'ssa':
+        logger.info("The numba backend only runs method='ssa', using the Python backend.")
+        return False
+    for name, value in (options or {}).items():
+        if value:
+            logger.info('The numba backend does not support %s, using the Python backend.', name)
+            return False
+    if not NUMBA_AVAILABLE:
+        logger.info('numba is not installed, using the Python backend.')
+        return False
+    return True
+
+
+def kernel_tables(network, set_fixed_reagents=None):
+    '''
+    Return the arrays of a ReactionNetwork used by direct_kernel:
+    state change (fixed species zeroed), factor species, factor offsets and scaled rates.
+    '''
+    state_change = network.state_change_matrix.astype(np.int64)
+    if set_fixed_reagents:
+        state_change[:, set_fixed_reagents] = 0
+    return (np.ascontiguousarray(state_change),
+            np.ascontiguousarray(network._factor_species),
+            np.ascontiguousarray(network._factor_offset),
+            np.ascontiguousarray(network._scaled_rates))
+
+
+class KernelDraws:
+
+    def __init__(self, generator, first_block: int = 1024):
+        '''
+        The random numbers of direct_kernel, drawn in blocks and kept across calls.
+
+        The kernel returns at each state switch, often after a few events,
+        so the numbers it did not use are handed to the next call instead of
+        being dropped. The blocks start at first_block numbers and double up
+        to BLOCK_SIZE, so short runs draw little.
+
+        Parameters
+        ----------
+        generator : np.random.Generator or np.random.RandomState
+            The generator, e.g. BufferedRandom.rng.
+        first_block : int, optional
+            Size of the first block. The default is 1024.
+
+        Returns
+        -------
+        None.
+
+        '''
+        self.generator = generator
+        self._block = first_block
+        self._exponentials = np.empty(0)
+        self._uniforms = np.empty(0)
+        self._position = 0
+
+    def take(self, n: int):
+        '''
+        Return at most n pending (exponentials, uniforms), drawing a new block if none is left.
+        '''
+        if self._position == len(self._exponentials):
+            self._exponentials = self.generator.standard_exponential(self._block)
+            self._uniforms = self.generator.random(self._block)
+            self._position = 0
+            self._block = min(2 * self._block, BLOCK_SIZE)
+        end = min(self._position + n, len(self._exponentials))
+        return self._exponentials[self._position:end], self._uniforms[self._position:end]
+
+    def consume(self, count: int, status: int):
+        '''
+        Drop the numbers used by a kernel call that fired count events and returned status.
+        '''
+        # a timestep crossing the end of the interval used one exponential
+        self._position += count + (status == END_OF_INTERVAL)
+
+
+def compiled_kernel():
+    '''
+    Return direct_kernel compiled with numba.njit(cache=True).
+
+    The compilation happens at the first call of the process and is cached
+    on disk, so later processes only load it. Without numba the Python
+    function is returned.
+    '''
+    global _compiled_kernel
+    if _compiled_kernel is None:
+        if NUMBA_AVAILABLE:
+            from numba import njit
+            _compiled_kernel = njit(cache=True)(direct_kernel)
+        else:
+            _compiled_kernel = direct_kernel
+    return _compiled_kernel
+
+
+def direct_kernel(state, time, end_time, max_time, stop_on_zero, stop_on_empty,
+                  state_change, factor_species, factor_offset, scaled_rates,
+                  exponentials, uniforms, times_out, states_out):
+    '''
+    Run direct method steps on a mass-action network, one per random number pair.
+
+    The propensities are evaluated as in ReactionNetwork.propensities, the
+    timestep is exponentials[k] / a0 and the reaction is the first whose
+    cumulative propensity exceeds uniforms[k] * a0, as in calculate_mu.
+    state is updated in place, and the time and state after each event
+    are written in times_out and states_out.
+
+    Parameters
+    ----------
+    state : np.ndarray of int64
+        The number of molecules of each species.
+    time : float
+        The current time.
+    end_time : float
+        End of the current interval (state switch of gillespie_dynamic):
+        if the next event would happen at or after it, the time is set to
+        end_time and the kernel returns END_OF_INTERVAL without firing.
+    max_time : float
+        The kernel returns MAX_TIME after the first event at or after max_time.
+    stop_on_zero : bool
+        Return ZERO_PROPENSITY, before firing, when any propensity is zero (gillespie_ssa semantics).
+    stop_on_empty : bool
+        Return NO_REAGENT, before firing, when the total number of molecules is zero (gillespie_dynamic semantics).
+    state_change, factor_species, factor_offset, scaled_rates : np.ndarray
+        See kernel_tables.
+    exponentials, uniforms : np.ndarray
+        Standard exponential and uniform random numbers, one pair per event.
+    times_out, states_out : np.ndarray
+        Output buffers with at least len(exponentials) rows.
+
+    Returns
+    -------
+    tuple(int, float, int)
+        The number of events, the new time and the status.
+
+    '''
+    n_reactions, width = factor_species.shape
+    n_species = state.shape[0]
+    padded = np.empty(n_species + 1)
+    propensity = np.empty(n_reactions)
+    for k in range(exponentials.shape[0]):
+        total_quantity = 0
+        for species in range(n_species):
+            padded[species] = state[species]
+            total_quantity += state[species]
+        padded[n_species] = 1.0
+        if stop_on_empty and total_quantity <= 0:
+            return k, time, NO_REAGENT
+
+        total = 0.0
+        any_zero = False
+        last_positive = -1
+        for reaction in range(n_reactions):
+            combinations = 1.0
+            for column in range(width):
+                combinations *= padded[factor_species[reaction, column]] - factor_offset[reaction, column]
+            if combinations > 0:
+                value = scaled_rates[reaction] * combinations
+            else:
+                value = 0.0
+            if value == 0.0:
+                any_zero = True
+            else:
+                last_positive = reaction
+            propensity[reaction] = value
+            total += value
+        if stop_on_zero and any_zero:
+            return k, time, ZERO_PROPENSITY
+        if total <= 0:
+            return k, time, NO_PROPENSITY
+
+        tau = exponentials[k] / total
+        if time + tau >= end_time:
+            return k, end_time, END_OF_INTERVAL
+        time += tau
+        threshold = uniforms[k] * total
+        # if rounding keeps the cumulative sum at or below the threshold,
+        # the last reaction with a positive propensity fires, as in sampling.LinearSampler
+        mu = last_positive
+        cumulative = 0.0
+        for reaction in range(n_reactions):
+            cumulative += propensity[reaction]
+            if cumulative > threshold:
+                mu = reaction
+                break
+        for species in range(n_species):
+            state[species] += state_change[mu, species]
+            states_out[k, species] = state[species]
+        times_out[k] = time
+        if time >= max_time:
+            return k + 1, time, MAX_TIME
+    return exponentials.shape[0], time, BLOCK_DONE
@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Sat Oct 17 11:02:17 2026
+
+@author: lillux
+"""
+import numpy as np
+from math import factorial
+from typing import List
+
+
+class ReactionNetwork:
+
+    def __init__(self,
+                 reactants: List[List[int]],
+                 products: List[List[int]],
+                 rate_constants: List[float],
+                 species: List[str] = None):
+        '''
+        Mass-action reaction network described by its stoichiometry.
+
+        The propensity of each reaction follows the combinatorial rules of
+        Gillespie 1976 (see stochastic_backend.calculate_propensity_funct):
+        a reaction consuming n_j molecules of each species S_j has propensity
+            c * prod_j( X_j*(X_j-1)*...*(X_j-n_j+1) / n_j! )
+        These rules are compiled once into factor index and offset arrays, so that all
+        the propensities are evaluated with a few NumPy operations, also for
+        a batch of states.
+
+        Parameters
+        ----------
+        reactants : List[List[int]]
+            Matrix (n_reactions x n_species) with the number of molecules
+            of each species consumed by each reaction.
+        products : List[List[int]]
+            Matrix (n_reactions x n_species) with the number of molecules
+            of each species produced by each reaction.
+        rate_constants : List[float]
+            The rate constant, c, of each reaction.
+        species : List[str], optional
+            The name of each species. The default is None.
+
+        Returns
+        -------
+        None.
+
+        '''
+        self.reactants = np.atleast_2d(np.asarray(reactants, dtype=np.int64))
+        self.products = np.atleast_2d(np.asarray(products, dtype=np.int64))
+        self.rate_constants = np.asarray(rate_constants, dtype=float)
+        self.n_reactions, self.n_species = self.reactants.shape
+        self.species = species
+
+        if self.products.shape != self.reactants.shape:
+            raise ValueError("reactants and products must have the same shape (n_reactions x n_species)")
+        if self.rate_constants.shape != (self.n_reactions,):
+            raise ValueError("rate_constants must have one value for each reaction")
+        if np.any(self.reactants < 0) or np.any(self.products < 0):
+            raise ValueError("reactants and products must be non-negative")
+        if species is not None and len(species) != self.n_species:
+            raise ValueError("species must have one name for each column of the stoichiometry")
+
+        self.state_change_matrix = self.products - self.reactants
+        self.state_change_vectors = self.state_change_matrix.tolist()
+
+        # compile the reactant side into one factor (X_j - k) for each molecule consumed,
+        # padded with a constant 1 stored in an extra column after the last species
+        width = max(1, int(self.reactants.sum(axis=1).max(initial=0)))
+        self._factor_species = np.full((self.n_reactions, width), self.n_species, dtype=np.int64)
+        self._factor_offset = np.zeros((self.n_reactions, width))
+        denominator = np.ones(self.n_reactions)
+        for reaction, row in enumerate(self.reactants):
+            column = 0
+            for species in np.flatnonzero(row):
+                for offset in range(row[species]):
+                    self._factor_species[reaction, column] = species
+                    self._factor_offset[reaction, column] = offset
+                    column += 1
+                denominator[reaction] *= factorial(row[species])
+        self._scaled_rates = self.rate_constants / denominator
+
+    def propensities(self, reag_quant, reactions=None) -> np.ndarray:
+        '''
+        Calculate the propensity of the reactions for one or many states.
+
+        Parameters
+        ----------
+        reag_quant : array_like
+            The number of molecules of each species, with shape (n_species,),
+            or a batch of states with shape (n_states, n_species).
+        reactions : array_like, optional
+            Indices of the reactions to evaluate. The default is None, all the reactions.
+
+        Returns
+        -------
+        np.ndarray
+            The propensities, with shape (n_reactions,) or (n_states, n_reactions).
+
+        '''
+        if reactions is None:
+            species = self._factor_species
+            offset = self._factor_offset
+            rates = self._scaled_rates
+        else:
+            species = self._factor_species[reactions]
+            offset = self._factor_offset[reactions]
+            rates = self._scaled_rates[reactions]
+        quantity = np.asarray(reag_quant, dtype=float)
+        padded = np.empty(quantity.shape[:-1] + (self.n_species + 1,))
+        padded[..., :-1] = quantity
+        padded[..., -1] = 1.0
+        # falling factorial X*(X-1)*...*(X-n+1) of every reactant
+        combinations = (padded[..., species] - offset).prod(axis=-1)
+        return rates * np.maximum(combinations, 0.0)
+
+    def dependency_graph(self, fixed_species=None) -> List[np.ndarray]:
+        '''
+        Build the reaction dependency graph of Gibson and Bruck (2000).
+
+        Reaction k depends on reaction j if j changes the quantity of one of
+        the reactants of k, so that the propensity of k has to be updated
+        each time j happens. Every reaction depends on itself.
+
+        Parameters
+        ----------
+        fixed_species : List[int], optional
+            Indices of the species that are kept fixed, whose changes are ignored.
+            The default is None.
+
+        Returns
+        -------
+        List[np.ndarray]
+            For each reaction j, the sorted indices of the reactions that depend on j.
+
+        '''
+        changed = self.state_change_matrix != 0
+        if fixed_species:
+            changed[:, fixed_species] = False
+        # reactions using each species as reactant
+        used_by = [np.flatnonzero(column) for column in (self.reactants > 0).T]
+        graph = []
+        for reaction, row in enumerate(changed):
+            dependents = [used_by[species] for species in np.flatnonzero(row)]
+            dependents.append([reaction])
+            graph.append(np.unique(np.concatenate(dependents)).astype(np.int64))
+        return graph
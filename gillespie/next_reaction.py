@@ -0,0 +1,224 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Sat Oct 17 12:20:05 2026
+
+@author: lillux
+"""
+import numpy as np
+from gillespie.network import ReactionNetwork
+from gillespie.stochastic_backend import calculate_propensity_subset
+from gillespie.recording import TrajectoryRecorder, recorder_capacity
+from gillespie.rng import BufferedRandom
+from typing import List
+
+
+class IndexedPriorityQueue:
+
+    def __init__(self, keys):
+        '''
+        Binary min-heap over a fixed set of indices, with O(log n) update of the key of any index.
+
+        Parameters
+        ----------
+        keys : array_like
+            The initial key of each index 0..n-1.
+
+        Returns
+        -------
+        None.
+
+        '''
+        self.keys = [float(key) for key in keys]
+        # heap[p] is the index stored at position p, position[i] is the position of index i
+        self.heap = sorted(range(len(self.keys)), key=self.keys.__getitem__)
+        self.position = [0] * len(self.keys)
+        for pos, index in enumerate(self.heap):
+            self.position[index] = pos
+
+    def top(self) -> int:
+        '''
+        Return the index with the smallest key.
+        '''
+        return self.heap[0]
+
+    def update(self, index: int, key: float):
+        '''
+        Change the key of index and restore the heap order.
+        '''
+        old_key = self.keys[index]
+        self.keys[index] = key
+        if key < old_key:
+            self._sift_up(self.position[index])
+        else:
+            self._sift_down(self.position[index])
+
+    def _swap(self, pos_a: int, pos_b: int):
+        heap = self.heap
+        heap[pos_a], heap[pos_b] = heap[pos_b], heap[pos_a]
+        self.position[heap[pos_a]] = pos_a
+        self.position[heap[pos_b]] = pos_b
+
+    def _sift_up(self, pos: int):
+        keys, heap = self.keys, self.heap
+        while pos > 0:
+            parent = (pos - 1) >> 1
+            if keys[heap[pos]] < keys[heap[parent]]:
+                self._swap(pos, parent)
+                pos = parent
+            else:
+                break
+
+    def _sift_down(self, pos: int):
+        keys, heap = self.keys, self.heap
+        size = len(heap)
+        while True:
+            child = 2 * pos + 1
+            if child >= size:
+                break
+            if child + 1 < size and keys[heap[child + 1]] < keys[heap[child]]:
+                child += 1
+            if keys[heap[child]] < keys[heap[pos]]:
+                self._swap(pos, child)
+                pos = child
+            else:
+                break
+
+
+class gillespie_nrm():
+
+    def __init__(self,
+                 reagent_quantity: List[int],
+                 state_change_vectors: List[List[int]],
+                 combinatorics,
+                 max_time: float = None,
+                 max_iteration: int = None,
+                 stop_condition: str = 'time',
+                 set_fixed_reagents: List = None,
+                 record_every: int = 1,
+                 record_times: List[float] = None,
+                 rng=None):
+        '''
+        Next Reaction Method (Gibson and Bruck, 2000) simulation class.
+
+        Each reaction keeps an absolute putative firing time in an indexed
+        priority queue. When a reaction fires, only the propensities of the
+        reactions that depend on it (see ReactionNetwork.dependency_graph)
+        are recomputed, and their firing times are rescaled instead of drawn again.
+        The per-step cost is O(log M) in the number of reactions M, plus the
+        size of the dependency list of the fired reaction.
+
+        Parameters
+        ----------
+        reagent_quantity : List[int]
+            The list of number (int) of molecule for each molecular species involved in the reaction
+        state_change_vectors : List[List[int]]
+            The list of list containing the variation of reagent quantity for each chemical reaction.
+            Can be None when combinatorics is a ReactionNetwork.
+        combinatorics : ReactionNetwork or List[Callable[[List[int]], float]]
+            The ReactionNetwork to simulate.
+            A list of lambda functions is accepted too, but since the species
+            read by a lambda are unknown every propensity is recomputed at each step.
+        max_time : float, optional
+            Maximum simulation time. Required if stop_condition='time'.
+        max_iteration : int, optional
+            Maximum number of iterations. Required if stop_condition='iterations'.
+        stop_condition : str, optional
+            Specify 'time' or 'iterations' as the stopping condition. Default is 'time'.
+        set_fixed_reagents : List, optional
+            List of indices of reagents to keep fixed throughout the simulation.
+        record_every : int, optional
+            Record one iteration every record_every, plus the last one. Default is 1.
+        record_times : List[float], optional
+            Sorted time points where the state is recorded instead,
+            carrying forward the last value before each point.
+        rng : optional
+            Seed, np.random.Generator or rng.BufferedRandom used for every random draw.
+            The default is None, the legacy global generator.
+
+        Returns
+        -------
+        None.
+
+        '''
+        if state_change_vectors is None and isinstance(combinatorics, ReactionNetwork):
+            state_change_vectors = combinatorics.state_change_vectors
+        self.initial_reagent_quantity = list(reagent_quantity)
+        self.state_change_vector = np.asarray(state_change_vectors, dtype=np.int64)
+        self.reactions_combinatorics = combinatorics
+        self.set_fixed_reagents = set_fixed_reagents
+        self.stop_condition = stop_condition
+        self.max_time = max_time
+        self.max_iteration = max_iteration
+        self.actual_time = 0
+        self.actual_iteration = 0
+        self.rng = rng if isinstance(rng, BufferedRandom) else BufferedRandom(rng)
+        capacity = recorder_capacity(max_iteration, record_every)
+        recorder = TrajectoryRecorder(reagent_quantity, self.actual_time, every=record_every,
+                                      time_grid=record_times, capacity=capacity)
+
+        # Validate stop_condition and required parameters
+        if self.stop_condition == 'time':
+            if self.max_time is None:
+                raise ValueError("max_time must be specified when stop_condition is 'time'")
+        elif self.stop_condition == 'iterations':
+            if self.max_iteration is None:
+                raise ValueError("max_iteration must be specified when stop_condition is 'iterations'")
+        else:
+            raise ValueError("Invalid stop_condition. Choose 'time' or 'iterations'.")
+
+        n_reactions = len(self.state_change_vector)
+        if isinstance(combinatorics, ReactionNetwork):
+            self.dependency_graph = combinatorics.dependency_graph(fixed_species=set_fixed_reagents)
+        else:
+            everyone = np.arange(n_reactions)
+            self.dependency_graph = [everyone] * n_reactions
+        state_change = self.state_change_vector.copy()
+        if set_fixed_reagents:
+            state_change[:, set_fixed_reagents] = 0
+
+        state = np.asarray(reagent_quantity, dtype=np.int64)
+        propensity = calculate_propensity_subset(state, combinatorics, np.arange(n_reactions))
+        with np.errstate(divide='ignore'):
+            firing_time = self.rng.standard_exponential(n_reactions) / propensity
+        queue = IndexedPriorityQueue(firing_time)
+        propensity = propensity.tolist()
+
+        if self.stop_condition == 'time':
+            loop_condition = lambda: self.actual_time < self.max_time
+        elif self.stop_condition == 'iterations':
+            loop_condition = lambda: self.actual_iteration < self.max_iteration
+
+        while loop_condition():
+            mu = queue.top()
+            next_time = queue.keys[mu]
+            if next_time == np.inf:
+                # no reaction can happen anymore
+                break
+            self.actual_time = next_time
+
+            state += state_change[mu]
+            recorder.record(self.actual_time, state)
+
+            # update only the reactions that depend on mu
+            dependents = self.dependency_graph[mu]
+            new_propensity = calculate_propensity_subset(state, combinatorics, dependents).tolist()
+            for alpha, a_new in zip(dependents.tolist(), new_propensity):
+                a_old = propensity[alpha]
+                if a_new <= 0:
+                    key = np.inf
+                elif alpha != mu and a_old > 0:
+                    # rescale the remaining waiting time to the new propensity
+                    key = self.actual_time + (a_old / a_new) * (queue.keys[alpha] - self.actual_time)
+                else:
+                    key = self.actual_time + self.rng.exponential() / a_new
+                propensity[alpha] = a_new
+                queue.update(alpha, key)
+
+            self.actual_iteration += 1
+
+        self.actual_reagent_quantity = state.tolist()
+        recorder.finalize(self.max_time if self.stop_condition == 'time' else self.actual_time)
+        self.timestep_list = recorder.times
+        self.molecular_species_history = recorder.states
+        return
@@ -0,0 +1,219 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Sat Oct 17 16:32:10 2026
+
+@author: lillux
+"""
+import numpy as np
+from typing import List
+
+
+def recorder_capacity(max_iteration: int = None, every: int = 1) -> int:
+    '''
+    Initial capacity of a TrajectoryRecorder for a run of at most max_iteration events.
+
+    One row every `every` events, plus the initial and the final state,
+    capped at 1_000_000 rows (the buffers grow by doubling past it).
+    Without max_iteration the default of 1024 rows is returned.
+    '''
+    if max_iteration is None:
+        return 1024
+    if not every:
+        return 2
+    return min(int(max_iteration) // every, 1_000_000) + 2
+
+
+class TrajectoryRecorder:
+
+    def __init__(self,
+                 reagent_quantity: List[int],
+                 start_time: float = 0.0,
+                 every: int = 1,
+                 time_grid: List[float] = None,
+                 capacity: int = 1024,
+                 dtype=np.int64):
+        '''
+        Store a trajectory in preallocated NumPy buffers.
+
+        Three recording policies are available:
+            every = 1           record every event (the default),
+            every = k           record one event every k, plus the last one,
+            every = 0           only record the first and the last state,
+            time_grid = [...]   record the state at each time of the grid,
+                                carrying forward the last value before each point.
+        With every event recorded the buffers grow by doubling, so the
+        amortized cost of a record is O(n_species).
+
+        Parameters
+        ----------
+        reagent_quantity : List[int]
+            The number of molecules of each species at start_time, always recorded
+            (for the time grid, only if the grid starts at start_time).
+        start_time : float, optional
+            The time of the initial state. The default is 0.0.
+        every : int, optional
+            Record one event every `every`, 0 for none. The default is 1.
+        time_grid : List[float], optional
+            Sorted times where the state is sampled. If given, `every` is ignored.
+        capacity : int, optional
+            Initial number of rows of the buffers. The default is 1024.
+        dtype : optional
+            Type of the recorded quantities. The default is np.int64.
+
+        Returns
+        -------
+        None.
+
+        '''
+        self.every = every
+        self.n_species = len(reagent_quantity)
+        self._size = 0
+        # rows already handed over by pop_chunk, only used with a time grid
+        self._popped = 0
+        self._events = 0
+        # copy of the last state seen, the caller may update its state in place
+        self._last_state = np.array(reagent_quantity, dtype=dtype)
+        if time_grid is not None:
+            self.time_grid = np.asarray(time_grid, dtype=float)
+            self._times = self.time_grid.copy()
+            self._states = np.empty((len(self.time_grid), self.n_species), dtype=dtype)
+            self._next_point = self.time_grid[0] if len(self.time_grid) else np.inf
+            self._fill_until(start_time, inclusive=True)
+        else:
+            self.time_grid = None
+            if every == 0:
+                capacity = 2
+            self._times = np.empty(max(capacity, 1))
+            self._states = np.empty((max(capacity, 1), self.n_species), dtype=dtype)
+            self._append(start_time, reagent_quantity)
+            self._last_recorded = True
+
+    @property
+    def times(self) -> np.ndarray:
+        '''
+        The recorded times, float64 array of shape (n_records,).
+        '''
+        return self._times[self._popped:self._size]
+
+    @property
+    def states(self) -> np.ndarray:
+        '''
+        The recorded states, array of shape (n_records, n_species).
+        '''
+        return self._states[self._popped:self._size]
+
+    def __len__(self) -> int:
+        return self._size - self._popped
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        if self.time_grid is None:
+            # only the rows in use, the buffers grow again by doubling,
+            # so the checkpoint of a streamed run only holds the unflushed rows
+            state['_times'] = self._times[:max(self._size, 1)].copy()
+            state['_states'] = self._states[:max(self._size, 1)].copy()
+        return state
+
+    def pop_chunk(self):
+        '''
+        Return the rows recorded since the last call, as copies, and drop them from the buffers.
+        '''
+        times, states = self.times.copy(), self.states.copy()
+        if self.time_grid is not None:
+            self._popped = self._size
+        else:
+            self._size = 0
+        return times, states
+
+    def record(self, time: float, reagent_quantity: List[int]):
+        '''
+        Record the state reached by an event that happened at time.
+        '''
+        if self.time_grid is not None:
+            if time > self._next_point:
+                self._fill_until(time, inclusive=False)
+            self._last_state[:] = reagent_quantity
+            return
+        self._events += 1
+        if self.every and self._events % self.every == 0:
+            self._append(time, reagent_quantity)
+            self._last_recorded = True
+        else:
+            self._last_time = time
+            self._last_state[:] = reagent_quantity
+            self._last_recorded = False
+
+    def record_block(self, times: np.ndarray, states: np.ndarray):
+        '''
+        Record many consecutive events at once, same result as calling record on each row.
+        '''
+        n = len(times)
+        if n == 0:
+            return
+        if self.time_grid is not None:
+            end = np.searchsorted(self.time_grid, times[-1], side='left')
+            if end > self._size:
+                # each point takes the last event at or before it
+                index = np.searchsorted(times, self.time_grid[self._size:end], side='right') - 1
+                filled = states[np.maximum(index, 0)]
+                filled[index < 0] = self._last_state
+                self._states[self._size:end] = filled
+                self._size = end
+                self._next_point = self.time_grid[end] if end < len(self.time_grid) else np.inf
+            self._last_state[:] = states[-1]
+            return
+        if self.every:
+            selected = np.arange(self.every - 1 - self._events % self.every, n, self.every)
+        else:
+            selected = np.arange(0)
+        self._events += n
+        while self._size + len(selected) > len(self._times):
+            self._grow()
+        self._times[self._size:self._size + len(selected)] = times[selected]
+        self._states[self._size:self._size + len(selected)] = states[selected]
+        self._size += len(selected)
+        self._last_recorded = len(selected) > 0 and selected[-1] == n - 1
+        if not self._last_recorded:
+            self._last_time = times[-1]
+            self._last_state[:] = states[-1]
+
+    def finalize(self, time: float):
+        '''
+        Close the trajectory at the end of the simulation.
+
+        With every > 1 the last event is recorded if it was skipped.
+        With a time grid, the points up to time hold the final state,
+        use time=np.inf when nothing can change after the last event.
+        '''
+        if self.time_grid is not None:
+            self._fill_until(time, inclusive=True)
+        elif not self._last_recorded:
+            self._append(self._last_time, self._last_state)
+            self._last_recorded = True
+
+    def _append(self, time: float, reagent_quantity: List[int]):
+        if self._size == len(self._times):
+            self._grow()
+        self._times[self._size] = time
+        self._states[self._size] = reagent_quantity
+        self._size += 1
+
+    def _grow(self):
+        capacity = 2 * len(self._times)
+        times = np.empty(capacity)
+        times[:self._size] = self._times[:self._size]
+        states = np.empty((capacity, self.n_species), dtype=self._states.dtype)
+        states[:self._size] = self._states[:self._size]
+        self._times, self._states = times, states
+
+    def _fill_until(self, time: float, inclusive: bool):
+        '''
+        Fill the grid points before time (or up to time, if inclusive) with the last state.
+        '''
+        side = 'right' if inclusive else 'left'
+        end = np.searchsorted(self.time_grid, time, side=side)
+        if end > self._size:
+            self._states[self._size:end] = self._last_state
+            self._size = end
+        self._next_point = self.time_grid[self._size] if self._size < len(self.time_grid) else np.inf
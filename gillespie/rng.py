@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Sat Oct 17 18:30:04 2026
+
+@author: lillux
+"""
+import numpy as np
+from typing import List
+
+
+def make_rng(rng=None):
+    '''
+    Return a random number generator from a seed or a generator.
+
+    Parameters
+    ----------
+    rng : None, int, np.random.SeedSequence, np.random.Generator or np.random.RandomState, optional
+        None returns the legacy global generator (the np.random module), so
+        that a run seeded with np.random.seed is reproducible. A seed or a
+        SeedSequence returns a new np.random.Generator. Generators are returned as they are.
+
+    Returns
+    -------
+    The generator. All the accepted types provide random, standard_exponential,
+    poisson and binomial.
+
+    '''
+    if rng is None:
+        return np.random.mtrand._rand
+    if isinstance(rng, BufferedRandom):
+        return rng.rng
+    if isinstance(rng, (np.random.Generator, np.random.RandomState)):
+        return rng
+    return np.random.default_rng(rng)
+
+
+def spawn_rngs(seed, n: int) -> List[np.random.Generator]:
+    '''
+    Create n independent generators from one seed, with SeedSequence.spawn.
+
+    The streams only depend on the seed and on their position, so a parallel
+    ensemble is reproducible whatever the number of workers.
+    '''
+    if not isinstance(seed, np.random.SeedSequence):
+        seed = np.random.SeedSequence(seed)
+    return [np.random.default_rng(child) for child in seed.spawn(n)]
+
+
+class BufferedRandom:
+
+    def __init__(self, rng=None, block_size: int = 4096):
+        '''
+        Scalar random numbers served from blocks drawn in advance.
+
+        The simulators need two scalars per event, one uniform and one
+        exponential. Drawing them one at a time goes through the whole NumPy
+        call machinery for each number; here they are drawn block_size at a
+        time and handed out from a Python list, refilled when exhausted.
+        Any other method (poisson, binomial, ...) is passed to the underlying generator.
+
+        Over the legacy global generator (rng=None) this changes the stream:
+        a run seeded with np.random.seed is still reproducible, but it draws
+        different numbers than the unbuffered versions of the simulators, and
+        it consumes whole blocks of the global stream, so the numbers drawn
+        from np.random after a simulation are not the ones that followed its
+        last event. Pass a seed or a generator to keep the streams separate.
+
+        Parameters
+        ----------
+        rng : optional
+            Seed or generator, see make_rng. The default is None, the legacy global generator.
+        block_size : int, optional
+            Numbers drawn at each refill. The default is 4096.
+
+        Returns
+        -------
+        None.
+
+        '''
+        self.rng = make_rng(rng)
+        self.block_size = block_size
+        self._uniform = []
+        self._uniform_position = 0
+        self._exponential = []
+        self._exponential_position = 0
+
+    def random(self) -> float:
+        '''
+        Return a uniform number in [0, 1).
+        '''
+        if self._uniform_position == len(self._uniform):
+            self._uniform = self.rng.random(self.block_size).tolist()
+            self._uniform_position = 0
+        value = self._uniform[self._uniform_position]
+        self._uniform_position += 1
+        return value
+
+    def exponential(self) -> float:
+        '''
+        Return a standard exponential number (rate 1).
+        '''
+        if self._exponential_position == len(self._exponential):
+            self._exponential = self.rng.standard_exponential(self.block_size).tolist()
+            self._exponential_position = 0
+        value = self._exponential[self._exponential_position]
+        self._exponential_position += 1
+        return value
+
+    def __getattr__(self, name):
+        # only called for missing attributes, rng itself is missing while unpickling
+        if name == 'rng':
+            raise AttributeError(name)
+        return getattr(self.rng, name)
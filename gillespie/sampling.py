@@ -0,0 +1,323 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Sat Oct 17 13:41:50 2026
+
+@author: lillux
+"""
+from math import frexp, ldexp
+from gillespie.network import ReactionNetwork
+from gillespie.rng import BufferedRandom
+from gillespie.stochastic_backend import calculate_propensity_funct, calculate_propensity_subset
+
+
+class LinearSampler:
+
+    def __init__(self, propensities, rng=None):
+        '''
+        Reaction selection with a linear scan, as in stochastic_backend.calculate_mu.
+
+        Parameters
+        ----------
+        propensities : array_like
+            The initial propensity of each reaction.
+        rng : optional
+            A generator providing random(), like rng.BufferedRandom.
+            The default is None, a BufferedRandom over the legacy global generator.
+
+        Returns
+        -------
+        None.
+
+        '''
+        self.rng = rng if rng is not None else BufferedRandom()
+        self.propensities = [float(value) for value in propensities]
+        self.total = sum(self.propensities)
+        self._updates = 0
+
+    def update(self, index: int, value: float):
+        '''
+        Set the propensity of reaction index to value.
+        '''
+        old_value = self.propensities[index]
+        self.total += value - old_value
+        self.propensities[index] = value
+        self._updates += 1
+        # resum from time to time, so that rounding errors do not accumulate,
+        # and after a cancellation, so that the total is exactly 0.0 when no reaction can happen
+        if self._updates % 1024 == 0 or self.total <= 1e-9 * old_value:
+            self.total = sum(self.propensities)
+
+    def sample(self) -> int:
+        '''
+        Draw the index of the next reaction, with probability proportional to its propensity.
+        '''
+        threshold = self.rng.random() * self.total
+        progressive_sum = 0
+        last_positive = None
+        for index, value in enumerate(self.propensities):
+            if value > 0:
+                last_positive = index
+            progressive_sum += value
+            if progressive_sum > threshold:
+                return index
+        if last_positive is None:
+            raise ValueError("no reaction has a positive propensity")
+        # rounding errors can leave the threshold just above the sum
+        return last_positive
+
+
+class SumTreeSampler:
+
+    def __init__(self, propensities, rng=None):
+        '''
+        Reaction selection with a binary sum tree, O(log M) for both update and selection.
+
+        The leaves hold the propensities and every internal node holds the sum
+        of its two children, so the root is the cumulative propensity.
+        Each update recomputes the sums on the path to the root from the children,
+        so the tree never drifts from its leaves.
+
+        Parameters
+        ----------
+        propensities : array_like
+            The initial propensity of each reaction.
+        rng : optional
+            A generator providing random(), like rng.BufferedRandom.
+            The default is None, a BufferedRandom over the legacy global generator.
+
+        Returns
+        -------
+        None.
+
+        '''
+        self.rng = rng if rng is not None else BufferedRandom()
+        size = len(propensities)
+        self._size = size
+        self._leaves = 1
+        while self._leaves < size:
+            self._leaves *= 2
+        self._tree = [0.0] * (2 * self._leaves)
+        self._tree[self._leaves:self._leaves + size] = [float(value) for value in propensities]
+        for node in range(self._leaves - 1, 0, -1):
+            self._tree[node] = self._tree[2 * node] + self._tree[2 * node + 1]
+
+    @property
+    def total(self) -> float:
+        return self._tree[1]
+
+    @property
+    def propensities(self) -> list:
+        return self._tree[self._leaves:self._leaves + self._size]
+
+    def update(self, index: int, value: float):
+        '''
+        Set the propensity of reaction index to value.
+        '''
+        tree = self._tree
+        node = self._leaves + index
+        tree[node] = float(value)
+        node >>= 1
+        while node:
+            tree[node] = tree[2 * node] + tree[2 * node + 1]
+            node >>= 1
+
+    def sample(self) -> int:
+        '''
+        Draw the index of the next reaction, with probability proportional to its propensity.
+        '''
+        tree = self._tree
+        threshold = self.rng.random() * tree[1]
+        node = 1
+        while node < self._leaves:
+            left = tree[2 * node]
+            if threshold < left or tree[2 * node + 1] <= 0:
+                node = 2 * node
+            else:
+                threshold -= left
+                node = 2 * node + 1
+        return node - self._leaves
+
+
+class CompositionRejectionSampler:
+
+    def __init__(self, propensities, rng=None):
+        '''
+        Composition-rejection reaction selection (Slepoy, Thompson and Plimpton, 2008).
+
+        Reactions are grouped by the power of two bounding their propensity,
+        so that in group e every propensity lies in [2**(e-1), 2**e).
+        A group is chosen with a linear scan over the groups, whose number
+        only depends on the range of the propensities, then a reaction is
+        drawn uniformly inside the group and accepted with probability
+        propensity / 2**e, which is at least 1/2.
+        Both update and selection take O(1) expected time.
+
+        Parameters
+        ----------
+        propensities : array_like
+            The initial propensity of each reaction.
+        rng : optional
+            A generator providing random(), like rng.BufferedRandom.
+            The default is None, a BufferedRandom over the legacy global generator.
+
+        Returns
+        -------
+        None.
+
+        '''
+        self.rng = rng if rng is not None else BufferedRandom()
+        self.propensities = [0.0] * len(propensities)
+        self._group_of = [None] * len(propensities)
+        self._slot = [0] * len(propensities)
+        # exponent -> [members, sum of their propensities]
+        self._groups = {}
+        self.total = 0.0
+        self._updates = 0
+        for index, value in enumerate(propensities):
+            self.update(index, float(value))
+
+    def update(self, index: int, value: float):
+        '''
+        Set the propensity of reaction index to value.
+        '''
+        old_value = self.propensities[index]
+        old_group = self._group_of[index]
+        new_group = frexp(value)[1] if value > 0 else None
+        if old_group == new_group:
+            if new_group is not None:
+                self._groups[new_group][1] += value - old_value
+        else:
+            if old_group is not None:
+                self._remove(index, old_group, old_value)
+            if new_group is not None:
+                group = self._groups.setdefault(new_group, [[], 0.0])
+                self._slot[index] = len(group[0])
+                group[0].append(index)
+                group[1] += value
+            self._group_of[index] = new_group
+        self.propensities[index] = value
+        self.total += value - old_value if self._groups else -self.total
+        self._updates += 1
+        # resum from time to time, so that rounding errors do not accumulate
+        if self._updates % 1024 == 0:
+            for group in self._groups.values():
+                group[1] = sum(self.propensities[member] for member in group[0])
+            self.total = sum(group[1] for group in self._groups.values())
+
+    def _remove(self, index: int, exponent: int, value: float):
+        members, _ = group = self._groups[exponent]
+        # move the last member in the slot of the removed one
+        last = members.pop()
+        if last != index:
+            members[self._slot[index]] = last
+            self._slot[last] = self._slot[index]
+        if members:
+            group[1] -= value
+        else:
+            del self._groups[exponent]
+
+    def sample(self) -> int:
+        '''
+        Draw the index of the next reaction, with probability proportional to its propensity.
+        '''
+        threshold = self.rng.random() * self.total
+        for exponent, (members, group_sum) in self._groups.items():
+            if threshold < group_sum:
+                break
+            threshold -= group_sum
+        bound = ldexp(1.0, exponent)
+        size = len(members)
+        while True:
+            index = members[int(self.rng.random() * size)]
+            if self.rng.random() * bound < self.propensities[index]:
+                return index
+
+
+SAMPLERS = {'linear': LinearSampler,
+            'tree': SumTreeSampler,
+            'composition_rejection': CompositionRejectionSampler}
+
+
+def make_sampler(name: str, propensities, rng=None):
+    '''
+    Build the reaction sampler called name ('linear', 'tree' or 'composition_rejection'), drawing from rng.
+    '''
+    if name not in SAMPLERS:
+        raise ValueError(f"Invalid sampler. Choose one of {list(SAMPLERS)}.")
+    return SAMPLERS[name](propensities, rng=rng)
+
+
+class PropensityTracker:
+
+    def __init__(self, combinatorics, reagent_quantity, sampler: str = 'tree', rng=None, fixed_species=None):
+        '''
+        The propensities of a reaction table, kept in sync with a reaction sampler.
+
+        After an event only the reactions that depend on the fired one are
+        recomputed (see ReactionNetwork.dependency_graph; every reaction for
+        lambda functions), and only the values that changed are pushed into
+        the sampler, so neither the selection nor the cumulative propensity
+        scan the whole table.
+
+        Parameters
+        ----------
+        combinatorics : ReactionNetwork or list
+            The reactions, see stochastic_backend.calculate_propensity_funct.
+        reagent_quantity : List[int]
+            The current number of molecules of each species.
+        sampler : str, optional
+            The sampling structure, see make_sampler. The default is 'tree'.
+        rng : optional
+            A generator providing random(), like rng.BufferedRandom. The default is None.
+        fixed_species : List[int], optional
+            Indices of the species kept fixed, whose changes are ignored. The default is None.
+
+        Returns
+        -------
+        None.
+
+        '''
+        self.combinatorics = combinatorics
+        if isinstance(combinatorics, ReactionNetwork):
+            self.dependency_graph = combinatorics.dependency_graph(fixed_species=fixed_species)
+        else:
+            self.dependency_graph = None
+        # the propensity of each reaction, exposed as a list for the events and the tau-leaper
+        self.values = [float(value) for value in calculate_propensity_funct(reagent_quantity, combinatorics)]
+        self._everyone = list(range(len(self.values)))
+        self.n_zero = sum(value == 0 for value in self.values)
+        self.sampler = make_sampler(sampler, self.values, rng=rng)
+
+    @property
+    def total(self) -> float:
+        '''
+        The cumulative propensity.
+        '''
+        return self.sampler.total
+
+    def sample(self) -> int:
+        '''
+        Draw the index of the next reaction.
+        '''
+        return self.sampler.sample()
+
+    def refresh(self, reagent_quantity, fired: int = None):
+        '''
+        Update the propensities after reaction fired, or all of them when fired is None.
+        '''
+        reactions = self.dependency_graph[fired] if fired is not None and self.dependency_graph is not None else None
+        if reactions is None or 2 * len(reactions) >= len(self.values):
+            # on small tables one call over every reaction is cheaper than indexing the dependents
+            reactions = self._everyone
+            new_values = calculate_propensity_funct(reagent_quantity, self.combinatorics)
+        else:
+            reactions = reactions.tolist()
+            new_values = calculate_propensity_subset(reagent_quantity, self.combinatorics, reactions).tolist()
+        values = self.values
+        for index, value in zip(reactions, new_values):
+            old_value = values[index]
+            if value != old_value:
+                self.n_zero += (value == 0) - (old_value == 0)
+                values[index] = value
+                self.sampler.update(index, value)
@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Sat Oct 17 20:31:17 2026
+
+@author: lillux
+"""
+import numpy as np
+from typing import Dict, List, Tuple
+
+
+class RegimeSchedule:
+
+    def __init__(self, states: List[str], durations: List[float], cyclic: bool = True):
+        '''
+        Time based sequence of states (regimes) for gillespie_dynamic.
+
+        The states are run in the given order, each one for its duration,
+        starting at time 0. A cyclic schedule starts again from the first
+        state after the last one, otherwise the last state lasts forever.
+        A state can appear more than once in the sequence.
+
+        Parameters
+        ----------
+        states : List[str]
+            The sequence of states, keys of the combinatorics dict of gillespie_dynamic.
+        durations : List[float]
+            The duration of each element of states. Must be > 0.
+            Only the last one of a non cyclic schedule can be np.inf.
+        cyclic : bool, optional
+            Repeat the sequence forever. The default is True.
+
+        Returns
+        -------
+        None.
+
+        '''
+        if len(states) == 0 or len(states) != len(durations):
+            raise ValueError("states and durations must be non empty and have the same length")
+        durations = [float(duration) for duration in durations]
+        if any(duration <= 0 for duration in durations):
+            raise ValueError("durations must be > 0")
+        if any(np.isinf(duration) for duration in durations[:-1]) or (cyclic and np.isinf(durations[-1])):
+            raise ValueError("only the last duration of a non cyclic schedule can be infinite")
+        self.states = list(states)
+        self.durations = durations
+        self.cyclic = cyclic
+        # end time of each element in the first pass of the sequence
+        self.ends = np.cumsum(durations)
+
+    @classmethod
+    def piecewise(cls, states: List[str], switch_times: List[float]):
+        '''
+        Non cyclic schedule where states[i + 1] starts at switch_times[i].
+
+        The last state lasts forever.
+        '''
+        if len(switch_times) != len(states) - 1:
+            raise ValueError("switch_times must have one element less than states")
+        starts = [0.0] + [float(switch) for switch in switch_times]
+        durations = np.diff(starts).tolist() + [np.inf]
+        return cls(states, durations, cyclic=False)
+
+    @classmethod
+    def constant(cls, state: str):
+        '''
+        Schedule that never leaves state.
+        '''
+        return cls([state], [np.inf], cyclic=False)
+
+    @classmethod
+    def from_intervals(cls, oscillation_interval: Dict[str, float], start_with: str):
+        '''
+        Cyclic schedule from the oscillation_interval dict of gillespie_dynamic.
+
+        The cycle starts with start_with and follows the order of the dict.
+        '''
+        order = list(oscillation_interval)
+        first = order.index(start_with)
+        states = order[first:] + order[:first]
+        return cls(states, [oscillation_interval[state] for state in states], cyclic=True)
+
+    def locate(self, time: float) -> Tuple[int, float]:
+        '''
+        Return the position in the sequence of the state running at time, and the time it ends.
+        '''
+        offset = 0.0
+        if self.cyclic:
+            period = self.ends[-1]
+            offset = np.floor(time / period) * period
+            time = time - offset
+        index = int(np.searchsorted(self.ends, time, side='right'))
+        if index == len(self.states):
+            # only reached by rounding in a cyclic schedule
+            index, offset = 0, offset + self.ends[-1]
+        return index, offset + self.ends[index]
+
+    def next(self, index: int, end: float) -> Tuple[int, float]:
+        '''
+        Return the position in the sequence and the end time of the state that follows the one at index, ending at end.
+        '''
+        index += 1
+        if index == len(self.states):
+            if not self.cyclic:
+                return len(self.states) - 1, np.inf
+            index = 0
+        return index, end + self.durations[index]
+
+    def state(self, index: int) -> str:
+        '''
+        Return the state at position index of the sequence.
+        '''
+        return self.states[index]
@@ -0,0 +1,268 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Sat Oct 17 23:12:27 2026
+
+@author: lillux
+"""
+import numpy as np
+from typing import List
+
+
+class TimeWeightedStats:
+
+    def __init__(self,
+                 n_species: int,
+                 n_reactions: int = None,
+                 burn_in: float = 0.0,
+                 covariance: bool = False,
+                 histogram_bins: int = None,
+                 histogram_range: tuple = None,
+                 block_size: int = 4096):
+        '''
+        Streaming time-weighted statistics of a trajectory.
+
+        Each state is weighted by the time it is held, as for the
+        time average of a piecewise constant trajectory. The events are buffered
+        and merged in blocks of block_size with the pairwise update of
+        Chan, Golub and LeVeque, so the cost per event is O(n_species)
+        (O(n_species^2) with covariance) and no trajectory is stored.
+        Two accumulators of independent replicates can be combined with merge.
+
+        Pass an instance to the statistics argument of gillespie_ssa or
+        gillespie_dynamic, possibly with record_every=0 to not keep the trajectory.
+
+        Parameters
+        ----------
+        n_species : int
+            Number of species.
+        n_reactions : int, optional
+            Number of reactions, to count their firings. The default is None, no counts.
+        burn_in : float, optional
+            Time before which the trajectory is ignored. The default is 0.0.
+        covariance : bool, optional
+            Also accumulate the covariance matrix of the species. The default is False.
+        histogram_bins : int, optional
+            Number of bins of the occupancy histogram of each species, the time
+            spent in each bin of counts. The default is None, no histogram.
+        histogram_range : tuple, optional
+            (low, high) edges of the histogram, values outside are counted in
+            the first or last bin. Required with histogram_bins.
+        block_size : int, optional
+            Number of events buffered before each update. The default is 4096.
+
+        Returns
+        -------
+        None.
+
+        '''
+        self.n_species = n_species
+        self.burn_in = burn_in
+        self.block_size = block_size
+        self.total_time = 0.0
+        self._mean = np.zeros(n_species)
+        self._m2 = np.zeros(n_species)
+        self._comoment = np.zeros((n_species, n_species)) if covariance else None
+        self.min = np.full(n_species, np.inf)
+        self.max = np.full(n_species, -np.inf)
+        self.reaction_counts = np.zeros(n_reactions, dtype=np.int64) if n_reactions is not None else None
+        if histogram_bins is not None:
+            if histogram_range is None:
+                raise ValueError("histogram_range must be given with histogram_bins")
+            self.histogram_edges = np.linspace(histogram_range[0], histogram_range[1], histogram_bins + 1)
+            self.histogram = np.zeros((n_species, histogram_bins))
+        else:
+            self.histogram_edges = None
+            self.histogram = None
+
+        # the flushes keep one event, so the buffers hold at least two
+        self._times = np.empty(max(block_size, 2))
+        self._states = np.empty((max(block_size, 2), n_species))
+        self._size = 0
+        # the state reached at _last_time, held until the next event
+        self._last_time = None
+        self._last_state = np.zeros(n_species)
+
+    def start(self, time: float, reagent_quantity: List[int]):
+        '''
+        Set the initial state, at the start time of the simulation.
+        '''
+        self._last_time = time
+        self._last_state[:] = reagent_quantity
+
+    def record(self, time: float, reagent_quantity: List[int]):
+        '''
+        Add the state reached by an event that happened at time.
+        '''
+        self._times[self._size] = time
+        self._states[self._size] = reagent_quantity
+        self._size += 1
+        if self._size == len(self._times):
+            self._flush()
+
+    def fired(self, mu: int, time: float):
+        '''
+        Count one firing of reaction mu at time, if after the burn-in.
+        '''
+        if self.reaction_counts is not None and time >= self.burn_in:
+            self.reaction_counts[mu] += 1
+
+    def fired_many(self, firings, time: float):
+        '''
+        Count the firings of a leap ending at time, one number for each reaction.
+        '''
+        if self.reaction_counts is not None and time >= self.burn_in:
+            self.reaction_counts += firings
+
+    def finalize(self, time: float):
+        '''
+        Close the trajectory: the last state is held until time.
+        '''
+        self._flush(end_time=time)
+
+    @property
+    def mean(self) -> np.ndarray:
+        '''
+        The time-weighted mean of each species.
+        '''
+        return self._mean.copy() if self.total_time > 0 else np.full(self.n_species, np.nan)
+
+    @property
+    def variance(self) -> np.ndarray:
+        '''
+        The time-weighted variance of each species.
+        '''
+        return self._m2 / self.total_time if self.total_time > 0 else np.full(self.n_species, np.nan)
+
+    @property
+    def std(self) -> np.ndarray:
+        '''
+        The time-weighted standard deviation of each species.
+        '''
+        return np.sqrt(self.variance)
+
+    @property
+    def covariance(self) -> np.ndarray:
+        '''
+        The time-weighted covariance matrix, if accumulated.
+        '''
+        if self._comoment is None:
+            return None
+        return self._comoment / self.total_time if self.total_time > 0 else np.full_like(self._comoment, np.nan)
+
+    @property
+    def occupancy(self) -> np.ndarray:
+        '''
+        The histogram normalized to the fraction of time spent in each bin, if accumulated.
+        '''
+        if self.histogram is None:
+            return None
+        return self.histogram / self.total_time if self.total_time > 0 else self.histogram.copy()
+
+    def merge(self, other):
+        '''
+        Add the statistics of other, an accumulator of another trajectory, to these.
+
+        Both accumulators must be finalized. Returns self.
+        '''
+        self._combine(other.total_time, other._mean, other._m2, other._comoment)
+        self.min = np.minimum(self.min, other.min)
+        self.max = np.maximum(self.max, other.max)
+        if self.histogram is not None:
+            self.histogram += other.histogram
+        if self.reaction_counts is not None:
+            self.reaction_counts += other.reaction_counts
+        return self
+
+    def summary(self) -> dict:
+        '''
+        Return the statistics as a dict of lists.
+        '''
+        summary = {'total_time': self.total_time,
+                   'mean': self.mean.tolist(),
+                   'variance': self.variance.tolist(),
+                   'min': self.min.tolist(),
+                   'max': self.max.tolist()}
+        if self._comoment is not None:
+            summary['covariance'] = self.covariance.tolist()
+        if self.histogram is not None:
+            summary['histogram_edges'] = self.histogram_edges.tolist()
+            summary['occupancy'] = self.occupancy.tolist()
+        if self.reaction_counts is not None:
+            summary['reaction_counts'] = self.reaction_counts.tolist()
+        return summary
+
+    def _flush(self, end_time: float = None):
+        '''
+        Merge the buffered events into the statistics.
+        '''
+        if self._last_time is None:
+            raise RuntimeError("start must be called before recording")
+        if end_time is None:
+            # the last event stays buffered: it can be after the end time given
+            # to finalize, then the interval ending at it must be clipped
+            size = self._size - 1
+            if size <= 0:
+                return
+        else:
+            size = self._size
+        # state k is held from starts[k] to ends[k]
+        starts = np.empty(size + 1)
+        starts[0] = self._last_time
+        starts[1:] = self._times[:size]
+        states = np.empty((size + 1, self.n_species))
+        states[0] = self._last_state
+        states[1:] = self._states[:size]
+        if end_time is None:
+            # the holding time of the last state is still unknown
+            starts, states = starts[:-1], states[:-1]
+            ends = self._times[:size].copy()
+        else:
+            # no interval goes beyond end_time, those starting after it weigh 0
+            ends = np.minimum(np.append(self._times[:size], end_time), end_time)
+        weights = ends - np.maximum(starts, self.burn_in)
+        np.maximum(weights, 0.0, out=weights)
+
+        if size:
+            self._last_time = self._times[size - 1]
+            self._last_state[:] = self._states[size - 1]
+        if end_time is None:
+            self._times[0] = self._times[size]
+            self._states[0] = self._states[size]
+            self._size = 1
+        else:
+            self._size = 0
+            self._last_time = max(end_time, starts[-1])
+
+        held = weights > 0
+        block_time = weights.sum()
+        if block_time <= 0:
+            return
+        states, weights = states[held], weights[held]
+        block_mean = weights @ states / block_time
+        deviation = states - block_mean
+        block_m2 = weights @ (deviation ** 2)
+        block_comoment = (deviation.T * weights) @ deviation if self._comoment is not None else None
+        self._combine(block_time, block_mean, block_m2, block_comoment)
+        self.min = np.minimum(self.min, states.min(axis=0))
+        self.max = np.maximum(self.max, states.max(axis=0))
+        if self.histogram is not None:
+            n_bins = self.histogram.shape[1]
+            bins = np.clip(np.searchsorted(self.histogram_edges, states, side='right') - 1, 0, n_bins - 1)
+            for species in range(self.n_species):
+                self.histogram[species] += np.bincount(bins[:, species], weights=weights, minlength=n_bins)
+
+    def _combine(self, time_b: float, mean_b, m2_b, comoment_b):
+        '''
+        Pairwise update of the moments (Chan, Golub and LeVeque, 1979).
+        '''
+        if time_b <= 0:
+            return
+        time_a = self.total_time
+        total = time_a + time_b
+        delta = mean_b - self._mean
+        self._mean = self._mean + delta * (time_b / total)
+        self._m2 = self._m2 + m2_b + delta ** 2 * (time_a * time_b / total)
+        if self._comoment is not None:
+            self._comoment = self._comoment + comoment_b + np.outer(delta, delta) * (time_a * time_b / total)
+        self.total_time = total
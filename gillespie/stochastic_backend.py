@@ -1,4 +1,5 @@
 import numpy as np
+from gillespie.network import ReactionNetwork
 
 
 def calculate_propensity_funct(reag_quant:list, combinatorics:list) -> list:
@@ -11,9 +12,10 @@ def calculate_propensity_funct(reag_quant:list, combinatorics:list) -> list:
         Define the number of molecules for each reagent.
         If we have reagent [a, b, c], each of wich is present in the system with 10 molecules,
         our reag_quant = [10,10,10]
-    combinatorics : list
+    combinatorics : list or ReactionNetwork
         Define the combinatorial function for each reaction's reagent.
-        Use a list of lambda functions to describe the combinatorial rules.
+        Use a list of lambda functions to describe the combinatorial rules,
+        or a ReactionNetwork, whose propensities are compiled from the stoichiometry.
         A description of the combinatorial rules to be used here is found at
         page 11, equations 14a - 14g, of the 1976 paper from Daniel T. Gillespie:
             A General Method for Numerically Simulating 
@@ -37,13 +39,15 @@ def calculate_propensity_funct(reag_quant:list, combinatorics:list) -> list:
         Return the propensity for each reaction to happen at the current time point.
 
     '''
+    if isinstance(combinatorics, ReactionNetwork):
+        return combinatorics.propensities(reag_quant).tolist()
     propensity_list = []
     for funct in combinatorics:
         prop = funct(*reag_quant)
         propensity_list.append(prop)
     return propensity_list
 
-def calculate_tau(cumulative_propensity:float) -> float:
+def calculate_tau(cumulative_propensity:float, rng=None) -> float:
     '''
     Calculate the length of the next timestep.
 
@@ -51,6 +55,9 @@ def calculate_tau(cumulative_propensity:float) -> float:
     ----------
     cumulative_propensity : float
         The sum of the propensity of each reaction to happen.
+    rng : optional
+        A generator providing exponential(), like rng.BufferedRandom.
+        If None, the legacy global generator is used.
 
     Returns
     -------
@@ -58,11 +65,13 @@ def calculate_tau(cumulative_propensity:float) -> float:
         A float that define when the next reaction will happen in the system.
 
     '''
+    if rng is not None:
+        return rng.exponential()/cumulative_propensity
     r1 = np.random.uniform(0,1)
     tau = (1/cumulative_propensity)*(np.log(1/r1))
     return tau
 
-def calculate_mu(propensity_list:list, cumulative_propensity:float) -> int:
+def calculate_mu(propensity_list:list, cumulative_propensity:float, rng=None) -> int:
     '''
     Calculate wich reaction will happen next
 
@@ -72,6 +81,9 @@ def calculate_mu(propensity_list:list, cumulative_propensity:float) -> int:
         The propensity of each reaction to happen.
     cumulative_propensity : float
         The sum of the propensity of each reaction, that is the sum of the parameter propensity_list.
+    rng : optional
+        A generator providing random(), like rng.BufferedRandom.
+        If None, the legacy global generator is used.
 
     Returns
     -------
@@ -79,7 +91,7 @@ def calculate_mu(propensity_list:list, cumulative_propensity:float) -> int:
         The index of the next reaction.
 
     '''
-    r2 = np.random.uniform(0,1)
+    r2 = rng.random() if rng is not None else np.random.uniform(0,1)
     propensity_progressive_sum = 0
     threshold = r2*cumulative_propensity
     for index, reaction_propensity in enumerate(propensity_list):
@@ -87,4 +99,61 @@ def calculate_mu(propensity_list:list, cumulative_propensity:float) -> int:
         if propensity_progressive_sum > threshold:
             return index
         else:
-            pass
\ No newline at end of file
+            pass
+
+
+def calculate_propensity_array(reag_quant:np.ndarray, combinatorics:list) -> np.ndarray:
+    '''
+    Calculate the propensity of each reaction for a batch of states at once.
+
+    Parameters
+    ----------
+    reag_quant : np.ndarray
+        2D array of shape (n_states, n_species), one row for each state.
+    combinatorics : list or ReactionNetwork
+        The same combinatorics used by calculate_propensity_funct.
+        Each function is called once, with one array (a column of reag_quant)
+        for each species, so it must be written with operations that
+        broadcast over NumPy arrays (arithmetic is fine, `if` and `max` are not).
+
+    Returns
+    -------
+    np.ndarray
+        2D array of shape (n_states, n_reactions) with the propensity of
+        each reaction for each state.
+
+    '''
+    if isinstance(combinatorics, ReactionNetwork):
+        return combinatorics.propensities(reag_quant)
+    reag_quant = np.asarray(reag_quant, dtype=float)
+    n_states = reag_quant.shape[0]
+    columns = reag_quant.T
+    propensity_array = np.empty((n_states, len(combinatorics)))
+    for index, funct in enumerate(combinatorics):
+        # functions that do not depend on the species return a scalar
+        propensity_array[:, index] = np.broadcast_to(funct(*columns), (n_states,))
+    return propensity_array
+
+def calculate_propensity_subset(reag_quant:np.ndarray, combinatorics, reactions:np.ndarray) -> np.ndarray:
+    '''
+    Calculate the propensity of a subset of the reactions.
+
+    Parameters
+    ----------
+    reag_quant : np.ndarray
+        The number of molecules for each reagent.
+    combinatorics : list or ReactionNetwork
+        The same combinatorics used by calculate_propensity_funct.
+    reactions : np.ndarray
+        Indices of the reactions to evaluate.
+
+    Returns
+    -------
+    np.ndarray
+        The propensity of each selected reaction, in the order of reactions.
+
+    '''
+    if isinstance(combinatorics, ReactionNetwork):
+        return combinatorics.propensities(reag_quant, reactions)
+    reag_quant = np.asarray(reag_quant).tolist()
+    return np.array([combinatorics[index](*reag_quant) for index in reactions], dtype=float)
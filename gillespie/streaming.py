@@ -0,0 +1,178 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Sat Oct 17 17:45:22 2026
+
+@author: lillux
+"""
+import os
+import struct
+import numpy as np
+
+# largest possible number of rows, used to size the .npy header once
+_MAX_ROWS = 2**63 - 1
+
+
+class NpyAppender:
+
+    def __init__(self, path: str, dtype, row_shape: tuple = (), n_rows: int = None):
+        '''
+        A .npy file that grows along its first axis.
+
+        The header is written with a fixed size, large enough for any number
+        of rows, and rewritten after each append, so that the file is always
+        a valid .npy array that can be opened with np.load(path, mmap_mode='r'),
+        also while the simulation is still writing it.
+
+        Parameters
+        ----------
+        path : str
+            Path of the .npy file, created or truncated.
+        dtype : numpy dtype
+            Type of the elements.
+        row_shape : tuple, optional
+            Shape of each row. The default is (), a 1D array.
+        n_rows : int, optional
+            Continue an existing file written by NpyAppender, keeping its
+            first n_rows rows and dropping the others. The default is None,
+            create a new file.
+
+        Returns
+        -------
+        None.
+
+        '''
+        self.path = path
+        self.dtype = np.dtype(dtype)
+        self.row_shape = tuple(row_shape)
+        self.n_rows = 0
+        self._header_size = len(self._header(_MAX_ROWS))
+        if n_rows is None:
+            self._file = open(path, 'wb+')
+        else:
+            self._file = open(path, 'rb+')
+            self._truncate(n_rows)
+        self._write_header()
+
+    def _truncate(self, n_rows: int):
+        '''
+        Check the header of the existing file and cut it to n_rows rows.
+        '''
+        np.lib.format.read_magic(self._file)
+        shape, fortran_order, dtype = np.lib.format.read_array_header_1_0(self._file)
+        if (self._file.tell() != self._header_size or fortran_order
+                or dtype != self.dtype or shape[1:] != self.row_shape):
+            raise ValueError(f"{self.path} was not written by NpyAppender with dtype {self.dtype} and row shape {self.row_shape}")
+        if n_rows > shape[0]:
+            raise ValueError(f"{self.path} has {shape[0]} rows, cannot keep {n_rows}")
+        self.n_rows = n_rows
+        self._file.truncate(self._header_size + n_rows * self.dtype.itemsize * int(np.prod(self.row_shape)))
+
+    def _header(self, n_rows: int, size: int = None) -> bytes:
+        '''
+        Build the .npy version 1.0 header for n_rows rows, padded to size bytes
+        (by default, to the next multiple of 64).
+        '''
+        header = {'descr': np.lib.format.dtype_to_descr(self.dtype),
+                  'fortran_order': False,
+                  'shape': (n_rows,) + self.row_shape}
+        text = repr(header).encode('latin1')
+        # magic string, version and header length take 10 bytes
+        if size is None:
+            size = -(-(10 + len(text) + 1) // 64) * 64
+        text += b' ' * (size - 10 - len(text) - 1) + b'\n'
+        return np.lib.format.magic(1, 0) + struct.pack('<H', len(text)) + text
+
+    def _write_header(self):
+        self._file.seek(0)
+        self._file.write(self._header(self.n_rows, self._header_size))
+
+    def append(self, rows: np.ndarray):
+        '''
+        Append rows, an array of shape (n,) + row_shape, to the file.
+        '''
+        rows = np.ascontiguousarray(rows, dtype=self.dtype)
+        if rows.shape[1:] != self.row_shape:
+            raise ValueError(f"rows must have shape (n,) + {self.row_shape}, got {rows.shape}")
+        self._file.seek(0, os.SEEK_END)
+        self._file.write(rows.tobytes())
+        self.n_rows += len(rows)
+        self._write_header()
+        self._file.flush()
+
+    def close(self):
+        self._file.close()
+
+
+class TrajectoryWriter:
+
+    def __init__(self, directory: str, n_species: int, dtype=np.int64, n_rows: int = None):
+        '''
+        Append a trajectory to disk, chunk by chunk.
+
+        The directory holds two growing .npy files: times.npy (float64, shape (n,))
+        and states.npy (shape (n, n_species)). Use load_trajectory to read them.
+
+        Parameters
+        ----------
+        directory : str
+            Output directory, created if missing. Existing files are overwritten, unless n_rows is given.
+        n_species : int
+            Number of species of each state.
+        dtype : numpy dtype, optional
+            Type of the recorded quantities. The default is np.int64.
+        n_rows : int, optional
+            Continue the trajectory already in directory, keeping its first n_rows
+            rows, e.g. the rows_streamed of a simulation resumed from a checkpoint.
+            The default is None, start a new trajectory.
+
+        Returns
+        -------
+        None.
+
+        '''
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self._times = NpyAppender(os.path.join(directory, 'times.npy'), np.float64, n_rows=n_rows)
+        self._states = NpyAppender(os.path.join(directory, 'states.npy'), dtype, (n_species,), n_rows=n_rows)
+
+    def write(self, times: np.ndarray, states: np.ndarray):
+        '''
+        Append a chunk of times and states.
+        '''
+        self._states.append(states)
+        self._times.append(times)
+
+    def close(self):
+        self._times.close()
+        self._states.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def load_trajectory(directory: str, mmap_mode: str = 'r'):
+    '''
+    Open a trajectory written by TrajectoryWriter.
+
+    Parameters
+    ----------
+    directory : str
+        The directory of the trajectory.
+    mmap_mode : str, optional
+        Passed to np.load. The default is 'r', memory-mapped read-only.
+
+    Returns
+    -------
+    tuple(np.ndarray, np.ndarray)
+        The times and the states. While a simulation is still writing,
+        the two arrays can differ by the last chunk, so both are cut to the shorter one.
+
+    '''
+    times = np.load(os.path.join(directory, 'times.npy'), mmap_mode=mmap_mode)
+    states = np.load(os.path.join(directory, 'states.npy'), mmap_mode=mmap_mode)
+    n_rows = min(len(times), len(states))
+    return times[:n_rows], states[:n_rows]
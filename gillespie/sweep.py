@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Sat Oct 17 19:52:41 2026
+
+@author: lillux
+"""
+import os
+import json
+import hashlib
+import itertools
+import numpy as np
+from joblib import Parallel, delayed
+from gillespie.evolution import _evolve_shard
+
+# columns of the sweep table, after the swept parameters
+_TABLE_FIELDS = [('epochs', np.int64),
+                 ('rescued', np.int64),
+                 ('extinct', np.int64),
+                 ('rescue_probability', float),
+                 ('mean_generations_rescued', float),
+                 ('mean_generations_extinct', float)]
+
+
+def _json_value(value):
+    '''
+    Convert the NumPy scalars of a grid built with NumPy for json.dumps.
+    '''
+    if isinstance(value, np.generic):
+        return value.item()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def _point_key(point: dict, epochs: int, seed, chunk_size: int) -> str:
+    '''
+    Return the cache key of a grid point, a hash of everything its result depends on.
+    '''
+    import gillespie
+    description = {'params': {name: point[name] for name in sorted(point)},
+                   'epochs': epochs,
+                   'seed': seed,
+                   'chunk_size': chunk_size,
+                   'version': gillespie.__version__}
+    return hashlib.sha1(json.dumps(description, sort_keys=True, default=_json_value).encode()).hexdigest()
+
+
+def _point_seeds(key: str, seed, n_chunks: int) -> list:
+    '''
+    Spawn the chunk streams of a grid point.
+
+    The stream of a point depends on the seed and on the point itself, not on
+    its position in the grid, so extending the grid leaves the old points unchanged.
+    '''
+    point_entropy = [int(key[i:i + 8], 16) for i in range(0, len(key), 8)]
+    return np.random.SeedSequence([seed, *point_entropy]).spawn(n_chunks)
+
+
+def _summarize_chunk(n: int, params: dict, chunk_seed) -> dict:
+    '''
+    Evolve a chunk of epochs and reduce it to counts and sums.
+    '''
+    result = _evolve_shard(n, params, chunk_seed)
+    saved, extinct, generations = result['saved'], result['extinct'], result['generations']
+    return {'epochs': n,
+            'rescued': int(saved.sum()),
+            'extinct': int(extinct.sum()),
+            'generations_rescued': int(generations[saved].sum()),
+            'generations_extinct': int(generations[extinct].sum())}
+
+
+def rescue_sweep(params: dict,
+                 grid: dict,
+                 epochs: int,
+                 seed: int = 0,
+                 cache_dir: str = None,
+                 ncore: int = -1,
+                 chunk_size: int = 100_000) -> np.ndarray:
+    '''
+    Estimate the rescue probability of the EvoSim model over a grid of parameters.
+
+    Every (grid point, chunk of epochs) pair is a work item, and all of them
+    are scheduled in a single joblib call, so that the worker pool is started
+    once and stays busy across the points. Each chunk is evolved as arrays
+    (see evolution.VectorSim) and reduced to counts before being sent back.
+
+    With cache_dir, the result of each point is stored in a small JSON file
+    named after a hash of its parameters, epochs, seed, chunk_size and of the
+    package version. Points already in the cache are not computed again, so
+    refining a grid only runs the new points.
+
+    Parameters
+    ----------
+    params : dict
+        The EvoSim parameters (wt, sv, r, s, u, max_gen) shared by all the points.
+    grid : dict
+        Values of the swept parameters, e.g. {'r': [0.1, 0.2], 's': [0.3, 0.5]}.
+        The points are the Cartesian product of the lists, and override params.
+    epochs : int
+        Number of replicates of each point.
+    seed : int, optional
+        Seed of the sweep. The default is 0. None draws fresh entropy,
+        so the results are new and never read from the cache.
+    cache_dir : str, optional
+        Directory of the on-disk cache, created if missing. The default is None, no cache.
+    ncore : int, optional
+        Number of joblib workers. The default is -1, all the cores.
+    chunk_size : int, optional
+        Number of epochs of each work item. The default is 100_000.
+
+    Returns
+    -------
+    np.ndarray
+        A structured array with one row per point, holding the swept parameters
+        followed by epochs, rescued, extinct, rescue_probability,
+        mean_generations_rescued and mean_generations_extinct.
+
+    '''
+    if seed is None:
+        seed = np.random.SeedSequence().entropy
+    names = list(grid)
+    points = [dict(params, **dict(zip(names, values))) for values in itertools.product(*(grid[name] for name in names))]
+    sizes = [min(chunk_size, epochs - start) for start in range(0, epochs, chunk_size)]
+    keys = [_point_key(point, epochs, seed, chunk_size) for point in points]
+    if cache_dir is not None:
+        os.makedirs(cache_dir, exist_ok=True)
+
+    summaries = [None] * len(points)
+    work = []
+    for index, (point, key) in enumerate(zip(points, keys)):
+        cache_path = os.path.join(cache_dir, key + '.json') if cache_dir is not None else None
+        if cache_path is not None and os.path.exists(cache_path):
+            with open(cache_path) as f:
+                summaries[index] = json.load(f)
+            continue
+        for size, chunk_seed in zip(sizes, _point_seeds(key, seed, len(sizes))):
+            work.append((index, size, point, chunk_seed))
+
+    chunk_results = Parallel(n_jobs=ncore)(
+        delayed(_summarize_chunk)(size, point, chunk_seed) for _, size, point, chunk_seed in work
+    )
+
+    # merge the chunks of each computed point
+    for (index, _, _, _), chunk in zip(work, chunk_results):
+        if summaries[index] is None:
+            summaries[index] = dict.fromkeys(chunk, 0)
+        for field, value in chunk.items():
+            summaries[index][field] += value
+    if cache_dir is not None:
+        for index in sorted({item[0] for item in work}):
+            with open(os.path.join(cache_dir, keys[index] + '.json'), 'w') as f:
+                json.dump(summaries[index], f)
+
+    dtype = [(name, np.asarray(grid[name]).dtype) for name in names] + _TABLE_FIELDS
+    table = np.zeros(len(points), dtype=dtype)
+    for row, (point, summary) in enumerate(zip(points, summaries)):
+        for name in names:
+            table[name][row] = point[name]
+        table['epochs'][row] = summary['epochs']
+        table['rescued'][row] = summary['rescued']
+        table['extinct'][row] = summary['extinct']
+        table['rescue_probability'][row] = summary['rescued'] / summary['epochs']
+        with np.errstate(divide='ignore', invalid='ignore'):
+            table['mean_generations_rescued'][row] = np.divide(summary['generations_rescued'], summary['rescued'])
+            table['mean_generations_extinct'][row] = np.divide(summary['generations_extinct'], summary['extinct'])
+    return table
@@ -0,0 +1,178 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Sat Oct 17 15:08:46 2026
+
+@author: lillux
+"""
+import numpy as np
+from gillespie.network import ReactionNetwork
+from gillespie.rng import BufferedRandom
+from typing import List
+
+
+class TauLeaper:
+
+    def __init__(self,
+                 state_change_vectors: List[List[int]],
+                 combinatorics=None,
+                 epsilon: float = 0.03,
+                 n_critical: int = 10,
+                 n_exact_steps: int = 100,
+                 set_fixed_reagents: List = None,
+                 rng=None):
+        '''
+        Adaptive tau-leaping step of Cao, Gillespie and Petzold (2006).
+
+        Each leap fires a Poisson number of events of every non-critical reaction,
+        with the leap size chosen so that the expected relative change of every
+        reactant stays below epsilon. Critical reactions, the ones that could
+        exhaust one of their reactants in a few firings, fire at most once per leap.
+        When the leap would be shorter than a few exact steps, the caller is asked
+        to take n_exact_steps exact SSA steps instead.
+
+        Parameters
+        ----------
+        state_change_vectors : List[List[int]]
+            The list of list containing the variation of reagent quantity for each chemical reaction.
+        combinatorics : ReactionNetwork, optional
+            When a ReactionNetwork is given its reactant stoichiometry is used
+            to compute the reaction orders, otherwise the reactants of each
+            reaction are taken from the negative entries of state_change_vectors.
+            The default is None.
+        epsilon : float, optional
+            The error control parameter. The default is 0.03.
+        n_critical : int, optional
+            A reaction is critical when it can fire less than n_critical times
+            before exhausting one of its reactants. The default is 10.
+        n_exact_steps : int, optional
+            Number of exact SSA steps to take when leaping is not worth it. The default is 100.
+        set_fixed_reagents : List, optional
+            List of indices of reagents kept fixed by the simulator, that are ignored here.
+        rng : optional
+            A generator like rng.BufferedRandom, shared with the simulator.
+            The default is None, a BufferedRandom over the legacy global generator.
+
+        Returns
+        -------
+        None.
+
+        '''
+        self.epsilon = epsilon
+        self.n_critical = n_critical
+        self.n_exact_steps = n_exact_steps
+        self.rng = rng if rng is not None else BufferedRandom()
+        # number of exact SSA steps still to take before the next leap
+        self.exact_steps = 0
+
+        self.state_change = np.array(state_change_vectors, dtype=np.int64)
+        if isinstance(combinatorics, ReactionNetwork):
+            reactants = combinatorics.reactants.copy()
+        else:
+            reactants = np.maximum(-self.state_change, 0)
+        if set_fixed_reagents:
+            self.state_change[:, set_fixed_reagents] = 0
+            reactants[:, set_fixed_reagents] = 0
+        self._consumed = np.where(self.state_change < 0, -self.state_change, 0)
+        self._squared_change = self.state_change ** 2
+
+        # highest order reaction of each species, and the molecules of that
+        # species it needs, used to compute g_i (Cao et al. 2006, eq. 27)
+        order = reactants.sum(axis=1)
+        self._highest_order = np.zeros(reactants.shape[1], dtype=np.int64)
+        self._highest_need = np.zeros(reactants.shape[1], dtype=np.int64)
+        for species in range(reactants.shape[1]):
+            using = reactants[:, species] > 0
+            if using.any():
+                self._highest_order[species] = order[using].max()
+                top = using & (order == self._highest_order[species])
+                self._highest_need[species] = reactants[top, species].max()
+        self._reactant_species = np.flatnonzero(self._highest_order > 0)
+
+    def _g(self, quantity: np.ndarray) -> np.ndarray:
+        '''
+        Calculate g_i for the reactant species.
+        '''
+        hor = self._highest_order[self._reactant_species]
+        need = self._highest_need[self._reactant_species]
+        x = quantity[self._reactant_species]
+        g = hor.astype(float)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            two = 2 + 1 / (x - 1)
+            three = 3 + 1 / (x - 1) + 2 / (x - 2)
+        g = np.where((hor == 2) & (need == 2), two, g)
+        g = np.where((hor == 3) & (need == 2), 1.5 * two, g)
+        g = np.where((hor == 3) & (need == 3), three, g)
+        # the corrections above are undefined for tiny populations
+        return np.where(np.isfinite(g) & (g > 0), g, hor)
+
+    def leap(self, reag_quant, propensity_list, cumulative_propensity: float, max_tau: float = np.inf):
+        '''
+        Try one leap from the given state.
+
+        Parameters
+        ----------
+        reag_quant : List[int]
+            The current number of molecules of each species.
+        propensity_list : List[float]
+            The current propensity of each reaction.
+        cumulative_propensity : float
+            The sum of propensity_list.
+        max_tau : float, optional
+            The leap is truncated to this length, for example to stop exactly at the end time.
+
+        Returns
+        -------
+        tuple(float, List[int]) or None
+            The leap length and the change of the number of molecules of each species,
+            or None when the caller has to take exact SSA steps instead (see exact_steps).
+
+        '''
+        quantity = np.asarray(reag_quant, dtype=float)
+        propensity = np.asarray(propensity_list, dtype=float)
+
+        # maximum number of firings before a reactant is exhausted
+        with np.errstate(divide='ignore'):
+            limit = np.min(np.where(self._consumed > 0, np.floor(quantity / np.maximum(self._consumed, 1)), np.inf), axis=1)
+        critical = (propensity > 0) & (limit < self.n_critical)
+        noncritical_propensity = np.where(critical, 0.0, propensity)
+
+        # largest leap keeping the expected relative change of each reactant below epsilon
+        mean_change = noncritical_propensity @ self.state_change[:, self._reactant_species]
+        variance_change = noncritical_propensity @ self._squared_change[:, self._reactant_species]
+        bound = np.maximum(self.epsilon * quantity[self._reactant_species] / self._g(quantity), 1.0)
+        with np.errstate(divide='ignore'):
+            tau_noncritical = min(np.min(bound / np.abs(mean_change), initial=np.inf),
+                                  np.min(bound ** 2 / variance_change, initial=np.inf))
+
+        if not np.isfinite(tau_noncritical) or tau_noncritical < 10 / cumulative_propensity:
+            # this step and the next n_exact_steps - 1 are exact
+            self.exact_steps = self.n_exact_steps - 1
+            return None
+
+        critical_propensity = propensity[critical].sum()
+
+        while True:
+            # drawn again at each retry, the rejected leap conditions the old value
+            tau_critical = self.rng.exponential() / critical_propensity if critical_propensity > 0 else np.inf
+            firings = np.zeros(len(propensity), dtype=np.int64)
+            if tau_noncritical < tau_critical:
+                tau = tau_noncritical
+            else:
+                tau = tau_critical
+                # exactly one critical reaction fires
+                threshold = self.rng.random() * critical_propensity
+                critical_index = np.flatnonzero(critical)
+                chosen = np.searchsorted(np.cumsum(propensity[critical_index]), threshold, side='right')
+                firings[critical_index[min(chosen, len(critical_index) - 1)]] = 1
+            if tau > max_tau:
+                tau = max_tau
+                firings[:] = 0
+            firings += self.rng.poisson(noncritical_propensity * tau)
+            change = firings @ self.state_change
+            if np.all(quantity + change >= 0):
+                # firings of each reaction in the accepted leap, for the counters
+                self.last_firings = firings
+                return tau, change.tolist()
+            # a population went negative, retry with half the leap
+            tau_noncritical /= 2
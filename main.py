@@ -3,5 +3,8 @@ Created on Sat Jan  7 15:49:28 2023
 
 @author: lillo
 """
+from gillespie.cli import main
+
 if __name__ == '__main__':
-    print('done')
\ No newline at end of file
+    # same as the gillespie-run command
+    main()
\ No newline at end of file
@@ -11,6 +11,9 @@ setup(name = 'gillespie',
      install_requires=['numpy>=1.18.1',
                        'matplotlib',
                        'joblib'],
+     extras_require={'numba': ['numba'],
+                     'toml': ['tomli; python_version < "3.11"']},
+     entry_points={'console_scripts': ['gillespie-run = gillespie.cli:main']},
                        
       classifiers=[
           'Development Status :: 3 - Alpha',
@@ -0,0 +1,64 @@
+import numpy as np
+import pytest
+from gillespie.aggregate import EnsembleAggregator, aggregate, resample
+
+TIMES = np.array([0.0, 1.0, 2.5, 4.0])
+STATES = np.array([[0, 9], [1, 8], [2, 7], [3, 6]])
+
+
+def test_resample_on_event_times():
+    # a grid point on an event time takes the state reached at that event
+    grid = np.array([0.0, 1.0, 2.5, 4.0])
+    assert np.array_equal(resample(TIMES, STATES, grid), STATES)
+    grid = np.array([-1.0, 0.5, 1.0, 2.4999, 2.5, 10.0])
+    assert np.array_equal(resample(TIMES, STATES, grid)[:, 0], [0, 0, 1, 1, 2, 3])
+
+
+def test_resample_repeated_event_times():
+    # several events at the same time, the last one wins
+    times = np.array([0.0, 1.0, 1.0, 2.0])
+    states = np.array([[0], [1], [2], [3]])
+    assert np.array_equal(resample(times, states, np.array([1.0, 1.5, 2.0]))[:, 0], [2, 2, 3])
+
+
+def random_trajectories(n, seed=0):
+    rng = np.random.default_rng(seed)
+    for _ in range(n):
+        times = np.concatenate([[0.0], np.cumsum(rng.exponential(0.5, 30))])
+        states = rng.poisson(20, size=(31, 2))
+        yield times, states
+
+
+def test_moments_and_exact_quantiles():
+    grid = np.linspace(0, 10, 21)
+    trajectories = list(random_trajectories(200))
+    values = np.stack([resample(times, states, grid) for times, states in trajectories])
+    summary = aggregate(trajectories, grid, quantiles=(0.1, 0.5, 0.9))
+    assert summary['n_replicates'] == 200
+    assert np.allclose(summary['mean'], values.mean(axis=0))
+    assert np.allclose(summary['variance'], values.var(axis=0, ddof=1))
+    assert np.allclose(summary['quantiles'][0.5], np.quantile(values, 0.5, axis=0))
+
+
+def test_binned_quantiles_in_fixed_memory():
+    grid = np.linspace(0, 10, 21)
+    bins = np.arange(-0.5, 60)
+    exact = EnsembleAggregator(grid, quantiles=(0.0, 0.1, 0.5, 0.9, 1.0))
+    binned = EnsembleAggregator(grid, quantiles=(0.0, 0.1, 0.5, 0.9, 1.0), bins=bins)
+    for count, (times, states) in enumerate(random_trajectories(500, seed=1)):
+        exact.add(times, states)
+        binned.add(times, states)
+        if count == 10:
+            size = binned._counts.nbytes
+    assert binned._values is None and binned._counts.nbytes == size
+    exact_bands, binned_bands = exact.quantile_bands(), binned.quantile_bands()
+    for quantile in exact.quantiles:
+        assert np.all(np.abs(binned_bands[quantile] - exact_bands[quantile]) <= 1.0)
+    assert np.allclose(binned.mean, exact.mean)
+
+
+def test_quantiles_not_requested():
+    aggregator = EnsembleAggregator([0.0, 1.0])
+    aggregator.add(TIMES, STATES)
+    with pytest.raises(ValueError):
+        aggregator.quantile_bands()
@@ -0,0 +1,77 @@
+import itertools
+import os
+import pickle
+import numpy as np
+import pytest
+from gillespie.checkpoint import Checkpointer, load_checkpoint
+from gillespie.events import Threshold
+from gillespie.gillespie_dynamic import gillespie_dynamic
+from gillespie.network import ReactionNetwork
+from gillespie.schedule import RegimeSchedule
+from gillespie.statistics import TimeWeightedStats
+from gillespie.streaming import TrajectoryWriter, load_trajectory
+
+NETWORKS = {'a': ReactionNetwork([[0, 0], [1, 0], [1, 1]], [[1, 0], [0, 0], [0, 2]], [50.0, 1.0, 0.001]),
+            'b': ReactionNetwork([[0, 0], [1, 0]], [[1, 0], [0, 0]], [150.0, 1.0])}
+
+
+def make_simulation(checkpoint, method, **options):
+    return gillespie_dynamic([5, 3], None, NETWORKS, max_time=60, schedule=RegimeSchedule(['a', 'b'], [1.3, 0.7]),
+                             rng=7, run=False, checkpoint=checkpoint, method=method,
+                             statistics=TimeWeightedStats(2), events=[Threshold(0, 120, name='high')], **options)
+
+
+@pytest.mark.parametrize('method', ['ssa', 'tau_leaping'])
+def test_resume_is_bit_identical(tmp_path, method):
+    reference = make_simulation(Checkpointer(str(tmp_path / 'reference.ckpt'), every_events=500), method)
+    with TrajectoryWriter(str(tmp_path / 'reference'), 2) as writer:
+        reference.write_chunks(writer, chunk_size=300)
+
+    path = str(tmp_path / 'run.ckpt')
+    crashed = make_simulation(Checkpointer(path, every_events=500), method)
+    with TrajectoryWriter(str(tmp_path / 'run'), 2) as writer:
+        # stop consuming after a few chunks, as if the process was killed
+        for times, states in itertools.islice(crashed.iter_chunks(300), 7):
+            writer.write(times, states)
+    resumed = gillespie_dynamic.resume(path, checkpoint=Checkpointer(path, every_events=500), run=False)
+    assert 0 < resumed.actual_iteration < reference.actual_iteration
+    with TrajectoryWriter(str(tmp_path / 'run'), 2, n_rows=resumed.rows_streamed) as writer:
+        resumed.write_chunks(writer, chunk_size=300)
+
+    reference_times, reference_states = load_trajectory(str(tmp_path / 'reference'))
+    times, states = load_trajectory(str(tmp_path / 'run'))
+    assert np.array_equal(times, reference_times)
+    assert np.array_equal(states, reference_states)
+    assert resumed.actual_iteration == reference.actual_iteration
+    assert resumed.time_tracker == reference.time_tracker
+    assert np.array_equal(resumed.statistics.mean, reference.statistics.mean)
+    assert resumed.events.first_passage == reference.events.first_passage
+
+
+def test_in_memory_resume(tmp_path):
+    path = str(tmp_path / 'run.ckpt')
+    reference = make_simulation(Checkpointer(path, every_events=700), 'ssa')
+    reference.run()
+    resumed = gillespie_dynamic.resume(path)
+    assert np.array_equal(resumed.timestep_list, reference.timestep_list)
+    assert np.array_equal(resumed.molecular_species_history, reference.molecular_species_history)
+
+
+def test_streamed_checkpoint_stays_small(tmp_path):
+    path = str(tmp_path / 'run.ckpt')
+    sizes = []
+
+    class SizeCheckpointer(Checkpointer):
+        def save(self, snapshot, iteration):
+            super().save(snapshot, iteration)
+            sizes.append(os.path.getsize(self.path))
+
+    # max_iteration preallocates a large recorder, which must not be saved
+    sim = gillespie_dynamic([5, 3], None, NETWORKS, max_iteration=20_000, stop_condition='iterations',
+                            rng=1, run=False, checkpoint=SizeCheckpointer(path, every_events=2000))
+    with TrajectoryWriter(str(tmp_path / 'run'), 2) as writer:
+        sim.write_chunks(writer, chunk_size=1000)
+    assert len(sizes) == 10
+    # the written rows are not saved again, the size does not grow with the run
+    assert max(sizes) - min(sizes) < 1_000
+    assert len(pickle.dumps(load_checkpoint(path)['recorder'])) < 2_000
@@ -0,0 +1,92 @@
+import numpy as np
+import pytest
+from gillespie.cli import load_model, main, parse_model
+
+MODEL = '''
+species = ["A", "B"]
+initial = {A = 40}
+
+[[reactions]]
+reactants = {A = 1}
+products = {B = 1}
+rate = 0.5
+
+[[reactions]]
+reactants = {B = 1}
+products = {A = 1}
+rate = 0.2
+
+STOP
+
+[record]
+times = {start = 0, stop = 5, num = 11}
+
+[run]
+engine = "ENGINE"
+seed = 42
+replicates = 4
+'''
+
+
+def write_model(tmp_path, stop='[stop]\ntime = 5.0', engine='direct', name='model.toml', **replace):
+    text = MODEL.replace('STOP', stop).replace('ENGINE', engine)
+    for old, new in replace.items():
+        text = text.replace(old, new)
+    path = tmp_path / name
+    path.write_text(text)
+    return str(path)
+
+
+@pytest.mark.parametrize('engine', ['ssa', 'direct', 'nrm'])
+def test_output_does_not_depend_on_workers(tmp_path, engine):
+    path = write_model(tmp_path, engine=engine)
+    outputs = []
+    for workers in (1, 2):
+        output = str(tmp_path / f'out_{workers}.npz')
+        main([path, '-j', str(workers), '-o', output])
+        outputs.append(np.load(output))
+    serial, parallel = outputs
+    assert sorted(serial.files) == sorted(parallel.files)
+    for key in serial.files:
+        assert np.array_equal(serial[key], parallel[key]), key
+    assert serial['states'].shape == (4, 11, 2)
+    assert np.all(serial['states'].sum(axis=2) == 40)
+
+
+def test_load_toml_model(tmp_path):
+    model = load_model(write_model(tmp_path, stop='[stop]\niterations = 100'))
+    assert model['initial'] == [40, 0]
+    assert model['reactants'] == [[1, 0], [0, 1]]
+    assert model['products'] == [[0, 1], [1, 0]]
+    assert (model['stop_condition'], model['max_iteration']) == ('iterations', 100)
+    assert len(model['record_times']) == 11
+
+
+@pytest.mark.parametrize('stop, engine, replace, message', [
+    ('[stop]\ntime = 5.0', 'direct', {'reactants = {B = 1}': 'reactants = {C = 1}'}, "unknown species 'C'"),
+    ('[stop]\ntime = 5.0', 'direct', {'initial = {A = 40}': 'initial = {A = 40, D = 1}'}, "unknown species 'D'"),
+    ('', 'direct', {}, "KeyError('stop')"),
+    ('[stop]', 'direct', {}, 'stop must give time or iterations'),
+    ('[stop]\ntime = 5.0', 'gillespie', {}, 'Invalid engine'),
+])
+def test_invalid_models(tmp_path, capsys, stop, engine, replace, message):
+    path = write_model(tmp_path, stop=stop, engine=engine, **replace)
+    with pytest.raises(SystemExit) as exit_info:
+        main([path])
+    assert exit_info.value.code == 2
+    assert message in capsys.readouterr().err
+    assert not (tmp_path / 'model.npz').exists()
+
+
+def test_parse_model_errors():
+    model = {'species': ['A', 'B'], 'initial': [1, 0], 'reactants': [[1, 0]], 'products': [[0, 1]], 'rates': [1.0],
+             'stop': {'time': 1.0}}
+    assert parse_model(model)['engine'] == 'ssa'
+    with pytest.raises(KeyError):
+        parse_model({key: value for key, value in model.items() if key != 'stop'})
+    with pytest.raises(ValueError, match='one quantity for each species'):
+        parse_model(dict(model, initial=[1]))
+    with pytest.raises(ValueError, match='unique'):
+        parse_model(dict(model, species=['A', 'A']))
+    with pytest.raises(ValueError, match='Invalid engine'):
+        parse_model(dict(model, run={'engine': 'tau'}))
@@ -0,0 +1,30 @@
+import numpy as np
+import pytest
+from gillespie.ensemble import _select_reactions, gillespie_ensemble
+from gillespie.network import ReactionNetwork
+
+
+def test_select_reactions():
+    propensity = np.array([[1.0, 2.0, 3.0],
+                           [0.0, 5.0, 0.0],
+                           [1.0, 2.0, 0.0]])
+    threshold = np.array([1.5, 0.0, 2.5])
+    assert _select_reactions(propensity, threshold).tolist() == [1, 1, 1]
+
+
+def test_select_reactions_rounding_fallback():
+    # every cumulative sum at or below the threshold, the last reactions have zero propensity
+    propensity = np.array([[1.0, 2.0, 0.0, 0.0],
+                           [0.0, 0.0, 0.0, 4.0]])
+    threshold = np.array([3.0, 4.0])
+    assert _select_reactions(propensity, threshold).tolist() == [1, 3]
+
+
+def test_stationary_moments():
+    # birth-death, stationary Poisson(20)
+    network = ReactionNetwork([[0], [1]], [[1], [0]], [20.0, 1.0])
+    sim = gillespie_ensemble([20], None, network, n_replicates=2000, max_time=5.0, rng=0)
+    final = sim.actual_reagent_quantity[:, 0]
+    assert final.min() >= 0
+    assert final.mean() == pytest.approx(20, abs=0.5)
+    assert final.var() == pytest.approx(20, rel=0.15)
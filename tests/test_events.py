@@ -0,0 +1,114 @@
+import numpy as np
+import pytest
+from gillespie.ensemble import gillespie_ensemble
+from gillespie.events import EventSet, LinearCombination, Threshold, ZeroPropensity
+from gillespie.gillespie_dynamic import gillespie_dynamic
+from gillespie.network import ReactionNetwork
+
+# A -> B, B <-> C: A runs out while B and C keep reacting
+CONVERSION = ReactionNetwork([[1, 0, 0], [0, 1, 0], [0, 0, 1]],
+                             [[0, 1, 0], [0, 0, 1], [0, 1, 0]],
+                             [1.0, 2.0, 2.0])
+
+
+def simulate(reagent_quantity, events, rng, max_time=30.0):
+    # gillespie_ssa stops when any propensity is zero, the dynamic SSA keeps going
+    return gillespie_dynamic(reagent_quantity, None, {'s': CONVERSION}, max_time=max_time, events=events, rng=rng)
+
+
+def test_threshold_first_passage():
+    events = [Threshold(1, 10, name='b_high'), Threshold(0, 5, direction='down', name='a_low')]
+    sim = simulate([30, 0, 0], events, rng=4)
+    times = np.asarray(sim.timestep_list)
+    history = np.asarray(sim.molecular_species_history)
+    passage = sim.events.first_passage
+    for name, species, reached in (('b_high', 1, history[:, 1] >= 10), ('a_low', 0, history[:, 0] <= 5)):
+        first = np.flatnonzero(reached)[0]
+        assert passage[name]['time'] == times[first]
+        assert passage[name]['state'] == history[first].tolist()
+    # recorded once, at the first passage only
+    assert passage['a_low']['state'][0] == 5
+
+
+def test_threshold_on_initial_state():
+    sim = simulate([30, 0, 0], [Threshold(0, 20, name='a')], rng=0, max_time=0.1)
+    assert sim.events.first_passage['a'] == {'time': 0, 'state': [30, 0, 0]}
+
+
+def test_threshold_stop():
+    sim = simulate([30, 0, 0], [LinearCombination({1: 1, 2: 1}, 12, stop=True, name='converted')], rng=2)
+    assert sim.events.stopped
+    assert sim.actual_reagent_quantity[0] == 18
+    assert sim.events.first_passage['converted']['time'] == sim.timestep_list[-1]
+
+
+@pytest.mark.parametrize('stop', [True, False])
+def test_zero_propensity(stop):
+    events = [ZeroPropensity(reactions=[0], stop=stop, name='a_gone')]
+    sim = simulate([10, 0, 0], events, rng=6)
+    passage = sim.events.first_passage['a_gone']
+    times = np.asarray(sim.timestep_list)
+    history = np.asarray(sim.molecular_species_history)
+    # recorded at the first state where A is exhausted
+    first = np.flatnonzero(history[:, 0] == 0)[0]
+    assert passage['time'] == times[first]
+    assert passage['state'][0] == 0
+    assert sim.events.stopped == stop
+    if stop:
+        assert sim.actual_iteration == first
+    else:
+        # B and C keep reacting
+        assert times[-1] >= 30.0 > passage['time']
+
+
+def test_zero_propensity_of_every_reaction():
+    events = EventSet([ZeroPropensity(name='dead')])
+    assert not events.check_propensity(1.0, [1], [0.0, 2.0], 2.0)
+    assert events.check_propensity(3.0, [0], [0.0, 0.0], 0.0)
+    assert events.first_passage == {'dead': {'time': 3.0, 'state': [0]}}
+
+
+def test_affected_by_skips_untouched_events():
+    events = EventSet([Threshold(0, 5, direction='down', name='a'),
+                       Threshold(2, 3, name='c'),
+                       LinearCombination([0, 1, 1], 4, name='bc')])
+    table = events.affected_by(CONVERSION.state_change_vectors)
+    assert table == [[0, 2], [1, 2], [1, 2]]
+    events.start(0.0, [10, 0, 0])
+    # the state satisfies 'a', but reaction 1 does not change A, so 'a' is not evaluated
+    events.check(1.0, [5, 5, 0], table[1])
+    assert list(events.first_passage) == ['bc']
+    events.check(2.0, [5, 5, 0], table[0])
+    assert events.first_passage['a']['time'] == 2.0
+    assert events.first_passage['bc']['time'] == 1.0
+
+
+class CountingEventSet(EventSet):
+
+    def reset(self):
+        super().reset()
+        self.evaluated = []
+
+    def check(self, time, reagent_quantity, affected=None):
+        self.evaluated.append(None if affected is None else list(affected))
+        return super().check(time, reagent_quantity, affected)
+
+
+def test_simulation_only_checks_affected_events():
+    events = CountingEventSet([Threshold(0, 0, direction='down', name='a_gone')])
+    sim = simulate([5, 0, 0], events, rng=1, max_time=5.0)
+    history = np.asarray(sim.molecular_species_history)
+    # initial full check, then the event only after the firings of A -> B
+    assert events.evaluated[0] is None
+    evaluated = [positions == [0] for positions in events.evaluated[1:]]
+    assert evaluated == (np.diff(history[:, 0]) != 0).tolist()
+
+
+def test_ensemble_first_passage():
+    events = [Threshold(1, 10, name='b_high'), ZeroPropensity(reactions=[0], stop=False, name='a_gone')]
+    sim = gillespie_ensemble([20, 0, 0], None, CONVERSION, n_replicates=200, max_time=30.0, events=events, rng=3)
+    assert np.all(np.isfinite(sim.first_passage_time))
+    assert np.all(sim.first_passage_state[:, 0, 1] == 10)
+    assert np.all(sim.first_passage_state[:, 1, 0] == 0)
+    # A runs out after B has collected half of it
+    assert np.all(sim.first_passage_time[:, 0] <= sim.first_passage_time[:, 1])
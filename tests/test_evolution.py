@@ -0,0 +1,70 @@
+import numpy as np
+import pytest
+from gillespie.evolution import EvoSim, MultiSim, VectorSim
+
+PARAMS = {'wt': 60, 'sv': 0, 'r': 0.3, 's': 0.6, 'u': 0.01, 'max_gen': 40}
+FIELDS = ['saved', 'extinct', 'generations', 'wt', 'sv']
+
+
+def test_multisim_does_not_depend_on_chunk_size():
+    reference = MultiSim(50, PARAMS, ncore=1, seed=3, chunk_size=50)
+    for chunk_size in (1, 7):
+        sim = MultiSim(50, PARAMS, ncore=1, seed=3, chunk_size=chunk_size)
+        for field in FIELDS:
+            assert np.array_equal(getattr(sim, field), getattr(reference, field))
+    # and match EvoSim run alone on the stream of each epoch
+    seeds = np.random.SeedSequence(3).spawn(50)
+    for epoch in (0, 17, 49):
+        evo = EvoSim(rng=seeds[epoch], **PARAMS)
+        assert (evo.saved, evo.generations, evo.wt, evo.sv) == (reference.saved[epoch], reference.generations[epoch],
+                                                                 reference.wt[epoch], reference.sv[epoch])
+
+
+def test_summary_only_matches_full_run():
+    full = MultiSim(40, PARAMS, ncore=1, seed=5, chunk_size=6)
+    summary = MultiSim(40, PARAMS, ncore=1, seed=5, chunk_size=6, summary_only=True)
+    for field in FIELDS:
+        assert np.array_equal(getattr(summary, field), getattr(full, field))
+    assert summary.results is None and summary.rescued is None
+    assert summary.rescued_n == full.rescued_n == len(full.rescued)
+
+
+@pytest.mark.parametrize('summary_only', [False, True])
+def test_history_path(tmp_path, summary_only):
+    path = str(tmp_path / 'history.npy')
+    sim = MultiSim(12, PARAMS, ncore=1, seed=8, chunk_size=5, summary_only=summary_only, history_path=path)
+    assert sim.history.shape == (12, 2, PARAMS['max_gen'])
+    assert np.array_equal(np.load(path), sim.history)
+    seeds = np.random.SeedSequence(8).spawn(12)
+    for epoch in range(12):
+        evo = EvoSim(rng=seeds[epoch], **PARAMS)
+        assert np.array_equal(sim.history[epoch, 0, :evo.generations], evo.wt_array)
+        assert np.array_equal(sim.history[epoch, 1, :evo.generations], evo.sv_array)
+        assert not sim.history[epoch, :, evo.generations:].any()
+        assert sim.generations[epoch] == evo.generations
+
+
+def test_vectorsim_matches_multisim():
+    epochs = 3000
+    vector = VectorSim(epochs, PARAMS, seed=1)
+    multi = MultiSim(epochs, PARAMS, ncore=1, seed=2, summary_only=True)
+    p_vector, p_multi = vector.rescue_probability, multi.rescued_n / epochs
+    p = (p_vector + p_multi) / 2
+    assert abs(p_vector - p_multi) < 4 * np.sqrt(2 * p * (1 - p) / epochs)
+    assert vector.generations.mean() == pytest.approx(multi.generations.mean(), rel=0.05)
+
+
+def test_vectorsim_without_epochs():
+    sim = VectorSim(0, PARAMS, seed=1, keep_history=True)
+    assert np.isnan(sim.rescue_probability)
+    assert sim.rescued_n == 0
+    assert sim.saved.dtype == bool and len(sim.saved) == 0
+    assert sim.wt_history.shape == (0, PARAMS['max_gen'])
+
+
+def test_replicable_is_seed_zero():
+    replicable = MultiSim(20, PARAMS, ncore=1, replicable=True)
+    seeded = MultiSim(20, PARAMS, ncore=1, seed=0)
+    assert replicable.seed == 0
+    for field in FIELDS:
+        assert np.array_equal(getattr(replicable, field), getattr(seeded, field))
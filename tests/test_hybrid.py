@@ -0,0 +1,45 @@
+import numpy as np
+import pytest
+from gillespie.hybrid import gillespie_hybrid
+from gillespie.network import ReactionNetwork
+
+DECAY = ReactionNetwork([[1]], [[0]], [1.0])
+# birth-death at scale 2000, stationary Poisson(2000)
+BIRTH_DEATH = ReactionNetwork([[0], [1]], [[1], [0]], [2000.0, 1.0])
+
+
+def test_fast_while_abundant():
+    sim = gillespie_hybrid([10_000], None, DECAY, max_time=0.5, rng=0)
+    assert sim.partition.tolist() == [True]
+    assert sim.n_slow_events == 0
+    assert sim.actual_reagent_quantity[0] == pytest.approx(10_000 * np.exp(-0.5), rel=0.02)
+
+
+def test_partition_switches_to_exact_when_rare():
+    sim = gillespie_hybrid([10_000], None, DECAY, max_time=15.0, rng=1)
+    # the decay became slow below the thresholds and ran down exactly
+    assert sim.partition.tolist() == [False]
+    assert sim.n_slow_events >= 90
+    states = np.asarray(sim.molecular_species_history)
+    assert states.min() >= 0
+    assert sim.actual_reagent_quantity[0] < 1
+
+
+@pytest.mark.parametrize('method', ['langevin', 'ode'])
+def test_stationary_moments(method):
+    grid = np.arange(20.0, 400.0, 1.0)
+    sim = gillespie_hybrid([2000], None, BIRTH_DEATH, max_time=400.0, method=method, record_times=grid, rng=2)
+    samples = np.asarray(sim.molecular_species_history)[:, 0]
+    assert samples.mean() == pytest.approx(2000, abs=15)
+    if method == 'langevin':
+        assert samples.var() == pytest.approx(2000, rel=0.25)
+    else:
+        assert samples.var() < 1
+
+
+def test_minimum_step_keeps_the_clock_moving():
+    # a huge slow propensity, whose waiting times round to (almost) nothing
+    huge = [lambda b: 1e300]
+    sim = gillespie_hybrid([0], [[1]], huge, max_time=1e-6, population_threshold=np.inf, min_step=1e-9, rng=3)
+    assert sim.actual_time == pytest.approx(1e-6)
+    assert sim.actual_iteration <= 1001
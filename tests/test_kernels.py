@@ -0,0 +1,90 @@
+import numpy as np
+import pytest
+from gillespie import kernels
+from gillespie.gillespie import gillespie_ssa
+from gillespie.gillespie_dynamic import gillespie_dynamic
+from gillespie.network import ReactionNetwork
+from gillespie.schedule import RegimeSchedule
+
+# birth-death of A (stationary Poisson(k_birth / k_death)), B fixed
+BIRTH_DEATH = ReactionNetwork([[0, 0], [1, 0]], [[1, 0], [0, 0]], [10.0, 1.0])
+FAST_BIRTH = ReactionNetwork([[0, 0], [1, 0]], [[1, 0], [0, 0]], [30.0, 1.0])
+
+
+@pytest.fixture
+def kernel_backend(monkeypatch):
+    '''
+    Run backend='numba' on the compiled kernel if numba is installed, else on the Python kernel.
+    '''
+    if not kernels.NUMBA_AVAILABLE:
+        monkeypatch.setattr(kernels, 'NUMBA_AVAILABLE', True)
+        monkeypatch.setattr(kernels, '_compiled_kernel', kernels.direct_kernel)
+
+
+def assert_same_moments(reference, kernel):
+    n = len(reference)
+    standard_error = np.sqrt(reference.var(axis=0) / n + kernel.var(axis=0) / n)
+    assert np.all(np.abs(reference.mean(axis=0) - kernel.mean(axis=0)) < 4 * standard_error)
+    assert np.all((0.7 < kernel.var(axis=0) / reference.var(axis=0)) & (kernel.var(axis=0) / reference.var(axis=0) < 1.4))
+
+
+def test_gillespie_ssa_kernel_matches_python(kernel_backend):
+    final = {}
+    for backend in ('python', 'numba'):
+        # started far from zero, gillespie_ssa stops at the first zero propensity
+        runs = [gillespie_ssa([30, 3], None, FAST_BIRTH, iteration=300, set_fixed_reagents=[1],
+                              rng=seed, backend=backend) for seed in range(300)]
+        assert all(sim.use_kernel == (backend == 'numba') for sim in runs)
+        assert all(sim.molecular_species_history.shape == (301, 2) for sim in runs)
+        assert all(np.all(sim.molecular_species_history[:, 1] == 3) for sim in runs)
+        final[backend] = np.array([[sim.molecular_species_history[-1, 0], sim.timestep_list[-1]] for sim in runs])
+    assert_same_moments(final['python'], final['numba'])
+
+
+def test_gillespie_dynamic_kernel_matches_python(kernel_backend):
+    final = {}
+    for backend in ('python', 'numba'):
+        runs = [gillespie_dynamic([5, 3], None, {'a': BIRTH_DEATH, 'b': FAST_BIRTH}, max_time=20,
+                                  schedule=RegimeSchedule(['a', 'b'], [1.3, 0.7]), set_fixed_reagents=[1],
+                                  record_every=0, rng=seed, backend=backend) for seed in range(300)]
+        # the switches are exact in both
+        assert all(sim.time_tracker['a']['start'] == pytest.approx([0, 2, 4, 6, 8, 10, 12, 14, 16, 18]) for sim in runs)
+        final[backend] = np.array([[sim.molecular_species_history[-1, 0], sim.actual_iteration] for sim in runs])
+    assert_same_moments(final['python'], final['numba'])
+
+
+def test_kernel_recording_matches_full_trajectory(kernel_backend):
+    full = gillespie_ssa([5, 3], None, BIRTH_DEATH, iteration=500, rng=1, backend='numba')
+    thinned = gillespie_ssa([5, 3], None, BIRTH_DEATH, iteration=500, rng=1, backend='numba', record_every=3)
+    assert np.array_equal(thinned.molecular_species_history[:-1], full.molecular_species_history[:-1:3])
+    assert np.array_equal(thinned.molecular_species_history[-1], full.molecular_species_history[-1])
+
+
+def test_kernel_keeps_random_numbers_across_switches(kernel_backend, monkeypatch):
+    drawn = []
+
+    class CountingDraws(kernels.KernelDraws):
+        def take(self, n):
+            if self._position == len(self._exponentials):
+                drawn.append(self._block)
+            return super().take(n)
+
+    monkeypatch.setattr(kernels, 'KernelDraws', CountingDraws)
+    # about 500 switches with a few events each
+    sim = gillespie_dynamic([5, 3], None, {'a': BIRTH_DEATH, 'b': FAST_BIRTH}, max_time=100,
+                            schedule=RegimeSchedule(['a', 'b'], [0.1, 0.1]), record_every=0, rng=0, backend='numba')
+    switches = len(sim.time_tracker['a']['start']) + len(sim.time_tracker['b']['start'])
+    assert switches >= 500
+    assert sum(drawn) <= 2 * (sim.actual_iteration + switches) + 2048
+
+
+def test_kernel_selection_falls_back_to_last_positive_reaction(kernel_backend):
+    # A -> 0 and B -> 0 with no B: a threshold at the total (rounding) must not fire B -> 0
+    network = ReactionNetwork([[1, 0], [0, 1]], [[0, 0], [0, 0]], [1.0, 1.0])
+    state = np.array([3, 0], dtype=np.int64)
+    times_out, states_out = np.empty(1), np.empty((1, 2), dtype=np.int64)
+    count, _, status = kernels.compiled_kernel()(
+        state, 0.0, np.inf, np.inf, False, False, *kernels.kernel_tables(network),
+        np.array([1.0]), np.array([1.0]), times_out, states_out)
+    assert (count, status) == (1, kernels.BLOCK_DONE)
+    assert state.tolist() == [2, 0]
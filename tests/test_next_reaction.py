@@ -0,0 +1,58 @@
+import numpy as np
+import pytest
+from gillespie.direct import gillespie_direct
+from gillespie.network import ReactionNetwork
+from gillespie.next_reaction import IndexedPriorityQueue, gillespie_nrm
+
+# birth-death, 0 -> A at rate 20 and A -> 0 at rate 1, stationary Poisson(20)
+BIRTH_DEATH = ReactionNetwork([[0], [1]], [[1], [0]], [20.0, 1.0])
+
+
+def assert_heap(queue):
+    keys, heap = queue.keys, queue.heap
+    for pos in range(1, len(heap)):
+        assert keys[heap[(pos - 1) >> 1]] <= keys[heap[pos]]
+    for pos, index in enumerate(heap):
+        assert queue.position[index] == pos
+    assert sorted(heap) == list(range(len(keys)))
+
+
+def test_heap_invariant_after_updates():
+    rng = np.random.default_rng(0)
+    queue = IndexedPriorityQueue(rng.exponential(size=50))
+    assert_heap(queue)
+    for _ in range(2000):
+        if rng.random() < 0.5:
+            # fire the top reaction, as gillespie_nrm does: its key moves forward
+            index = queue.top()
+            key = queue.keys[index] + rng.exponential()
+        else:
+            index = int(rng.integers(50))
+            key = np.inf if rng.random() < 0.1 else float(rng.exponential(5))
+        queue.update(index, key)
+        assert_heap(queue)
+        assert queue.keys[queue.top()] == min(queue.keys)
+
+
+def stationary_samples(engine, seed):
+    grid = np.arange(10.0, 1000.0, 0.5)
+    sim = engine([20], None, BIRTH_DEATH, max_time=1000, record_times=grid, rng=seed)
+    return np.asarray(sim.molecular_species_history)[:, 0]
+
+
+def test_nrm_matches_direct_in_distribution():
+    nrm = stationary_samples(gillespie_nrm, 1)
+    direct = stationary_samples(gillespie_direct, 2)
+    for samples in (nrm, direct):
+        assert samples.mean() == pytest.approx(20, abs=1.0)
+        assert samples.var() == pytest.approx(20, rel=0.2)
+    # the two empirical distributions agree on the bulk quantiles
+    quantiles = [0.1, 0.25, 0.5, 0.75, 0.9]
+    assert np.abs(np.quantile(nrm, quantiles) - np.quantile(direct, quantiles)).max() <= 2
+
+
+def test_nrm_is_reproducible():
+    first = gillespie_nrm([20], None, BIRTH_DEATH, max_iteration=500, stop_condition='iterations', rng=5)
+    second = gillespie_nrm([20], None, BIRTH_DEATH, max_iteration=500, stop_condition='iterations', rng=5)
+    assert np.array_equal(first.timestep_list, second.timestep_list)
+    assert np.array_equal(first.molecular_species_history, second.molecular_species_history)
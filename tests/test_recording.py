@@ -0,0 +1,31 @@
+import numpy as np
+import pytest
+from gillespie.gillespie import gillespie_ssa
+from gillespie.network import ReactionNetwork
+from gillespie.recording import TrajectoryRecorder, recorder_capacity
+
+# birth-death, 0 -> A and A -> 0
+BIRTH_DEATH = ReactionNetwork([[0], [1]], [[1], [0]], [10.0, 0.1])
+
+
+@pytest.mark.parametrize('every', [1, 3, 10, 100])
+def test_capacity_follows_every(every):
+    sim = gillespie_ssa([5], BIRTH_DEATH.state_change_matrix.tolist(), BIRTH_DEATH, iteration=1_000, rng=3, record_every=every)
+    # the buffers fit the thinned trajectory, without growing
+    assert len(sim.recorder._times) == recorder_capacity(1_000, every) == 1_000 // every + 2
+    assert len(sim.recorder) <= len(sim.recorder._times)
+
+
+def test_capacity_holds_last_event():
+    recorder = TrajectoryRecorder([0], every=3, capacity=recorder_capacity(10, 3))
+    for event in range(1, 11):
+        recorder.record(float(event), [event])
+    recorder.finalize(10.0)
+    assert len(recorder._times) == recorder_capacity(10, 3)
+    assert np.array_equal(recorder.times, [0, 3, 6, 9, 10])
+
+
+def test_capacity_limits():
+    assert recorder_capacity(None, 5) == 1024
+    assert recorder_capacity(10**9, 0) == 2
+    assert recorder_capacity(10**9, 1) == 1_000_002
@@ -0,0 +1,48 @@
+import numpy as np
+from gillespie.gillespie import gillespie_ssa
+from gillespie.network import ReactionNetwork
+from gillespie.rng import BufferedRandom, make_rng, spawn_rngs
+
+BIRTH_DEATH = ReactionNetwork([[0], [1]], [[1], [0]], [20.0, 1.0])
+
+
+def run(rng=None):
+    ssa = gillespie_ssa([5], None, BIRTH_DEATH, iteration=300, rng=rng)
+    return np.asarray(ssa.timestep_list), np.asarray(ssa.molecular_species_history)
+
+
+def test_default_follows_np_random_seed():
+    np.random.seed(11)
+    first = run()
+    np.random.seed(11)
+    second = run()
+    assert np.array_equal(first[0], second[0]) and np.array_equal(first[1], second[1])
+
+
+def test_default_consumes_global_stream_in_blocks():
+    np.random.seed(2)
+    buffered = BufferedRandom(block_size=64)
+    assert buffered.rng is np.random.mtrand._rand
+    reference = np.random.RandomState(2)
+    assert buffered.random() == reference.random()
+    # the rest of the block was taken from the global stream too
+    reference.random(63)
+    assert np.random.random() == reference.random()
+
+
+def test_seed_is_independent_of_global_state():
+    np.random.seed(0)
+    first = run(rng=7)
+    np.random.seed(1)
+    second = run(rng=7)
+    assert np.array_equal(first[0], second[0]) and np.array_equal(first[1], second[1])
+
+
+def test_make_rng_and_spawn():
+    generator = np.random.default_rng(3)
+    assert make_rng(generator) is generator
+    assert make_rng(BufferedRandom(generator)) is generator
+    first, second = spawn_rngs(5, 2)
+    again = spawn_rngs(np.random.SeedSequence(5), 2)
+    assert first.random() == again[0].random()
+    assert second.random() == again[1].random()
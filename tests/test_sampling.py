@@ -0,0 +1,134 @@
+import numpy as np
+import pytest
+from gillespie.gillespie import gillespie_ssa
+from gillespie.gillespie_dynamic import gillespie_dynamic
+from gillespie.direct import gillespie_direct
+from gillespie.network import ReactionNetwork
+from gillespie.rng import BufferedRandom
+from gillespie.sampling import SAMPLERS, PropensityTracker, make_sampler
+from gillespie.stochastic_backend import calculate_mu, calculate_propensity_funct
+
+SAMPLER_NAMES = list(SAMPLERS)
+
+
+def selection_frequencies(sampler, n_reactions, n_samples):
+    counts = np.bincount([sampler.sample() for _ in range(n_samples)], minlength=n_reactions)
+    return counts / n_samples
+
+
+@pytest.mark.parametrize('name', SAMPLER_NAMES)
+def test_selection_frequencies(name):
+    propensities = np.array([1.0, 2.0, 3.0, 0.0, 4.0])
+    sampler = make_sampler(name, propensities, rng=BufferedRandom(0))
+    # after updates the frequencies follow the new propensities
+    sampler.update(0, 5.0)
+    sampler.update(2, 0.5)
+    propensities[[0, 2]] = [5.0, 0.5]
+    n_samples = 100_000
+    expected = propensities / propensities.sum()
+    frequencies = selection_frequencies(sampler, len(propensities), n_samples)
+    tolerance = 5 * np.sqrt(expected * (1 - expected) / n_samples)
+    assert np.all(np.abs(frequencies - expected) <= tolerance)
+    assert frequencies[3] == 0
+    assert sampler.total == pytest.approx(propensities.sum())
+
+
+@pytest.mark.parametrize('name', SAMPLER_NAMES)
+def test_total_is_zero_when_every_propensity_is_zero(name):
+    sampler = make_sampler(name, [0.1, 0.2], rng=BufferedRandom(0))
+    sampler.update(0, 0.0)
+    sampler.update(1, 0.0)
+    assert sampler.total == 0.0
+
+
+@pytest.mark.parametrize('name', SAMPLER_NAMES)
+@pytest.mark.parametrize('reactants, products, rates', [
+    # A -> B -> 0
+    ([[1, 0], [0, 1]], [[0, 1], [0, 0]], [1.0, 0.7]),
+    # A -> 0, B -> 0
+    ([[1, 0], [0, 1]], [[0, 0], [0, 0]], [0.1, 0.2]),
+])
+def test_decay_to_extinction(name, reactants, products, rates):
+    # every propensity reaches zero, the simulation must stop cleanly
+    network = ReactionNetwork(reactants, products, rates)
+    initial = [10, 10] if np.sum(products) == 0 else [10, 0]
+    for seed in range(20):
+        sim = gillespie_direct(initial, None, network, max_time=np.inf, sampler=name, rng=seed)
+        assert sim.actual_reagent_quantity == [0, 0]
+        assert sim.actual_iteration == 20
+
+
+def end_points(engine, network, sampler, seeds, iterations):
+    if engine == 'direct':
+        sims = (gillespie_direct([20], None, network, max_iteration=iterations, stop_condition='iterations',
+                                 sampler=sampler, rng=seed) for seed in seeds)
+    elif engine == 'ssa':
+        sims = (gillespie_ssa([20], None, network, iteration=iterations, sampler=sampler, rng=seed) for seed in seeds)
+    else:
+        sims = (gillespie_dynamic([20], None, {'only': network}, max_iteration=iterations, stop_condition='iterations',
+                                  sampler=sampler, rng=seed) for seed in seeds)
+    return np.array([sim.actual_reagent_quantity[0] for sim in sims])
+
+
+# birth-death, stationary Poisson(20), never reaching zero in practice
+BIRTH_DEATH = ReactionNetwork([[0], [1]], [[1], [0]], [20.0, 1.0])
+N_REPLICATES, ITERATIONS = 300, 200
+
+
+@pytest.fixture(scope='module')
+def reference():
+    # the linear scan of gillespie_ssa, the selection rule of calculate_mu
+    return end_points('ssa', BIRTH_DEATH, 'linear', range(N_REPLICATES), ITERATIONS)
+
+
+@pytest.mark.parametrize('engine', ['direct', 'ssa', 'dynamic'])
+@pytest.mark.parametrize('name', SAMPLER_NAMES)
+def test_end_point_moments_match_linear_scan(reference, engine, name):
+    n_replicates = N_REPLICATES
+    values = end_points(engine, BIRTH_DEATH, name, range(10_000, 10_000 + n_replicates), ITERATIONS)
+    standard_error = np.sqrt(reference.var() / n_replicates + values.var() / n_replicates)
+    assert abs(reference.mean() - values.mean()) < 4 * standard_error
+    assert 0.7 < values.var() / reference.var() < 1.4
+
+
+def test_linear_sampler_matches_calculate_mu():
+    propensities = [0.5, 0.0, 2.0, 1.5, 0.25]
+    sampler = make_sampler('linear', propensities, rng=BufferedRandom(9))
+    rng = BufferedRandom(9)
+    for _ in range(1000):
+        assert sampler.sample() == calculate_mu(propensities, sum(propensities), rng=rng)
+
+
+def test_tree_propensities_exclude_padding():
+    sampler = make_sampler('tree', [1.0, 2.0, 3.0, 4.0, 5.0], rng=BufferedRandom(0))
+    sampler.update(4, 0.5)
+    assert sampler.propensities == [1.0, 2.0, 3.0, 4.0, 0.5]
+
+
+# A + B -> C, C -> A + B, 2 A -> 0, 0 -> B, B -> 0
+NETWORK = ReactionNetwork([[1, 1, 0], [0, 0, 1], [2, 0, 0], [0, 0, 0], [0, 1, 0]],
+                          [[0, 0, 1], [1, 1, 0], [0, 0, 0], [0, 1, 0], [0, 0, 0]],
+                          [0.01, 0.5, 0.002, 3.0, 0.1])
+LAMBDAS = [lambda a, b, c: 0.01 * a * b, lambda a, b, c: 0.5 * c, lambda a, b, c: 0.001 * a * (a - 1),
+           lambda a, b, c: 3.0, lambda a, b, c: 0.1 * b]
+
+
+@pytest.mark.parametrize('name', SAMPLER_NAMES)
+@pytest.mark.parametrize('combinatorics', [NETWORK, LAMBDAS], ids=['network', 'lambdas'])
+@pytest.mark.parametrize('fixed', [None, [1]])
+def test_tracker_matches_full_recompute(name, combinatorics, fixed):
+    state = [30, 0, 5]
+    initial = list(state)
+    tracker = PropensityTracker(combinatorics, state, sampler=name, rng=BufferedRandom(1), fixed_species=fixed)
+    for _ in range(500):
+        if tracker.total <= 0:
+            break
+        mu = tracker.sample()
+        state = [quantity + change for quantity, change in zip(state, NETWORK.state_change_vectors[mu])]
+        for index in fixed or []:
+            state[index] = initial[index]
+        tracker.refresh(state, mu)
+        expected = [float(value) for value in calculate_propensity_funct(state, combinatorics)]
+        assert tracker.values == pytest.approx(expected, abs=1e-12)
+        assert tracker.total == pytest.approx(sum(expected))
+        assert tracker.n_zero == expected.count(0.0)
@@ -0,0 +1,76 @@
+import numpy as np
+import pytest
+from gillespie.gillespie_dynamic import gillespie_dynamic
+from gillespie.network import ReactionNetwork
+from gillespie.schedule import RegimeSchedule
+
+
+def naive_locate(schedule, time):
+    # walk the sequence with next from time 0
+    index, end = 0, schedule.durations[0]
+    while end <= time:
+        index, end = schedule.next(index, end)
+    return index, end
+
+
+def test_locate_wraps_around_cyclic_schedule():
+    schedule = RegimeSchedule(['a', 'b', 'c'], [1.0, 2.0, 0.5])
+    assert schedule.locate(0.0) == (0, 1.0)
+    # a boundary belongs to the state that starts there
+    assert schedule.locate(1.0) == (1, 3.0)
+    assert schedule.locate(3.5) == (0, 4.5)
+    assert schedule.locate(7.2) == (0, 8.0)
+    assert schedule.locate(10.4) == (2, 10.5)
+
+
+@pytest.mark.parametrize('durations', [[1.0, 2.0, 0.5], [0.1, 0.2], [0.7, 1.3, 0.1, 0.3]])
+def test_locate_matches_next(durations):
+    schedule = RegimeSchedule([str(i) for i in range(len(durations))], durations)
+    period = sum(durations)
+    # random times and the period boundaries, where rounding can wrap the index
+    times = np.concatenate([np.random.default_rng(0).uniform(0, 20 * period, 200),
+                            np.arange(1, 40) * period])
+    for time in times:
+        index, end = schedule.locate(time)
+        assert end > time
+        assert end - durations[index] <= time + 1e-9
+        expected_index, expected_end = naive_locate(schedule, time)
+        if abs(expected_end - end) > 1e-9:
+            # the two only disagree within rounding of a boundary
+            assert min(abs(time - end), abs(time - expected_end), abs(time - end + durations[index])) < 1e-9
+        else:
+            assert index == expected_index
+
+
+def test_next_of_piecewise_schedule():
+    schedule = RegimeSchedule.piecewise(['a', 'b'], switch_times=[20.0])
+    assert schedule.locate(5.0) == (0, 20.0)
+    assert schedule.next(0, 20.0) == (1, np.inf)
+    assert schedule.next(1, np.inf) == (1, np.inf)
+    assert schedule.locate(1e9) == (1, np.inf)
+
+
+def test_switches_land_on_the_schedule():
+    # A is only produced in state a, B only in state b
+    networks = {'a': ReactionNetwork([[0, 0]], [[1, 0]], [20.0]),
+                'b': ReactionNetwork([[0, 0]], [[0, 1]], [20.0])}
+    schedule = RegimeSchedule(['a', 'b', 'a'], [1.3, 0.7, 0.4])
+    sim = gillespie_dynamic([1, 1], None, networks, max_time=30.0, schedule=schedule, rng=1)
+
+    # the switch times are the boundaries of the schedule, without overshoot
+    boundaries = [0.0]
+    index, end = 0, schedule.durations[0]
+    while end < 30.0:
+        boundaries.append(end)
+        index, end = schedule.next(index, end)
+    starts = sorted(sim.time_tracker['a']['start'] + sim.time_tracker['b']['start'])
+    assert starts == boundaries
+    ends = sorted(sim.time_tracker['a']['end'] + sim.time_tracker['b']['end'])
+    assert ends[:-1] == boundaries[1:]
+
+    # every event happened inside an interval of the state that can fire it
+    times = np.asarray(sim.timestep_list)[1:]
+    steps = np.diff(np.asarray(sim.molecular_species_history), axis=0)
+    for time, step in zip(times, steps):
+        index, _ = schedule.locate(time)
+        assert schedule.state(index) == ('a' if step[0] else 'b')
@@ -0,0 +1,29 @@
+import numpy as np
+import pytest
+from gillespie.gillespie_dynamic import gillespie_dynamic
+from gillespie.network import ReactionNetwork
+from gillespie.statistics import TimeWeightedStats
+
+BIRTH_DEATH = ReactionNetwork([[0], [1]], [[1], [0]], [10.0, 1.0])
+
+
+def reference_moments(times, states, burn_in, end_time):
+    # state k is held from times[k] to times[k + 1], clipped to [burn_in, end_time]
+    ends = np.minimum(np.append(times[1:], end_time), end_time)
+    weights = np.maximum(ends - np.maximum(times, burn_in), 0.0)
+    mean = weights @ states / weights.sum()
+    variance = weights @ (states - mean) ** 2 / weights.sum()
+    return weights.sum(), mean, variance
+
+
+@pytest.mark.parametrize('block_size', [2, 7, 4096])
+def test_time_weighted_moments_stop_at_max_time(block_size):
+    statistics = TimeWeightedStats(1, burn_in=5, block_size=block_size)
+    sim = gillespie_dynamic([10], None, {'a': BIRTH_DEATH}, max_time=50, rng=0, statistics=statistics)
+    # the last event overshoots max_time
+    assert sim.timestep_list[-1] > 50
+    total_time, mean, variance = reference_moments(sim.timestep_list, sim.molecular_species_history, 5, 50)
+    assert statistics.total_time == pytest.approx(45.0)
+    assert total_time == pytest.approx(45.0)
+    assert statistics.mean == pytest.approx(mean)
+    assert statistics.variance == pytest.approx(variance)
@@ -0,0 +1,25 @@
+import os
+import numpy as np
+from gillespie.sweep import rescue_sweep
+
+PARAMS = {'wt': 1000, 'sv': 10, 'r': 0.2, 's': 0.5, 'u': 1e-4, 'max_gen': 200}
+
+
+def test_numpy_grid_matches_list_grid(tmp_path):
+    numpy_grid = {'wt': np.array([100, 200]), 's': np.linspace(0.3, 0.5, 2)}
+    list_grid = {'wt': [100, 200], 's': [0.3, 0.5]}
+    from_numpy = rescue_sweep(PARAMS, numpy_grid, epochs=500, seed=3, cache_dir=str(tmp_path), ncore=1)
+    assert len(os.listdir(tmp_path)) == 4
+    # same points, same keys: read back from the cache
+    from_list = rescue_sweep(PARAMS, list_grid, epochs=500, seed=3, cache_dir=str(tmp_path), ncore=1)
+    assert len(os.listdir(tmp_path)) == 4
+    assert np.array_equal(from_numpy['rescued'], from_list['rescued'])
+    assert np.all(from_numpy['epochs'] == 500)
+
+
+def test_unseeded_sweep(tmp_path):
+    table = rescue_sweep(PARAMS, {'r': [0.2]}, epochs=200, seed=None, cache_dir=str(tmp_path), ncore=1)
+    assert table['epochs'][0] == 200
+    # fresh entropy each time, nothing is reused from the cache
+    rescue_sweep(PARAMS, {'r': [0.2]}, epochs=200, seed=None, cache_dir=str(tmp_path), ncore=1)
+    assert len(os.listdir(tmp_path)) == 2
@@ -0,0 +1,65 @@
+import numpy as np
+import pytest
+from gillespie.gillespie import gillespie_ssa
+from gillespie.network import ReactionNetwork
+from gillespie.rng import BufferedRandom
+from gillespie.tau_leaping import TauLeaper
+
+# decay A -> 0 and dimerization 2 A -> B
+DECAY_DIMER = ReactionNetwork([[1, 0], [2, 0]], [[0, 0], [0, 1]], [1.0, 0.002])
+
+
+@pytest.mark.parametrize('epsilon', [0.03, 0.3])
+def test_populations_stay_non_negative(epsilon):
+    sim = gillespie_ssa([5000, 0], DECAY_DIMER.state_change_vectors, DECAY_DIMER, iteration=3000,
+                        method='tau_leaping', epsilon=epsilon, rng=4)
+    states = np.asarray(sim.molecular_species_history)
+    assert states.min() >= 0
+    assert min(sim.actual_reagent_quantity) >= 0
+    # the run got down to the last molecules, through the critical reactions
+    assert states[-1, 0] < 10
+
+
+def test_falls_back_to_exact_steps():
+    network = ReactionNetwork([[1]], [[0]], [1.0])
+    leaper = TauLeaper(network.state_change_vectors, network, n_exact_steps=50, rng=BufferedRandom(0))
+    # 20 molecules: the leap (epsilon * 20 / 20) is shorter than 10 / a0
+    assert leaper.leap([20], [20.0], 20.0) is None
+    assert leaper.exact_steps == 49
+    # 10^5 molecules: the leap is long enough
+    tau, change = leaper.leap([100_000], [100_000.0], 100_000.0)
+    assert tau > 10 / 100_000
+    assert change[0] < 0
+
+
+class ScriptedRandom:
+    '''
+    Generator stub: fixed exponentials, and a first Poisson draw that empties the population.
+    '''
+
+    def __init__(self):
+        self.n_exponentials = 0
+        self.n_poisson = 0
+
+    def exponential(self):
+        self.n_exponentials += 1
+        return 1e6
+
+    def random(self):
+        return 0.5
+
+    def poisson(self, lam):
+        self.n_poisson += 1
+        return np.full(np.shape(lam), 10**6 if self.n_poisson == 1 else 0, dtype=np.int64)
+
+
+def test_retry_draws_a_new_critical_time():
+    # A -> 0 is non critical with 1000 molecules, B -> 0 is critical with 3
+    network = ReactionNetwork([[1, 0], [0, 1]], [[0, 0], [0, 0]], [1.0, 1.0])
+    rng = ScriptedRandom()
+    leaper = TauLeaper(network.state_change_vectors, network, rng=rng)
+    tau, change = leaper.leap([1000, 3], [1000.0, 3.0], 1003.0)
+    assert rng.n_poisson == 2
+    # one critical time per attempt
+    assert rng.n_exponentials == 2
+    assert change == [0, 0]